@@ -0,0 +1,197 @@
+"""
+Callback плагин Ansible: время каждой задачи на каждом хосте
+На каждый результат задачи (ok, changed, failed, skipped, unreachable)
+в конец файла JSON-lines дописывается строка с запуском, плейбуком,
+плеем и его стратегией, ролью, задачей, хостом, временем начала и
+длительностью. Задача может выполниться на хосте несколько раз (например,
+в цикле include_tasks) - тогда строк несколько. В конце запуска - строка
+с итогами и настройками из ansible.cfg (forks, pipelining, кэш фактов),
+чтобы сравнивать запуски до и после их изменения. Отчет: zbxctl
+ansible-timings.
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: task_timing
+    type: aggregate
+    short_description: Записывает время задач по хостам и ролям в JSON-lines
+    description:
+        - Время каждой задачи на каждом хосте и итоги запуска дописываются в файл,
+          отчет строит zbxctl ansible-timings.
+    requirements:
+        - callbacks_enabled = task_timing в ansible.cfg
+    options:
+      path:
+        description: Файл с записями запусков.
+        default: ~/.cache/zbxtools/ansible-timings.jsonl
+        env:
+          - name: ZBX_ANSIBLE_TIMINGS
+        ini:
+          - section: callback_task_timing
+            key: path
+'''
+
+import hashlib
+import json
+import os
+import time
+
+from ansible import constants as C
+from ansible.plugins.callback import CallbackBase
+
+# Настройки, которые влияют на время запуска; попадают в итоговую запись
+SETTINGS = {
+    'forks': 'DEFAULT_FORKS',
+    'strategy': 'DEFAULT_STRATEGY',
+    'gathering': 'DEFAULT_GATHERING',
+    'fact_caching': 'CACHE_PLUGIN',
+    'pipelining': 'ANSIBLE_PIPELINING',
+}
+
+
+def config_settings():
+    settings = {}
+    for name, constant in SETTINGS.items():
+        try:
+            settings[name] = C.config.get_config_value(constant)
+        except Exception:
+            settings[name] = getattr(C, constant, None)
+    return settings
+
+
+def config_hash():
+    """Короткий хеш ansible.cfg: запуски с разными настройками видны в отчете"""
+    if not C.CONFIG_FILE:
+        return None
+    try:
+        with open(C.CONFIG_FILE, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()[:12]
+    except OSError:
+        return None
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'task_timing'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, *args, **kwargs):
+        super(CallbackModule, self).__init__(*args, **kwargs)
+        self.run_id = '%s-%d' % (time.strftime('%Y%m%dT%H%M%S'), os.getpid())
+        self.started = time.time()
+        self.playbook = None
+        self.play = None
+        # Стратегия текущего плея (strategy в плее или ansible.cfg): от нее зависит критический путь
+        self.strategy = None
+        self.tasks = 0
+        # (uuid задачи, хост) -> время начала; без v2_runner_on_start - начало задачи
+        self.task_started = {}
+        self.host_started = {}
+        self.handlers = set()
+        self._file = None
+
+    def set_options(self, task_keys=None, var_options=None, direct=None):
+        super(CallbackModule, self).set_options(task_keys=task_keys, var_options=var_options,
+                                                direct=direct)
+        self.path = os.path.expanduser(self.get_option('path'))
+
+    def _write(self, record):
+        if self._file is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            self._file = open(self.path, 'a')
+        # Строка сбрасывается сразу: прерванный запуск тоже попадает в отчет
+        self._file.write(json.dumps(record, sort_keys=True) + '\n')
+        self._file.flush()
+
+    # --- Плейбук, плей, задачи
+
+    def v2_playbook_on_start(self, playbook):
+        self.playbook = os.path.basename(playbook._file_name)
+
+    def v2_playbook_on_play_start(self, play):
+        self.play = play.get_name().strip()
+        self.strategy = play.strategy or config_settings()['strategy']
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self.task_started[task._uuid] = time.time()
+        self.tasks += 1
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self.handlers.add(task._uuid)
+        self.v2_playbook_on_task_start(task, False)
+
+    def v2_runner_on_start(self, host, task):
+        self.host_started[(task._uuid, host.get_name())] = time.time()
+
+    # --- Результаты
+
+    def _record(self, result, status):
+        task = result._task
+        host = result._host.get_name()
+        now = time.time()
+        started = self.host_started.pop((task._uuid, host), None) \
+            or self.task_started.get(task._uuid, now)
+
+        role = task._role.get_name() if task._role else ''
+        name = task.get_name().strip()
+        prefix = '%s : ' % role
+        if role and name.startswith(prefix):
+            name = name[len(prefix):]
+        if status == 'ok' and result._result.get('changed'):
+            status = 'changed'
+
+        self._write({
+            'type': 'task',
+            'run': self.run_id,
+            'playbook': self.playbook,
+            'play': self.play,
+            'strategy': self.strategy,
+            'role': role,
+            'task': name,
+            'action': task.action,
+            'uuid': task._uuid,
+            'handler': task._uuid in self.handlers,
+            'host': host,
+            'status': status,
+            'start': round(started, 3),
+            'duration': round(now - started, 3),
+        })
+
+    def v2_runner_on_ok(self, result):
+        self._record(result, 'ok')
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result, 'ignored' if ignore_errors else 'failed')
+
+    def v2_runner_on_skipped(self, result):
+        self._record(result, 'skipped')
+
+    def v2_runner_on_unreachable(self, result):
+        self._record(result, 'unreachable')
+
+    # --- Итоги запуска
+
+    def v2_playbook_on_stats(self, stats):
+        hosts = sorted(stats.processed.keys())
+        summary = {name: sum(getattr(stats, name).get(host, 0) for host in hosts)
+                   for name in ('ok', 'changed', 'failures', 'dark', 'skipped')}
+        self._write({
+            'type': 'run',
+            'run': self.run_id,
+            'playbook': self.playbook,
+            'start': round(self.started, 3),
+            'duration': round(time.time() - self.started, 3),
+            'hosts': len(hosts),
+            'tasks': self.tasks,
+            'stats': summary,
+            'settings': config_settings(),
+            'config': config_hash(),
+        })
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+Динамический инвентарь Ansible по outputs Terraform
+    ansible-playbook -i inventories/terraform.py playbooks/site.yml
+Группы и адреса те же, что в prod.yml после zbxctl inventory, но файл не
+нужно обновлять после terraform apply. Каталог Terraform по умолчанию -
+terraform/ в корне репозитория (переменная ZBX_TERRAFORM_DIR).
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from zbxtools.cli import main  # noqa: E402
+
+if __name__ == '__main__':
+    terraform_dir = os.environ.get('ZBX_TERRAFORM_DIR', os.path.join(ROOT, 'terraform'))
+    main(['ansible-inventory', '--terraform-dir', terraform_dir, *sys.argv[1:]])
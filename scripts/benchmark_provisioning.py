@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк настройки мониторинга на локальной замене Zabbix API
+Для каждого размера синтетического парка хостов и каждого режима работы
+zbxctl provision (и один раз для zbxctl dashboards)
+запускает настройку против FakeZabbixServer в отдельном процессе и выводит
+время, число вызовов API (из них записей), байты в обе стороны и пиковый RSS процесса
+(клиент вместе с сервером-заменой).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from typing import Callable, Dict, List
+
+from zbxtools import DEFAULT_POOL_SIZE, ZabbixAPI
+from zbxtools.commands import dashboards, provision
+from zbxtools.fakeserver import FakeZabbixServer
+from zbxtools.hostsource import STATIC_HOSTS, web_servers
+from zbxtools.metrics import is_read_method
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+# Режимы, в которых число запросов растет с числом хостов; на больших парках их пропускаем
+PER_HOST_PATHS = ('sequential', 'async')
+DEFAULT_MAX_PER_HOST = 1000
+
+ALB_IP = '203.0.113.10'
+
+
+def synthetic_fleet(size: int) -> List[Dict]:
+    """Конфигурация хостов в формате configure_zabbix_monitoring: каждый третий - веб-сервер"""
+    return [{
+        'hostname': f'host{i:05d}.bench.internal',
+        'visible_name': f'Bench Host {i:05d}',
+        'ip': f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}',
+        'is_web_server': i % 3 == 0
+    } for i in range(size)]
+
+
+@contextlib.contextmanager
+def client(url: str, pool_size: int = DEFAULT_POOL_SIZE):
+    zapi = ZabbixAPI(url, 'Admin', 'zabbix', pool_size=pool_size)
+    try:
+        zapi.login()
+        yield zapi
+    finally:
+        zapi.close()
+
+
+def run_configure(**options) -> Callable[[str, List[Dict]], None]:
+    # Каждому параллельному запросу нужно свое соединение в пуле
+    pool_size = max(DEFAULT_POOL_SIZE, options.get('concurrency', 1))
+
+    def run(url: str, hosts_config: List[Dict]):
+        with client(url, pool_size) as zapi:
+            provision.configure_monitoring(zapi, ALB_IP, hosts_config, **options)
+    return run
+
+
+def run_reconcile(url: str, hosts_config: List[Dict]):
+    with client(url) as zapi:
+        provision.reconcile_monitoring(zapi, ALB_IP, hosts_config, apply=True)
+
+
+def run_setup_dashboards(url: str, hosts_config: List[Dict]):
+    """zbxctl dashboards работает с веб-серверами стенда, а не с парком"""
+    with client(url) as zapi:
+        dashboards.setup_dashboard(zapi, web_servers(STATIC_HOSTS))
+
+
+PATHS: Dict[str, Callable[[str, List[Dict]], None]] = {
+    'sequential': run_configure(),
+    'async': run_configure(concurrency=16),
+    'bulk': run_configure(bulk=True),
+    'bulk+prefetch': run_configure(bulk=True, prefetch=True),
+    'template': run_configure(bulk=True, prefetch=True, trigger_template=True),
+    'reconcile': run_reconcile,
+    'setup_dashboards': run_setup_dashboards,
+}
+
+# Режимы, которые не зависят от размера парка и запускаются один раз
+FIXED_PATHS = ('setup_dashboards',)
+
+
+def measure(path: str, size: int, latency: float, jitter: float, rerun: bool, queue):
+    """Выполняется в дочернем процессе, чтобы пиковый RSS относился к одному запуску"""
+    os.environ.pop('ZBX_ID_CACHE', None)
+    hosts_config = synthetic_fleet(size)
+    result = {'path': path, 'hosts': size}
+
+    try:
+        with FakeZabbixServer(latency=latency, jitter=jitter) as server:
+            runs = 2 if rerun else 1
+            for _ in range(runs):
+                server.reset_stats()
+                started = time.monotonic()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    PATHS[path](server.url, hosts_config)
+                elapsed = time.monotonic() - started
+
+            result.update({
+                'seconds': round(elapsed, 3),
+                'calls': server.total_calls(),
+                'writes': sum(count for method, count in server.calls.items()
+                              if not is_read_method(method)),
+                'bytes_sent': server.bytes_in,
+                'bytes_received': server.bytes_out,
+                'methods': dict(server.calls.most_common()),
+            })
+    except Exception as e:
+        result['error'] = str(e)
+
+    # ru_maxrss в Linux - в килобайтах
+    result['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    queue.put(result)
+
+
+def run_benchmark(path: str, size: int, latency: float, jitter: float, rerun: bool) -> Dict:
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    process = context.Process(target=measure, args=(path, size, latency, jitter, rerun, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def print_result(result: Dict):
+    if 'error' in result:
+        print(f"{result['hosts']:>7}  {result['path']:<17} ✗ {result['error']}")
+        return
+    print(f"{result['hosts']:>7}  {result['path']:<17} {result['seconds']:>9.2f} {result['calls']:>9} "
+          f"{result['writes']:>8} {result['bytes_sent'] / 1024:>12.1f} {result['bytes_received'] / 1024:>12.1f} "
+          f"{result['peak_rss_mb']:>10.1f}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Бенчмарк настройки мониторинга на локальной замене Zabbix API'
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                       help=f'Размеры парка хостов (по умолчанию: {DEFAULT_SIZES})')
+    parser.add_argument('--paths', nargs='+', choices=list(PATHS), default=list(PATHS),
+                       help='Режимы настройки (по умолчанию: все)')
+    parser.add_argument('--latency', type=float, default=2.0,
+                       help='Задержка ответа API в миллисекундах (по умолчанию: 2)')
+    parser.add_argument('--jitter', type=float, default=1.0,
+                       help='Разброс задержки в миллисекундах, ± (по умолчанию: 1)')
+    parser.add_argument('--max-per-host', type=int, default=DEFAULT_MAX_PER_HOST,
+                       help='Наибольший парк для режимов с запросами на каждый хост '
+                            f'({", ".join(PER_HOST_PATHS)}; по умолчанию: {DEFAULT_MAX_PER_HOST})')
+    parser.add_argument('--rerun', action='store_true',
+                       help='Измерять повторный запуск по уже настроенному серверу')
+    parser.add_argument('--json', metavar='PATH',
+                       help='Сохранить результаты в JSON')
+
+    args = parser.parse_args()
+
+    print(f"Задержка API: {args.latency} ± {args.jitter} мс"
+          f"{', повторный запуск' if args.rerun else ''}")
+    print(f"{'Хостов':>7}  {'Режим':<17} {'Время, с':>9} {'Вызовов':>9} {'Записей':>8} "
+          f"{'Отправлено, КБ':>12} {'Получено, КБ':>12} {'RSS, МБ':>10}")
+    print("-" * 93)
+
+    results = []
+    for path in args.paths:
+        sizes = args.sizes[:1] if path in FIXED_PATHS else args.sizes
+        for size in sizes:
+            if path in PER_HOST_PATHS and size > args.max_per_host:
+                print(f"{size:>7}  {path:<17} пропущен (больше --max-per-host)")
+                continue
+            result = run_benchmark(path, size, args.latency / 1000, args.jitter / 1000, args.rerun)
+            if path in FIXED_PATHS:
+                result['hosts'] = 2
+            print_result(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nРезультаты сохранены в {args.json}")
+
+    if any('error' in result for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
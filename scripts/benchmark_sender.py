@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк отправки значений в траппер на локальной замене сервера
+Для каждого числа значений и каждого режима ZabbixSender (синхронные
+пакеты разного размера, сжатие, очередь с фоновой отправкой) отправляет
+синтетические значения вперемешку по хостам и ключам в FakeTrapper и
+выводит время, значения в секунду, число пакетов и отправленные байты.
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Callable, Dict, List
+
+from zbxtools.faketrapper import FakeTrapper
+from zbxtools.sender import ZabbixSender, sender_value
+
+DEFAULT_SIZES = [10000, 100000]
+HOSTS = 200
+KEYS = ('nginx.log.5xx', 'nginx.log.4xx', 'alb.probe.latency', 'alb.probe.ok')
+
+
+def synthetic_values(size: int) -> List[Dict]:
+    now = time.time()
+    return [sender_value(f'host{i % HOSTS:03d}', KEYS[i // HOSTS % len(KEYS)], i % 1000, now)
+            for i in range(size)]
+
+
+def run_send(batch_size: int, compress: bool = False) -> Callable:
+    def run(sender: ZabbixSender, values: List[Dict]):
+        sender.batch_size = batch_size
+        sender.compress = compress
+        sender.result.merge(sender.send(values))
+    return run
+
+
+def run_queue(sender: ZabbixSender, values: List[Dict]):
+    # Время до отправки всей очереди; остановка потока (close) не измеряется
+    for value in values:
+        sender.add(value['host'], value['key'], value['value'])
+    sender.flush()
+
+
+PATHS: Dict[str, Callable] = {
+    'send-250': run_send(250),
+    'send-1000': run_send(1000),
+    'send-1000+zlib': run_send(1000, compress=True),
+    'send-5000': run_send(5000),
+    'queue': run_queue,
+}
+
+
+def measure(path: str, size: int, latency: float) -> Dict:
+    values = synthetic_values(size)
+    result = {'path': path, 'values': size}
+    with FakeTrapper(latency=latency, keep_values=False) as trapper:
+        sender = ZabbixSender('127.0.0.1', trapper.port)
+        started = time.monotonic()
+        PATHS[path](sender, values)
+        elapsed = time.monotonic() - started
+        sender.close()
+        result.update({
+            'seconds': round(elapsed, 3),
+            'values_per_second': round(size / elapsed) if elapsed else 0,
+            'processed': trapper.processed,
+            'frames': trapper.frames,
+            'bytes_sent': sender.result.bytes_sent,
+            'lost': sender.lost,
+        })
+    return result
+
+
+def print_result(result: Dict):
+    print(f"{result['values']:>8}  {result['path']:<16} {result['seconds']:>9.2f} "
+          f"{result['values_per_second']:>10} {result['frames']:>8} "
+          f"{result['bytes_sent'] / 1024:>14.1f} {result['lost']:>8}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Бенчмарк отправки значений в траппер на локальной замене сервера'
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help=f'Число отправляемых значений (по умолчанию: {DEFAULT_SIZES})')
+    parser.add_argument('--paths', nargs='+', choices=list(PATHS), default=list(PATHS),
+                        help='Режимы отправки (по умолчанию: все)')
+    parser.add_argument('--latency', type=float, default=1.0,
+                        help='Задержка ответа траппера на пакет в миллисекундах (по умолчанию: 1)')
+    parser.add_argument('--json', metavar='PATH',
+                        help='Сохранить результаты в JSON')
+
+    args = parser.parse_args()
+
+    print(f"Задержка траппера: {args.latency} мс на пакет")
+    print(f"{'Значений':>8}  {'Режим':<16} {'Время, с':>9} {'Знач./с':>10} {'Пакетов':>8} "
+          f"{'Отправлено, КБ':>14} {'Потеряно':>8}")
+    print("-" * 80)
+
+    results = []
+    for path in args.paths:
+        for size in args.sizes:
+            result = measure(path, size, args.latency / 1000)
+            print_result(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nРезультаты сохранены в {args.json}")
+
+    if any(result['lost'] or result['processed'] != result['values'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,19 @@
-import requests
 import json
 import sys
 
+from zbxtools import ZabbixAPI
+
 ZABBIX_URL = "http://158.160.106.109"
 API_URL = f"{ZABBIX_URL}/api_jsonrpc.php"
 USERNAME = "Admin"
 PASSWORD = "zabbix"
 
+# Один клиент на весь запуск: все вызовы идут через общий пул keep-alive соединений
+zapi = ZabbixAPI(ZABBIX_URL, USERNAME, PASSWORD, timeout=5)
+
 def api_call(method, params, auth=None):
-    headers = {'Content-Type': 'application/json-rpc'}
-    payload = {
-        'jsonrpc': '2.0',
-        'method': method,
-        'params': params,
-        'auth': auth,
-        'id': 1
-    }
     try:
-        response = requests.post(API_URL, headers=headers, json=payload, timeout=5)
-        response.raise_for_status()
-        return response.json()
+        return zapi.request(method, params, auth)
     except Exception as e:
         print(f"Error calling {method}: {e}")
         return None
@@ -27,13 +21,14 @@ def api_call(method, params, auth=None):
 def main():
     print(f"Connecting to {API_URL}...")
     
-    # 1. Login
-    login_resp = api_call("user.login", {"user": USERNAME, "password": PASSWORD})
-    if not login_resp or 'result' not in login_resp:
-        print("Login failed:", login_resp)
+    # 1. Login (username; the "user" parameter is deprecated since Zabbix 5.4)
+    try:
+        zapi.login()
+    except Exception as e:
+        print("Login failed:", e)
         return
     
-    auth_token = login_resp['result']
+    auth_token = zapi.auth_token
     print("Login successful.")
 
     # 2. Get Hosts
@@ -52,4 +47,8 @@ def main():
     # We will expand this if login works
     
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        zapi.print_connection_stats()
+        zapi.close()
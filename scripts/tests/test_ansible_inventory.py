@@ -0,0 +1,94 @@
+"""zbxctl ansible-inventory --list: ответ разбирается как JSON, outputs удаленного state актуальны"""
+
+import json
+import time
+
+from zbxtools.cli import main
+from zbxtools.terraform import OutputsCache
+
+PUBLIC_IPS = {'alb': '203.0.113.10', 'bastion': '203.0.113.11', 'zabbix': '203.0.113.12',
+              'kibana': '203.0.113.13'}
+PRIVATE_IPS = {'bastion': '10.0.1.33', 'web1': '10.0.10.13', 'web2': '', 'zabbix': '10.0.1.22',
+               'elastic': '10.0.11.19', 'kibana': '10.0.1.9'}
+
+
+def outputs():
+    return {'public_ips': {'value': PUBLIC_IPS}, 'private_ips': {'value': PRIVATE_IPS}}
+
+
+def inventory_list(capsys, *args) -> dict:
+    main(['ansible-inventory', '--list', *args])
+    return json.loads(capsys.readouterr().out)
+
+
+def test_list_is_json_when_host_has_no_address(tmp_path, capsys):
+    state = {'version': 4, 'lineage': 'l', 'serial': 1, 'outputs': outputs()}
+    (tmp_path / 'terraform.tfstate').write_text(json.dumps(state))
+
+    answer = inventory_list(capsys, '--terraform-dir', str(tmp_path), '--no-outputs-cache')
+
+    assert 'web1.ru-central1.internal' in answer['web']['hosts']
+    assert 'web2.ru-central1.internal' not in answer['_meta']['hostvars']
+
+
+def remote_backend(tmp_path) -> OutputsCache:
+    """Каталог с удаленным backend и кэш outputs этого каталога"""
+    (tmp_path / '.terraform').mkdir()
+    (tmp_path / '.terraform' / 'terraform.tfstate').write_text(
+        json.dumps({'backend': {'type': 's3'}}))
+    cache = OutputsCache(str(tmp_path / 'outputs-cache.json'))
+    cache.store(str(tmp_path), 'state:l:1', outputs())
+    return cache
+
+
+def fake_terraform(tmp_path, monkeypatch, state: dict):
+    """terraform в PATH, который на state pull выводит state"""
+    (tmp_path / 'bin').mkdir()
+    (tmp_path / 'pulled.tfstate').write_text(json.dumps(state))
+    script = tmp_path / 'bin' / 'terraform'
+    script.write_text(f"#!/bin/sh\nexec /bin/cat {tmp_path / 'pulled.tfstate'}\n")
+    script.chmod(0o755)
+    monkeypatch.setenv('PATH', str(tmp_path / 'bin'))
+
+
+def test_list_is_json_with_stale_remote_cache(tmp_path, capsys, monkeypatch):
+    # Удаленный backend, terraform недоступен: outputs из устаревшего кэша с предупреждением
+    cache = remote_backend(tmp_path)
+    entries = json.loads((tmp_path / 'outputs-cache.json').read_text())
+    for entry in entries.values():
+        entry['stored'] = time.time() - 86400
+    (tmp_path / 'outputs-cache.json').write_text(json.dumps(entries))
+    (tmp_path / 'bin').mkdir()
+    monkeypatch.setenv('PATH', str(tmp_path / 'bin'))
+
+    main(['ansible-inventory', '--list', '--terraform-dir', str(tmp_path),
+          '--outputs-cache', cache.path])
+    captured = capsys.readouterr()
+
+    assert json.loads(captured.out)['_meta']['hostvars']
+    assert 'outputs из кэша' in captured.err
+
+
+def test_list_pulls_remote_state_despite_fresh_cache(tmp_path, capsys, monkeypatch):
+    # Свежая запись кэша не скрывает apply с другой машины: инвентарь всегда делает state pull
+    cache = remote_backend(tmp_path)
+    applied = dict(outputs(), private_ips={'value': dict(PRIVATE_IPS, web2='10.0.10.14')})
+    fake_terraform(tmp_path, monkeypatch, {'lineage': 'l', 'serial': 2, 'outputs': applied})
+
+    answer = inventory_list(capsys, '--terraform-dir', str(tmp_path),
+                            '--outputs-cache', cache.path)
+
+    assert 'web2.ru-central1.internal' in answer['_meta']['hostvars']
+    assert cache.get(str(tmp_path))['fingerprint'] == 'state:l:2'
+
+
+def test_outputs_command_trusts_fresh_remote_cache(tmp_path, capsys, monkeypatch):
+    cache = remote_backend(tmp_path)
+    fake_terraform(tmp_path, monkeypatch, {'lineage': 'l', 'serial': 2, 'outputs': {}})
+
+    main(['outputs', 'private_ips', '--terraform-dir', str(tmp_path),
+          '--outputs-cache', cache.path])
+    captured = capsys.readouterr()
+
+    assert json.loads(captured.out) == PRIVATE_IPS
+    assert 'Terraform outputs: cache' in captured.err
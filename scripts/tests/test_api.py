@@ -0,0 +1,62 @@
+"""Пакетные вызовы ZabbixAPI.bulk_call на FakeZabbixServer"""
+
+from zbxtools.api import ZabbixAPI
+from zbxtools.fakeserver import FakeZabbixServer
+
+from test_reconcile import client
+
+HOST = 'web1.ru-central1.internal'
+
+
+def create_host(zapi: ZabbixAPI):
+    group_id = zapi.create_host_group('Test hosts')
+    zapi.create_host(HOST, 'Web 1', '10.0.10.13', [group_id], [])
+
+
+def trigger(i: int, host: str = HOST) -> dict:
+    return ZabbixAPI.trigger_params(f'Trigger {i}', f'last(/{host}/agent.ping)={i}', 2, '')
+
+
+def test_bulk_call_bisects_rejected_chunk():
+    with FakeZabbixServer() as server:
+        zapi = client(server)
+        create_host(zapi)
+        items = [trigger(i) for i in range(8)]
+        # Выражение со ссылкой на несуществующий хост - сервер отклоняет весь массив
+        items[5] = trigger(5, 'missing.ru-central1.internal')
+        server.reset_stats()
+
+        result = zapi.bulk_call('trigger.create', items, chunk_size=4)
+
+        # [0-4) одним запросом; [4-8) отклонен -> [4-6) отклонен -> [4] и [5]; [6-8)
+        assert result.calls == 6
+        assert server.calls['trigger.create'] == 6
+        assert [i for i, _ in enumerate(items) if i in result.errors] == [5]
+        [(failed, message)] = result.failed()
+        assert failed is items[5] and 'missing.ru-central1.internal' in message
+
+        succeeded = result.succeeded()
+        assert [params['description'] for params, _ in succeeded] == [
+            f'Trigger {i}' for i in range(8) if i != 5]
+        # ID стоят на позициях своих объектов, дублей после повторов половин нет
+        triggers = zapi._call('trigger.get', {'output': ['triggerid', 'description']})
+        by_id = {t['triggerid']: t['description'] for t in triggers}
+        assert len(triggers) == 7
+        assert all(by_id[trigger_id] == params['description'] for params, trigger_id in succeeded)
+
+
+def test_bulk_call_does_not_split_on_http_error():
+    with FakeZabbixServer() as server:
+        zapi = client(server)
+        create_host(zapi)
+        server.error_rate = 1.0
+        server.reset_stats()
+
+        result = zapi.bulk_call('trigger.create', [trigger(i) for i in range(8)], chunk_size=4)
+
+        # Ответ 503 не зависит от объектов: по запросу на чанк, без деления и повторов
+        assert result.calls == 2
+        assert server.errors == 2
+        assert not result.succeeded()
+        assert len(result.failed()) == 8
+        assert all('503' in message for _, message in result.failed())
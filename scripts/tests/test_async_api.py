@@ -0,0 +1,55 @@
+"""AsyncZabbixAPI: лимит параллельности в event loop, созданных после обертки"""
+
+import asyncio
+import threading
+import time
+
+from zbxtools.async_api import AsyncZabbixAPI
+from zbxtools.commands.provision import resolve_host_ids_async, run_async
+from zbxtools.fakeserver import FakeZabbixServer
+from zbxtools.hostsource import STATIC_HOSTS
+
+from test_reconcile import client, reconcile
+
+
+class Calls:
+    """Блокирующая функция, которая запоминает наибольшее число одновременных вызовов"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = self.peak = 0
+
+    def __call__(self, value: int) -> int:
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return value
+
+
+def test_limit_holds_across_event_loops():
+    calls = Calls()
+    azapi = AsyncZabbixAPI(None, concurrency=2)
+
+    async def phase():
+        return await asyncio.gather(*(azapi.run(calls, i) for i in range(10)))
+
+    try:
+        # Обертка создана до asyncio.run и используется в двух loop подряд
+        assert asyncio.run(phase()) == list(range(10))
+        assert asyncio.run(phase()) == list(range(10))
+    finally:
+        azapi.close()
+    assert calls.peak == 2
+
+
+def test_run_async_resolves_hosts_with_contention():
+    hostnames = [h['hostname'] for h in STATIC_HOSTS]
+    with FakeZabbixServer(latency=0.005) as server:
+        zapi = client(server)
+        reconcile(zapi)
+        zapi = client(server)
+        host_ids = run_async(zapi, 2, resolve_host_ids_async, hostnames)
+    assert sorted(host_ids) == sorted(hostnames)
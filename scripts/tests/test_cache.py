@@ -0,0 +1,94 @@
+"""Постоянный кэш ID (IDCache) через ZabbixAPI на FakeZabbixServer"""
+
+import pytest
+
+from zbxtools.api import ZabbixAPI
+from zbxtools.cache import IDCache
+from zbxtools.fakeserver import FakeZabbixServer
+
+from test_reconcile import client
+
+HOST = 'web1.ru-central1.internal'
+TEMPLATE = 'Linux by Zabbix agent'
+
+
+@pytest.fixture
+def server():
+    with FakeZabbixServer() as server:
+        zapi = client(server)
+        group_id = zapi.create_host_group('Test hosts')
+        zapi.create_host(HOST, 'Web 1', '10.0.10.13', [group_id], [])
+        yield server
+
+
+def cached_client(server: FakeZabbixServer, tmp_path, **kwargs) -> ZabbixAPI:
+    """Новый клиент (новый запуск) с кэшем из общего файла"""
+    zapi = ZabbixAPI(server.url, 'Admin', 'zabbix',
+                     id_cache=IDCache(str(tmp_path / 'ids.sqlite'), **kwargs))
+    zapi.login()
+    server.reset_stats()
+    return zapi
+
+
+def test_valid_entry_is_checked_once_per_run(server, tmp_path):
+    host_id = cached_client(server, tmp_path).get_host_id(HOST)
+
+    zapi = cached_client(server, tmp_path)
+    assert zapi.get_host_id(HOST) == host_id
+    assert zapi.get_host_id(HOST) == host_id
+    # Один host.get по ID на проверку типа, поиска по имени нет
+    assert server.calls['host.get'] == 1
+    assert zapi.id_cache.stats() == {'hits': 2, 'misses': 0, 'stale': 0, 'validations': 1}
+
+
+def test_recreated_host_is_revalidated(server, tmp_path):
+    old_id = cached_client(server, tmp_path).get_host_id(HOST)
+
+    # Хост пересоздали мимо кэша (другим клиентом): тот же hostname, новый ID
+    other = client(server)
+    other._call('host.delete', [old_id])
+    group_id = other.get_host_group_id('Test hosts')
+    new_id = other.create_host(HOST, 'Web 1', '10.0.10.13', [group_id], [])
+
+    zapi = cached_client(server, tmp_path)
+    assert zapi.get_host_id(HOST) == new_id != old_id
+    # Проверка по ID и поиск по имени после удаления устаревшей записи
+    assert server.calls['host.get'] == 2
+    assert zapi.id_cache.stale == 1
+    assert zapi.id_cache.misses == 1
+
+
+def test_expired_entry_falls_through_to_get(server, tmp_path):
+    cached_client(server, tmp_path).get_host_id(HOST)
+
+    zapi = cached_client(server, tmp_path, ttl={'host': 0})
+    assert zapi.get_host_id(HOST)
+    assert zapi.id_cache.misses == 1 and zapi.id_cache.hits == 0
+    assert server.calls['host.get'] == 2
+
+
+def test_validation_is_per_kind(server, tmp_path):
+    first = cached_client(server, tmp_path)
+    first.get_host_id(HOST)
+    first.get_template_id(TEMPLATE)
+
+    zapi = cached_client(server, tmp_path)
+    zapi.get_host_id(HOST)
+    assert (server.calls['host.get'], server.calls['template.get']) == (1, 0)
+    zapi.get_template_id(TEMPLATE)
+    assert (server.calls['host.get'], server.calls['template.get']) == (1, 1)
+    assert zapi.id_cache.validations == 2
+
+
+def test_write_invalidates_its_kind(server, tmp_path):
+    zapi = cached_client(server, tmp_path)
+    host_id = zapi.get_host_id(HOST)
+    template_id = zapi.get_template_id(TEMPLATE)
+
+    zapi._call('host.update', {'hostid': host_id, 'name': 'Web 1 renamed'})
+    server.reset_stats()
+
+    assert zapi.get_host_id(HOST) == host_id
+    assert zapi.get_template_id(TEMPLATE) == template_id
+    # Записи хостов сброшены записью host.update, шаблонов - нет
+    assert (server.calls['host.get'], server.calls['template.get']) == (1, 0)
@@ -0,0 +1,49 @@
+"""Журнал операций provision (zbxtools.journal)"""
+
+import json
+
+from zbxtools.journal import Journal
+
+SERVER = 'http://zabbix-a/api_jsonrpc.php'
+OTHER = 'http://zabbix-b/api_jsonrpc.php'
+
+
+def entries(path) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def run(path, server: str, names, fail: str = None, success: bool = True) -> Journal:
+    journal = Journal(str(path), server=server, resume=True)
+    for name in names:
+        if name == fail:
+            journal.fail('host', name, 'ошибка')
+        elif not journal.done('host', name, {'name': name}):
+            journal.record('host', name, '1', {'name': name})
+    journal.close(success)
+    return journal
+
+
+def test_failed_runs_keep_last_entry_per_operation(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    for _ in range(5):
+        run(path, SERVER, ['web1', 'web2'], fail='web2', success=False)
+    assert [(e['kind'], e['name']) for e in entries(path)] == [('host', 'web1')]
+
+    # Resume пропускает web1 по журналу и повторяет только web2
+    journal = run(path, SERVER, ['web1', 'web2'])
+    assert journal.skipped() == 1 and journal.recorded == 1
+
+
+def test_clean_run_drops_only_its_server(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    run(path, OTHER, ['web1'], fail='web1', success=False)
+    run(path, OTHER, ['web2'], success=False)
+    run(path, SERVER, ['web1', 'web2'])
+    assert [(e['server'], e['name']) for e in entries(path)] == [(OTHER, 'web2')]
+
+
+def test_operation_failure_is_not_a_clean_run(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    run(path, SERVER, ['web1', 'web2'], fail='web2', success=True)
+    assert [e['name'] for e in entries(path)] == ['web1']
@@ -0,0 +1,28 @@
+"""Учет вызовов API (APIMetrics) на FakeZabbixServer"""
+
+from zbxtools.fakeserver import FakeZabbixServer
+from zbxtools.metrics import is_read_method
+
+from test_reconcile import client
+
+
+def test_only_queries_are_reads():
+    assert is_read_method('host.get')
+    assert is_read_method('apiinfo.version')
+    assert is_read_method('user.checkAuthentication')
+    # Сессии создаются и удаляются на сервере
+    assert not is_read_method('user.login')
+    assert not is_read_method('user.logout')
+    assert not is_read_method('host.create')
+
+
+def test_write_calls_count_session_changes():
+    with FakeZabbixServer() as server:
+        zapi = client(server)
+        zapi.get_host_group_id('Test hosts')
+        zapi.create_host_group('Test hosts')
+        zapi.logout()
+
+        assert zapi.metrics.write_calls() == 3
+        assert zapi.metrics.write_calls() == sum(
+            count for method, count in server.calls.items() if not is_read_method(method))
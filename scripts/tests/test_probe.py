@@ -0,0 +1,58 @@
+"""Проверка агентов (probe) на локальной замене агента (FakeAgent)"""
+
+import socket
+
+from zbxtools.fakeagent import FakeAgent
+from zbxtools.probe import probe_agents
+
+
+def probe_one(port: int, timeout: float = 1.0):
+    return probe_agents([('web1', '127.0.0.1', port)], timeout=timeout)[0]
+
+
+def closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_ok():
+    with FakeAgent(latency=0.01) as agent:
+        results = probe_agents([(f'web{i}', '127.0.0.1', agent.port) for i in range(20)])
+    assert all(r.ok and r.reachable for r in results)
+    assert all(r.ping_latency >= 0.01 for r in results)
+    assert agent.connections == 20
+
+
+def test_timeout():
+    with FakeAgent(mode='silent') as agent:
+        result = probe_one(agent.port, timeout=0.3)
+    assert result.reachable and not result.ok
+    assert result.error == "нет ответа на agent.ping"
+
+
+def test_refused():
+    result = probe_one(closed_port())
+    assert not result.reachable
+    assert "отклонено" in result.error
+
+
+def test_rejected():
+    with FakeAgent(mode='reject') as agent:
+        result = probe_one(agent.port)
+    assert result.reachable and not result.ok
+    assert "без ответа" in result.error
+
+
+def test_bad_header():
+    with FakeAgent(mode='garbage') as agent:
+        result = probe_one(agent.port)
+    assert not result.ok
+    assert result.error.startswith("ошибка обмена: нет заголовка ZBXD")
+
+
+def test_corrupt_compressed_reply():
+    with FakeAgent(mode='corrupt') as agent:
+        result = probe_one(agent.port)
+    assert not result.ok
+    assert result.error.startswith("ошибка обмена: сжатые данные повреждены")
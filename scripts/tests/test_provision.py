@@ -0,0 +1,111 @@
+"""Этапы zbxctl provision на FakeZabbixServer"""
+
+import pytest
+
+from zbxtools.cli import build_parser, main
+from zbxtools.commands.provision import (DASHBOARD_NAMES, PROJECT_TEMPLATE_NAME,
+                                         build_desired_state, configure_dashboards,
+                                         configure_monitoring)
+from zbxtools.fakeserver import FakeZabbixServer
+from zbxtools.hostsource import STATIC_HOSTS
+from zbxtools.reconcile import Snapshot, apply_plan, build_plan
+
+from test_reconcile import ALB_IP, client, reconcile
+
+
+@pytest.mark.parametrize('bulk, host_gets', [(True, 1), (False, len(STATIC_HOSTS))])
+def test_dashboards_resolve_hosts(bulk: bool, host_gets: int):
+    with FakeZabbixServer() as server:
+        zapi = client(server)
+        reconcile(zapi)
+        # Новый клиент: ID хостов не закэшированы прошлым запуском
+        zapi = client(server)
+        server.reset_stats()
+        configure_dashboards(zapi, STATIC_HOSTS, bulk=bulk)
+        assert server.calls['host.get'] == host_gets
+        dashboards = zapi._call('dashboard.get', {'output': ['name']})
+        assert sorted(d['name'] for d in dashboards) == sorted(DASHBOARD_NAMES)
+
+
+PROVISION = ['provision', '--zabbix-url', 'http://127.0.0.1:1', '--hosts-from', 'static',
+             '--alb-ip', ALB_IP]
+
+
+@pytest.mark.parametrize('option, value', [
+    ('--trigger-macro', 'CPU.UTIL.CRIT=90'),
+    ('--trigger-macro', '{$CPU.UTIL.CRIT}'),
+    ('--trigger-macro', '{$CPU.UTIL.CRIT}='),
+    ('--host-macro', '{$VFS.PFREE.MIN}=10'),
+    ('--host-macro', 'web1.ru-central1.internal={$VFS.PFREE.MIN}=10'),
+])
+def test_malformed_macro_is_usage_error(capsys, option: str, value: str):
+    with pytest.raises(SystemExit) as exit_info:
+        build_parser('provision').parse_args(PROVISION + [option, value])
+    assert exit_info.value.code == 2
+    assert f"argument {option}" in capsys.readouterr().err
+
+
+def test_macro_arguments_are_parsed():
+    args = build_parser('provision').parse_args(PROVISION + [
+        '--trigger-macro', '{$CPU.UTIL.CRIT}=90',
+        '--host-macro', 'web1.ru-central1.internal:{$VFS.PFREE.MIN}=10',
+    ])
+    assert args.trigger_macro == [('{$CPU.UTIL.CRIT}', '90')]
+    assert args.host_macro == [('web1.ru-central1.internal', '{$VFS.PFREE.MIN}', '10')]
+
+
+def test_host_macro_for_unknown_host_is_rejected(capsys):
+    # Ошибка до подключения к Zabbix: по адресу из PROVISION никто не слушает
+    with pytest.raises(SystemExit) as exit_info:
+        main(PROVISION + ['--trigger-template',
+                          '--host-macro', 'web9.ru-central1.internal:{$VFS.PFREE.MIN}=10'])
+    assert exit_info.value.code == 1
+    assert "web9.ru-central1.internal" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('option, value', [
+    ('--trigger-macro', '{$CPU.UTIL.CRIT}=90'),
+    ('--host-macro', 'web1.ru-central1.internal:{$VFS.PFREE.MIN}=10'),
+])
+def test_macros_require_trigger_template(capsys, option: str, value: str):
+    with pytest.raises(SystemExit) as exit_info:
+        main(PROVISION + [option, value])
+    assert exit_info.value.code == 1
+    assert "--trigger-template" in capsys.readouterr().err
+
+
+def template_mode_plan(zapi, hosts_config, trigger_macros, apply: bool = False):
+    desired = build_desired_state(hosts_config, ALB_IP, trigger_template=True,
+                                  trigger_macros=trigger_macros)
+    snapshot = Snapshot.load(zapi, desired)
+    plan = build_plan(desired, snapshot)
+    if apply:
+        apply_plan(zapi, plan, desired, snapshot)
+    return plan
+
+
+def test_plan_after_trigger_template_run_is_empty(capsys):
+    hosts_config = [dict(host) for host in STATIC_HOSTS]
+    hosts_config[1]['macros'] = {'{$VFS.PFREE.MIN}': '10'}
+    trigger_macros = {'{$CPU.UTIL.CRIT}': '90'}
+    with FakeZabbixServer() as server:
+        zapi = client(server)
+        configure_monitoring(zapi, ALB_IP, hosts_config, trigger_template=True,
+                             trigger_macros=trigger_macros)
+        assert not template_mode_plan(zapi, hosts_config, trigger_macros)
+
+        # Новые пороги: один template.update и один host.update, без триггеров хостов
+        hosts_config[1]['macros'] = {'{$VFS.PFREE.MIN}': '5'}
+        plan = template_mode_plan(zapi, hosts_config, {'{$CPU.UTIL.CRIT}': '95'}, apply=True)
+        assert [(c.kind, c.action, c.name) for c in plan.changes] == [
+            ('template', 'update', PROJECT_TEMPLATE_NAME),
+            ('host', 'update', hosts_config[1]['hostname']),
+        ]
+        assert not [c for c in plan.changes if c.error]
+        assert not template_mode_plan(zapi, hosts_config, {'{$CPU.UTIL.CRIT}': '95'})
+
+        host = zapi._call('host.get', {'filter': {'host': hosts_config[1]['hostname']},
+                                       'selectMacros': ['macro', 'value'],
+                                       'selectParentTemplates': ['host']})[0]
+        assert host['macros'] == [{'macro': '{$VFS.PFREE.MIN}', 'value': '5'}]
+        assert [t['host'] for t in host['parentTemplates']][0] == PROJECT_TEMPLATE_NAME
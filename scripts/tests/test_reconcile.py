@@ -0,0 +1,71 @@
+"""План и применение изменений (zbxtools.reconcile) на FakeZabbixServer"""
+
+from zbxtools.api import ZabbixAPI
+from zbxtools.commands.provision import DASHBOARD_NAMES, build_desired_state
+from zbxtools.fakeserver import DEFAULT_TEMPLATES, FakeZabbixServer, FakeZabbixStore
+from zbxtools.hostsource import STATIC_HOSTS
+from zbxtools.reconcile import Snapshot, apply_plan, build_plan
+
+ALB_IP = '203.0.113.10'
+
+
+def reconcile(zapi: ZabbixAPI, apply: bool = True, prune: bool = False):
+    desired = build_desired_state(STATIC_HOSTS, ALB_IP)
+    snapshot = Snapshot.load(zapi, desired, prune=prune)
+    plan = build_plan(desired, snapshot, prune=prune)
+    if apply:
+        apply_plan(zapi, plan, desired, snapshot)
+    return plan
+
+
+def client(server: FakeZabbixServer) -> ZabbixAPI:
+    zapi = ZabbixAPI(server.url, 'Admin', 'zabbix')
+    zapi.login()
+    return zapi
+
+
+def test_second_run_has_empty_plan():
+    with FakeZabbixServer() as server:
+        zapi = client(server)
+        plan = reconcile(zapi)
+        assert not [c for c in plan.changes if c.error or c.skipped]
+        assert not reconcile(zapi, apply=False)
+
+
+def test_dashboard_without_items_is_skipped_and_plan_converges():
+    linux_only = {'Linux by Zabbix agent': DEFAULT_TEMPLATES['Linux by Zabbix agent']}
+    with FakeZabbixServer(store=FakeZabbixStore(linux_only)) as server:
+        zapi = client(server)
+
+        # Хосты еще не созданы: Web Servers планируется, но при применении
+        # элементов Nginx нет, и дашборд пропускается без ошибки
+        plan = reconcile(zapi)
+        web = [c for c in plan.changes if c.kind == 'dashboard' and c.name == DASHBOARD_NAMES[1]]
+        assert web and web[0].skipped and not web[0].error
+        assert not [c for c in plan.changes if c.error]
+
+        plan = reconcile(zapi, apply=False)
+        assert not plan
+        assert any(DASHBOARD_NAMES[1] in warning for warning in plan.warnings)
+        dashboards = zapi._call('dashboard.get', {'output': ['name']})
+        assert [d['name'] for d in dashboards] == [DASHBOARD_NAMES[0]]
+
+
+def test_prune_keeps_discovered_triggers():
+    with FakeZabbixServer() as server:
+        zapi = client(server)
+        reconcile(zapi)
+        web1 = zapi.get_host_id(STATIC_HOSTS[1]['hostname'])
+        # Обнаружение файловых систем шаблона Linux создает триггеры на каждом хосте
+        server.store.discover_trigger(
+            web1, 'FS [/]: Space is low',
+            f"last(/{STATIC_HOSTS[1]['hostname']}/vfs.fs.size[/,pused])>80")
+        zapi._call('trigger.create', {
+            'description': 'Stray trigger', 'priority': 2,
+            'expression': f"last(/{STATIC_HOSTS[1]['hostname']}/agent.ping)=0"})
+
+        plan = reconcile(zapi, prune=True)
+        deleted = [c.name for c in plan.changes if c.action == 'delete']
+        assert deleted == ['Stray trigger']
+        assert not [c for c in plan.changes if c.error]
+        assert not reconcile(zapi, apply=False, prune=True)
@@ -0,0 +1,82 @@
+"""Повторы, дублирующие запросы и бюджет времени ZabbixAPI на FakeZabbixServer"""
+
+import pytest
+
+from zbxtools.api import ZabbixAPI, ZabbixAPIError
+from zbxtools.fakeserver import FakeZabbixServer
+from zbxtools.resilience import MIN_LATENCY_SAMPLES, AdaptiveLimiter, Deadline
+
+from test_reconcile import client
+
+GROUP = 'Test hosts'
+
+
+def test_write_is_not_retried():
+    with FakeZabbixServer() as server:
+        zapi = client(server)
+        server.error_rate = 1.0
+        server.reset_stats()
+
+        with pytest.raises(ZabbixAPIError):
+            zapi.create_host_group(GROUP)
+
+        # Запись могла пройти, поэтому после 503 она не повторяется
+        assert server.errors == 1
+        assert zapi.retried == 0
+
+
+def test_read_is_retried():
+    with FakeZabbixServer() as server:
+        zapi = client(server)
+        server.error_rate = 1.0
+        server.reset_stats()
+
+        with pytest.raises(ZabbixAPIError):
+            zapi.get_host_group_id(GROUP)
+
+        assert server.errors == zapi.retries + 1
+        assert zapi.retried == zapi.retries
+
+
+def test_only_reads_are_hedged():
+    with FakeZabbixServer(stall=0.2) as server:
+        zapi = ZabbixAPI(server.url, 'Admin', 'zabbix', hedge=True)
+        zapi.login()
+        # Порог p95 в 10 мс; дальше каждый ответ сервера задерживается на stall
+        for _ in range(MIN_LATENCY_SAMPLES):
+            zapi.read_latency.record(0.01)
+        server.stall_rate = 1.0
+        server.reset_stats()
+
+        zapi.get_host_group_id(GROUP)
+        assert zapi.hedged == 1
+        assert server.calls['hostgroup.get'] == 2
+
+        zapi.create_host_group(GROUP)
+        assert zapi.hedged == 1
+        assert server.calls['hostgroup.create'] == 1
+        zapi.close()
+
+
+def test_exhausted_deadline_sends_nothing():
+    with FakeZabbixServer() as server:
+        zapi = client(server)
+        zapi.deadline = Deadline(0)
+        server.reset_stats()
+
+        with pytest.raises(ZabbixAPIError, match='бюджет времени'):
+            zapi.get_host_group_id(GROUP)
+        assert server.total_calls() == 0
+
+
+def test_limiter_backs_off_on_errors_and_recovers():
+    limiter = AdaptiveLimiter(maximum=8)
+    for _ in range(8):
+        limiter.acquire()
+        limiter.release('host.get', failed=True)
+    assert limiter.limit < 8
+
+    for _ in range(100):
+        limiter.acquire()
+        limiter.release('host.get', 0.01)
+    assert limiter.limit == 8
@@ -0,0 +1,100 @@
+"""ZabbixSender на локальной замене траппера (FakeTrapper)"""
+
+import socket
+import socketserver
+import threading
+
+import pytest
+
+from zbxtools import protocol
+from zbxtools.faketrapper import FakeTrapper
+from zbxtools.sender import SenderError, ZabbixSender, sender_value
+
+
+def values(count: int, host: str = 'web1', key: str = 'nginx.log.5xx'):
+    return [sender_value(host, key, i) for i in range(count)]
+
+
+class BadReplyServer:
+    """Траппер, который отвечает на пакет заданными байтами"""
+
+    def __init__(self, reply: bytes):
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                protocol.recv_packet(self.request)
+                self.request.sendall(reply)
+
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+
+    def __enter__(self) -> 'BadReplyServer':
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_send_splits_values_into_batches(compress):
+    with FakeTrapper() as trapper:
+        sender = ZabbixSender('127.0.0.1', trapper.port, batch_size=1000, compress=compress)
+        result = sender.send(values(2500))
+
+    assert (result.processed, result.failed, result.frames) == (2500, 0, 3)
+    assert trapper.frames == 3 and len(trapper.values) == 2500
+
+
+def test_values_without_trapper_item_are_failed():
+    with FakeTrapper(known={('web1', 'nginx.log.5xx')}) as trapper:
+        result = ZabbixSender('127.0.0.1', trapper.port).send(
+            values(3) + values(2, key='unknown.key'))
+
+    assert (result.processed, result.failed, result.total) == (3, 2, 5)
+
+
+def test_queue_flushes_on_close():
+    with FakeTrapper() as trapper:
+        with ZabbixSender('127.0.0.1', trapper.port, batch_size=100,
+                          flush_interval=0.05) as sender:
+            for i in range(250):
+                sender.add('web1', 'nginx.log.5xx', i)
+
+    assert sender.result.processed == 250 and sender.lost == 0
+    assert [int(v['value']) for v in trapper.values] == list(range(250))
+
+
+def test_unreachable_server_raises_sender_error():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    with pytest.raises(SenderError):
+        ZabbixSender('127.0.0.1', port, timeout=1).send(values(1))
+
+
+@pytest.mark.parametrize('reply', [
+    protocol.encode(b'not json'),
+    protocol.encode(b'[1, 2]'),
+    protocol.encode(b'{"response": "success", "info": "garbage"}'),
+    protocol.encode(b'{"response": "success"}')[:-5],
+])
+def test_bad_reply_raises_sender_error(reply):
+    with BadReplyServer(reply) as server:
+        with pytest.raises(SenderError):
+            ZabbixSender('127.0.0.1', server.port, timeout=1).send(values(1))
+
+
+def test_bad_reply_does_not_stop_background_thread():
+    with BadReplyServer(protocol.encode(b'not json')) as server:
+        sender = ZabbixSender('127.0.0.1', server.port, batch_size=10, flush_interval=0.05,
+                              timeout=1)
+        for i in range(30):
+            sender.add('web1', 'nginx.log.5xx', i)
+        sender.flush()
+        alive = sender._thread.is_alive()
+        sender.close()
+
+    assert alive
+    assert sender.lost == 30 and sender.errors
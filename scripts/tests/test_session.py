@@ -0,0 +1,45 @@
+"""Кэш сессий (SessionCache) через ZabbixAPI на FakeZabbixServer"""
+
+import os
+import stat
+
+from zbxtools.api import ZabbixAPI
+from zbxtools.fakeserver import FakeZabbixServer
+from zbxtools.session import SessionCache
+
+
+def cached_client(server: FakeZabbixServer, cache: SessionCache) -> ZabbixAPI:
+    zapi = ZabbixAPI(server.url, 'Admin', 'zabbix', session_cache=cache)
+    zapi.login()
+    return zapi
+
+
+def test_valid_session_is_reused(tmp_path):
+    cache = SessionCache(str(tmp_path / 'sessions.json'))
+    with FakeZabbixServer() as server:
+        first = cached_client(server, cache)
+        first.close()
+        server.reset_stats()
+
+        second = cached_client(server, cache)
+        assert second.session_reused
+        assert second.auth_token == first.auth_token
+        assert server.calls['user.checkAuthentication'] == 1
+        assert server.calls['user.login'] == 0
+        assert stat.S_IMODE(os.stat(cache.path).st_mode) == 0o600
+
+
+def test_expired_session_triggers_login(tmp_path):
+    cache = SessionCache(str(tmp_path / 'sessions.json'))
+    with FakeZabbixServer() as server:
+        # Ключ кэша - URL JSON-RPC, как его строит клиент
+        cache.store(server.url.rstrip('/') + '/api_jsonrpc.php', 'Admin', 'expired')
+
+        zapi = cached_client(server, cache)
+        assert not zapi.session_reused
+        assert zapi.auth_token != 'expired'
+        assert server.calls['user.checkAuthentication'] == 1
+        assert server.calls['user.login'] == 1
+        # Вместо просроченного токена в кэше новая сессия
+        assert cache.get(zapi.url, 'Admin') == zapi.auth_token
+        zapi.get_host_group_id('Test hosts')
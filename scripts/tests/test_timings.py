@@ -0,0 +1,76 @@
+"""Время задач Ansible (zbxtools.timings) по записям плагина task_timing"""
+
+import json
+
+import pytest
+
+from zbxtools.timings import RunTimings, load_runs
+
+RUN = '20261017T120000-1'
+
+
+def task(uuid: str, host: str, start: float, duration: float, play: str = 'web',
+         strategy: str = None, status: str = 'ok') -> dict:
+    record = {'type': 'task', 'run': RUN, 'playbook': 'site.yml', 'play': play, 'role': 'nginx',
+              'task': uuid, 'uuid': uuid, 'host': host, 'status': status, 'start': start,
+              'duration': duration}
+    if strategy:
+        record['strategy'] = strategy
+    return record
+
+
+def summary(strategy: str = 'linear') -> dict:
+    return {'type': 'run', 'run': RUN, 'playbook': 'site.yml', 'start': 0.0, 'duration': 20.0,
+            'settings': {'strategy': strategy}}
+
+
+def load(tmp_path, records) -> RunTimings:
+    path = tmp_path / 'timings.jsonl'
+    path.write_text(''.join(json.dumps(r) + '\n' for r in records))
+    [run] = load_runs(str(path))
+    return run
+
+
+def test_repeated_task_on_host_is_accumulated(tmp_path):
+    # Задача в цикле include_tasks: три выполнения на web1, одно на web2
+    run = load(tmp_path, [
+        task('t1', 'web1', 0.0, 2.0),
+        task('t1', 'web2', 0.0, 3.0),
+        task('t1', 'web1', 2.0, 2.0, status='changed'),
+        task('t1', 'web1', 4.0, 2.0),
+        summary(),
+    ])
+    [timings] = run.tasks.values()
+    assert timings.longest == 6.0
+    assert timings.slowest_host == 'web1'
+    assert timings.total == 9.0
+    assert timings.count('ok', 'changed') == 4
+    assert len(timings.hosts) == 2
+    assert run.serial == 9.0
+    assert run.critical == 6.0
+    assert run.host_totals() == {'web1': 6.0, 'web2': 3.0}
+
+
+@pytest.mark.parametrize('settings_strategy', ['linear', 'free'])
+def test_critical_uses_play_strategy(tmp_path, settings_strategy: str):
+    run = load(tmp_path, [
+        # linear: 2 + 4
+        task('a', 'web1', 0.0, 2.0, play='setup', strategy='linear'),
+        task('a', 'web2', 0.0, 1.0, play='setup', strategy='linear'),
+        task('b', 'web1', 2.0, 1.0, play='setup', strategy='linear'),
+        task('b', 'web2', 2.0, 4.0, play='setup', strategy='linear'),
+        # free: web1 5 + 1, web2 1 + 5 -> 6
+        task('c', 'web1', 6.0, 5.0, play='deploy', strategy='free'),
+        task('c', 'web2', 6.0, 1.0, play='deploy', strategy='free'),
+        task('d', 'web1', 11.0, 1.0, play='deploy', strategy='free'),
+        task('d', 'web2', 7.0, 5.0, play='deploy', strategy='free'),
+        summary(settings_strategy),
+    ])
+    assert run.critical == 12.0
+
+
+def test_records_without_strategy_fall_back_to_settings(tmp_path):
+    records = [task('a', 'web1', 0.0, 2.0), task('a', 'web2', 0.0, 1.0),
+               task('b', 'web1', 2.0, 1.0), task('b', 'web2', 1.0, 4.0)]
+    assert load(tmp_path, records + [summary('linear')]).critical == 6.0
+    assert load(tmp_path, records + [summary('free')]).critical == 5.0
@@ -54,7 +54,7 @@ fi
 
 # Check agents status using Python script
 echo -e "\n${YELLOW}Monitored Hosts:${NC}"
-python3 scripts/check_zabbix_agents.py 2>/dev/null | grep -E "🖥️|📈|🎉|❌" | sed 's/^/  /'
+python3 scripts/check_zabbix_agents.py --zabbix-url "http://$ZABBIX_IP" 2>/dev/null | grep -E "🖥️|📈|🎉|❌" | sed 's/^/  /'
 
 echo -e "\n${YELLOW}Monitoring Features:${NC}"
 echo -e "  ✓ Host monitoring (CPU, Memory, Disk)"
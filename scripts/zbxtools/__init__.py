@@ -0,0 +1,63 @@
+"""
+Общие утилиты для работы с Zabbix API из скриптов проекта
+Имена загружаются из подмодулей при первом обращении, чтобы zbxctl и
+скрипты, которым нужна только часть пакета, не импортировали requests,
+asyncio и sqlite3 раньше времени.
+"""
+
+import importlib
+from typing import Dict
+
+# Имя -> подмодуль, в котором оно определено
+_EXPORTS: Dict[str, str] = {
+    'ZabbixAPI': 'api',
+    'ZabbixAPIError': 'api',
+    'BulkResult': 'api',
+    'DEFAULT_CHUNK_SIZE': 'api',
+    'DEFAULT_PAGE_SIZE': 'api',
+    'AsyncZabbixAPI': 'async_api',
+    'DEFAULT_CONCURRENCY': 'async_api',
+    'ObjectIndex': 'index',
+    'APIMetrics': 'metrics',
+    'profiled': 'metrics',
+    'IDCache': 'cache',
+    'DEFAULT_CACHE_PATH': 'cache',
+    'SessionCache': 'session',
+    'Journal': 'journal',
+    'widgets_hash': 'dashboards',
+    'DesiredState': 'reconcile',
+    'Snapshot': 'reconcile',
+    'Plan': 'reconcile',
+    'build_plan': 'reconcile',
+    'apply_plan': 'reconcile',
+    'probe_agents': 'probe',
+    'StatusWatcher': 'watch',
+    'ZabbixSender': 'sender',
+    'OutputsCache': 'terraform',
+    'get_outputs': 'terraform',
+    'build_inventory': 'inventory',
+    'hosts_from_outputs': 'hostsource',
+    'verify_interfaces': 'hostsource',
+    'load_runs': 'timings',
+    'SenderError': 'sender',
+    'DEFAULT_RETRIES': 'resilience',
+    'DeadlineExceeded': 'resilience',
+    'HTTPTransport': 'transport',
+    'DEFAULT_POOL_SIZE': 'transport',
+    'DEFAULT_TIMEOUT': 'transport',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
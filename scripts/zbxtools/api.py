@@ -0,0 +1,929 @@
+"""
+Клиент Zabbix JSON-RPC API, общий для всех скриптов в scripts/
+"""
+
+import itertools
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures import wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import requests
+
+from . import dashboards
+from .cache import IDCache
+from .index import ObjectIndex
+from .metrics import APIMetrics, is_read_method
+from .resilience import (DEFAULT_RETRIES, AdaptiveLimiter, Deadline, DeadlineExceeded,
+                         LatencyTracker, backoff_delay, is_retryable)
+from .session import SessionCache
+from .transport import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, HTTPTransport
+
+
+# Сколько объектов отправлять в одном массивном вызове (*.create, *.update, host.massupdate)
+DEFAULT_CHUNK_SIZE = 100
+
+# Сколько хостов запрашивать в одной странице host.get при обходе (iter_hosts)
+DEFAULT_PAGE_SIZE = 500
+
+# Поля интерфейсов, по которым видна доступность агента (Zabbix 6.0)
+INTERFACE_FIELDS = ['interfaceid', 'ip', 'port', 'type', 'main', 'available', 'error']
+
+# Элементы данных, значения которых присылает sender: тип "Zabbix траппер"
+# и типы значений (0 - число с плавающей точкой, 3 - целое, 4 - текст)
+TRAPPER_ITEM_TYPE = 2
+VALUE_TYPE_FLOAT = 0
+VALUE_TYPE_UNSIGNED = 3
+VALUE_TYPE_TEXT = 4
+
+# Версия, начиная с которой токен передается заголовком Authorization: Bearer,
+# а не полем auth запроса (в Zabbix 6.0 API токены принимаются только в auth)
+BEARER_MIN_VERSION = (6, 4)
+
+# Поля ID и имени для объектов, которые хранятся в IDCache
+CACHE_FIELDS = {
+    'template': ('templateid', 'host'),
+    'hostgroup': ('groupid', 'name'),
+    'host': ('hostid', 'host'),
+    'item': ('itemid', 'key_'),
+    'dashboard': ('dashboardid', 'name'),
+}
+
+
+class ZabbixAPIError(Exception):
+    """Ошибка, возвращенная Zabbix API или HTTP уровнем"""
+
+    def __init__(self, message: str, error: Dict = None):
+        super().__init__(message)
+        # Тело ошибки JSON-RPC; None для ошибок HTTP уровня
+        self.error = error
+
+    @property
+    def already_exists(self) -> bool:
+        """Объект уже существует (например, его создал параллельный запуск)"""
+        return self.error is not None and 'already exists' in str(self.error.get('data', ''))
+
+
+class BulkResult:
+    """Результат пакетного вызова: ID и ошибки по каждому объекту в порядке отправки"""
+
+    def __init__(self, items: Iterable = ()):
+        self.items = list(items)
+        self.ids: List[Optional[str]] = [None] * len(self.items)
+        self.errors: Dict[int, str] = {}
+        self.calls = 0
+
+    def succeeded(self) -> List[Tuple[object, str]]:
+        """Объекты, успешно обработанные сервером, вместе с их ID"""
+        return [(item, self.ids[i]) for i, item in enumerate(self.items)
+                if i not in self.errors]
+
+    def failed(self) -> List[Tuple[object, str]]:
+        """Объекты, которые не удалось обработать, вместе с текстом ошибки"""
+        return [(self.items[i], message) for i, message in sorted(self.errors.items())]
+
+    def merge(self, other: 'BulkResult'):
+        """Добавить результаты другого пакета в конец этого"""
+        offset = len(self.items)
+        self.items.extend(other.items)
+        self.ids.extend(other.ids)
+        self.errors.update({offset + i: message for i, message in other.errors.items()})
+        self.calls += other.calls
+
+
+class ZabbixAPI:
+    def __init__(self, url: str, username: str = None, password: str = None,
+                 transport: HTTPTransport = None, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, id_cache: IDCache = None,
+                 deadline: float = None, retries: int = DEFAULT_RETRIES, hedge: bool = False,
+                 metrics: APIMetrics = None, api_token: str = None,
+                 session_cache: SessionCache = None):
+        self.url = url.rstrip('/') + '/api_jsonrpc.php'
+        self.username = username
+        self.password = password
+        self.auth_token = None
+
+        # API токен заменяет вход по паролю; иначе сессия из кэша (явно
+        # переданного или включенного ZBX_SESSION_CACHE) или новая через user.login
+        self.api_token = api_token
+        self.session_cache = session_cache or SessionCache.from_env()
+        # Сессию создал этот клиент - без кэша ее нужно закрыть user.logout
+        self.owns_session = False
+        self.session_reused = False
+        # itertools.count потокобезопасен, что нужно AsyncZabbixAPI
+        self._request_ids = itertools.count(1)
+        # Дублирующим запросам нужны свои соединения, иначе пул будет их закрывать
+        self.transport = transport or HTTPTransport(pool_size=pool_size * (2 if hedge else 1),
+                                                    timeout=timeout)
+        self.chunk_size = chunk_size
+
+        # Хвостовые задержки: бюджет времени на весь запуск, повторы *.get,
+        # дублирующий *.get после p95 и лимит параллельности по задержкам
+        self.deadline = Deadline(deadline) if deadline else None
+        self.retries = retries
+        self.hedge = hedge
+        self.read_latency = LatencyTracker()
+        self.limiter = AdaptiveLimiter(maximum=pool_size)
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self.retried = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+        # Вызовы, задержки и байты по методам; общий объект можно передать снаружи
+        self.metrics = metrics or APIMetrics()
+
+        # Очереди пакетного режима: метод -> список объектов,
+        # набор шаблонов -> список ID хостов для host.massupdate
+        self._pending: Dict[str, List[Dict]] = {}
+        self._pending_links: Dict[Tuple[str, ...], List[str]] = {}
+
+        # Индекс объектов запуска (см. prefetch); None - все поиски идут через API
+        self.index: Optional[ObjectIndex] = None
+
+        # Постоянный кэш ID между запусками: явно переданный или включенный ZBX_ID_CACHE
+        self.id_cache = id_cache or IDCache.from_env(self.url)
+        if self.id_cache:
+            self.id_cache.server = self.url
+            self.id_cache.validator = self._valid_cached_names
+
+    def request(self, method: str, params: Union[Dict, List], auth: str = None) -> Dict:
+        """Отправить JSON-RPC запрос и вернуть ответ целиком (result или error)"""
+        payload = {
+            'jsonrpc': '2.0',
+            'method': method,
+            'params': params,
+            'id': next(self._request_ids)
+        }
+
+        if auth:
+            payload['auth'] = auth
+
+        if self.id_cache and not is_read_method(method):
+            # Сбрасываем до отправки: запись могла пройти, даже если ответ не дошел
+            kind = method.split('.')[0]
+            self.id_cache.invalidate(kind)
+            if kind == 'host':
+                self.id_cache.invalidate('item')
+
+        return self._send(method, payload)
+
+    def _send(self, method: str, payload: Dict) -> Dict:
+        """
+        Отправить запрос с учетом бюджета времени и лимита параллельности.
+        Только *.get повторяются при сетевых ошибках и перегрузке фронтенда
+        и могут дублироваться: запись могла пройти, даже если ответ потерян.
+        """
+        idempotent = method.endswith('.get')
+        attempts = self.retries + 1 if idempotent else 1
+
+        for attempt in range(attempts):
+            timeout = self.deadline.clamp(self.transport.timeout) if self.deadline else None
+            self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                if idempotent and self.hedge:
+                    response = self._hedged_post(payload, timeout)
+                else:
+                    response = self.transport.post(self.url, payload, timeout)
+            except requests.exceptions.RequestException as e:
+                self.limiter.release(method, failed=True)
+                self.metrics.record(method, time.monotonic() - started, error=True)
+                if not is_retryable(e) or attempt == attempts - 1:
+                    raise
+                delay = backoff_delay(attempt)
+                if self.deadline and delay >= self.deadline.remaining():
+                    raise DeadlineExceeded(f"нет бюджета времени на повтор {method}: {e}")
+                self.retried += 1
+                time.sleep(delay)
+                continue
+
+            latency = time.monotonic() - started
+            self.limiter.release(method, latency)
+            if idempotent:
+                self.read_latency.record(latency)
+
+            result = response.json()
+            # Размер ответа по сети (сжатого), если сервер его сообщил
+            received = response.headers.get('Content-Length')
+            self.metrics.record(method, latency, sent=len(response.request.body or b''),
+                                received=int(received) if received else len(response.content),
+                                error='error' in result)
+            return result
+
+    def _hedged_post(self, payload: Dict, timeout) -> requests.Response:
+        """Если ответа нет дольше p95 чтения, отправить копию и взять первый ответ"""
+        threshold = self.read_latency.percentile(0.95)
+        if threshold is None:
+            return self.transport.post(self.url, payload, timeout)
+
+        if self._hedge_pool is None:
+            self._hedge_pool = ThreadPoolExecutor(thread_name_prefix='zabbix-hedge')
+        primary = self._hedge_pool.submit(self.transport.post, self.url, payload, timeout)
+        try:
+            return primary.result(timeout=threshold)
+        except FutureTimeout:
+            pass
+
+        self.hedged += 1
+        backup = self._hedge_pool.submit(self.transport.post, self.url, payload, timeout)
+        done, _ = wait([primary, backup], return_when=FIRST_COMPLETED)
+        first = done.pop()
+        if first.exception() is None:
+            if first is backup:
+                self.hedge_wins += 1
+            return first.result()
+        # Первым пришел отказ - ждем второй запрос
+        return (backup if first is primary else primary).result()
+
+    def _call(self, method: str, params: Union[Dict, List]) -> Dict:
+        """Выполнить API запрос к Zabbix"""
+        try:
+            result = self.request(method, params, self.auth_token)
+        except requests.exceptions.RequestException as e:
+            raise ZabbixAPIError(f"HTTP request failed: {e}")
+
+        if 'error' in result:
+            raise ZabbixAPIError(f"Zabbix API error: {result['error']}", result['error'])
+
+        return result.get('result')
+
+    def bulk_call(self, method: str, items: List, chunk_size: int = None,
+                  build: Callable[[List], Union[Dict, List]] = None) -> BulkResult:
+        """
+        Отправить объекты массивом, разбив на чанки по chunk_size.
+        Если сервер отклоняет чанк, он делится пополам и половины
+        отправляются заново, пока не останется один проблемный объект.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        build = build or list
+        result = BulkResult(items)
+
+        for start in range(0, len(items), chunk_size):
+            self._bulk_chunk(method, build, result, start, min(start + chunk_size, len(items)))
+
+        return result
+
+    def _bulk_chunk(self, method: str, build: Callable, result: BulkResult, start: int, end: int):
+        result.calls += 1
+        try:
+            response = self._call(method, build(result.items[start:end]))
+        except ZabbixAPIError as e:
+            # Ошибки HTTP уровня не связаны с содержимым чанка - делить его бессмысленно
+            if e.error is None or end - start == 1:
+                for i in range(start, end):
+                    result.errors[i] = str(e)
+                return
+
+            middle = (start + end) // 2
+            self._bulk_chunk(method, build, result, start, middle)
+            self._bulk_chunk(method, build, result, middle, end)
+            return
+
+        ids = next((value for key, value in response.items() if key.endswith('ids')), [])
+        result.ids[start:start + len(ids)] = ids
+
+    def queue(self, method: str, params: Dict):
+        """Отложить вызов метода до flush() (пакетный режим)"""
+        self._pending.setdefault(method, []).append(params)
+
+    def queue_template_link(self, host_id: str, template_ids: List[str]):
+        """Отложить привязку шаблонов к существующему хосту до flush()"""
+        self._pending_links.setdefault(tuple(template_ids), []).append(host_id)
+
+    def flush(self, chunk_size: int = None) -> Dict[str, BulkResult]:
+        """
+        Отправить все отложенные вызовы массивами.
+        Возвращает результаты по методам; объекты идут в порядке постановки в очередь.
+        """
+        results = {}
+
+        for method, objects in self._pending.items():
+            results[method] = self.bulk_call(method, objects, chunk_size)
+        self._pending = {}
+
+        if self.index is not None:
+            if 'host.create' in results:
+                for params, host_id in results['host.create'].succeeded():
+                    self.index.add_host(params['host'], host_id)
+            if 'trigger.create' in results:
+                for params, trigger_id in results['trigger.create'].succeeded():
+                    self.index.add_trigger(trigger_id, params['description'], params['expression'])
+
+        for template_ids, host_ids in self._pending_links.items():
+            templates = [{'templateid': tid} for tid in template_ids]
+            result = self.bulk_call(
+                'host.massupdate', host_ids, chunk_size,
+                build=lambda chunk, templates=templates: {
+                    'hosts': [{'hostid': hid} for hid in chunk],
+                    'templates': templates
+                }
+            )
+            results.setdefault('host.massupdate', BulkResult()).merge(result)
+        self._pending_links = {}
+
+        return results
+
+    def login(self):
+        """
+        Аутентификация в Zabbix. С API токеном входа нет, токен только
+        передается с каждым запросом. С кэшем сессий сохраненный токен
+        проверяется user.checkAuthentication, и user.login выполняется,
+        только если сервер его больше не принимает.
+        """
+        if self.api_token:
+            version = self._call('apiinfo.version', {})
+            if tuple(int(part) for part in version.split('.')[:2]) >= BEARER_MIN_VERSION:
+                self.transport.session.headers['Authorization'] = f'Bearer {self.api_token}'
+            else:
+                self.auth_token = self.api_token
+            return
+
+        if self.session_cache:
+            token = self.session_cache.get(self.url, self.username)
+            if token and self._session_valid(token):
+                self.auth_token = token
+                self.session_reused = True
+                return
+
+        result = self._call('user.login', {
+            'username': self.username,
+            'password': self.password
+        })
+        self.auth_token = result
+        self.owns_session = True
+        if self.session_cache:
+            self.session_cache.store(self.url, self.username, result)
+
+    def _session_valid(self, token: str) -> bool:
+        """Проверить сохраненную сессию; просроченная удаляется из кэша"""
+        try:
+            # Метод вызывается без auth, сессия передается параметром
+            self._call('user.checkAuthentication', {'sessionid': token})
+        except ZabbixAPIError as e:
+            if e.error is None:
+                # Ошибка HTTP уровня ничего не говорит о самой сессии
+                raise
+            self.session_cache.discard(self.url, self.username)
+            return False
+        return True
+
+    def logout(self):
+        """Закрыть сессию, созданную этим клиентом через user.login"""
+        if not self.owns_session:
+            return
+        self._call('user.logout', [])
+        self.auth_token = None
+        self.owns_session = False
+
+    def prefetch(self, **scopes) -> ObjectIndex:
+        """
+        Загрузить индекс объектов одним запросом на тип (см. ObjectIndex.load).
+        После этого get_*_id отвечают из памяти, а create_* дополняют индекс.
+        """
+        index = ObjectIndex()
+        index.load(self, **scopes)
+        self.index = index
+        return index
+
+    def _valid_cached_names(self, kind: str, entries: List[Tuple[str, str]]) -> set:
+        """Проверить ID из кэша одним *.get с фильтром по ID"""
+        id_field, name_field = CACHE_FIELDS[kind]
+        output = [id_field, name_field] + (['hostid'] if kind == 'item' else [])
+        result = self._call(f'{kind}.get', {
+            f'{id_field}s': list({object_id for _, object_id in entries}),
+            'output': output
+        })
+        alive = {obj[id_field]: obj for obj in result}
+
+        valid = set()
+        for name, object_id in entries:
+            obj = alive.get(object_id)
+            if obj is None:
+                continue
+            if kind == 'item':
+                # Имя элемента в кэше - "ID хоста:ключ", а ищутся элементы по подстроке ключа
+                host_id, _, key = name.partition(':')
+                if obj['hostid'] == host_id and key in obj['key_']:
+                    valid.add(name)
+            elif obj[name_field] == name:
+                valid.add(name)
+        return valid
+
+    def cached_lookup(self, kind: str, name: str,
+                      fetch: Callable[[], Optional[str]]) -> Optional[str]:
+        """ID через постоянный кэш, если он включен, иначе сразу fetch()"""
+        if self.id_cache:
+            return self.id_cache.lookup(kind, name, fetch)
+        return fetch()
+
+    def print_cache_stats(self):
+        """Вывести статистику кэша ID"""
+        if self.id_cache:
+            stats = self.id_cache.stats()
+            print(f"  Кэш ID: попаданий {stats['hits']}, промахов {stats['misses']}, "
+                  f"устаревших {stats['stale']}, проверок {stats['validations']}")
+
+    def connection_stats(self) -> Dict[str, int]:
+        """Статистика переиспользования соединений пула"""
+        return self.transport.connection_stats()
+
+    def print_connection_stats(self):
+        """Вывести статистику соединений"""
+        stats = self.connection_stats()
+        print(f"  Запросов: {stats['requests']}, соединений открыто: {stats['opened']}, "
+              f"переиспользовано: {stats['reused']}")
+        if self.retried or self.hedged:
+            print(f"  Повторов: {self.retried}, дублирующих запросов: {self.hedged} "
+                  f"(ответили первыми: {self.hedge_wins}), "
+                  f"лимит параллельности: {int(self.limiter.limit)}")
+
+    def close(self):
+        """
+        Закрыть соединения пула. Созданная этим клиентом сессия закрывается,
+        если ее не нужно сохранить для следующих запусков в кэше сессий.
+        """
+        if self.owns_session and not self.session_cache:
+            try:
+                self.logout()
+            except ZabbixAPIError as e:
+                print(f"⚠ Не удалось закрыть сессию Zabbix: {e}")
+        if self._hedge_pool:
+            # Опоздавшие копии запросов не ждем
+            self._hedge_pool.shutdown(wait=False)
+        self.transport.close()
+
+    def get_template_id(self, template_name: str) -> Optional[str]:
+        """Получить ID шаблона по имени"""
+        if self.index and self.index.covers('templates', template_name):
+            return self.index.templates.get(template_name)
+
+        def fetch() -> Optional[str]:
+            result = self._call('template.get', {
+                'filter': {'host': template_name},
+                'output': ['templateid', 'host']
+            })
+
+            if result:
+                return result[0]['templateid']
+            return None
+
+        return self.cached_lookup('template', template_name, fetch)
+
+    def get_template(self, template_name: str) -> Optional[Dict]:
+        """Получить шаблон с макросами и ID хостов, к которым он привязан"""
+        result = self._call('template.get', {
+            'filter': {'host': template_name},
+            'output': ['templateid', 'host'],
+            'selectMacros': ['hostmacroid', 'macro', 'value'],
+            'selectHosts': ['hostid']
+        })
+        return result[0] if result else None
+
+    def create_template(self, template_name: str, group_ids: List[str],
+                        template_ids: List[str] = None, macros: Dict[str, str] = None) -> str:
+        """Создать шаблон, связанный с другими шаблонами и с макросами"""
+        result = self._call('template.create', {
+            'host': template_name,
+            'groups': [{'groupid': gid} for gid in group_ids],
+            'templates': [{'templateid': tid} for tid in template_ids or []],
+            'macros': [{'macro': m, 'value': v} for m, v in (macros or {}).items()]
+        })
+        if self.index:
+            self.index.templates[template_name] = result['templateids'][0]
+        return result['templateids'][0]
+
+    def update_template_macros(self, template_id: str, macros: Dict[str, str]):
+        """Заменить макросы шаблона одним запросом"""
+        self._call('template.update', {
+            'templateid': template_id,
+            'macros': [{'macro': m, 'value': v} for m, v in macros.items()]
+        })
+
+    def link_templates(self, template_ids: List[str], host_ids: List[str]):
+        """Привязать шаблоны ко всем хостам одним template.massadd"""
+        self._call('template.massadd', {
+            'templates': [{'templateid': tid} for tid in template_ids],
+            'hosts': [{'hostid': hid} for hid in host_ids]
+        })
+
+    def sync_host_macros(self, host_macros: Dict[str, Dict[str, str]]) -> Dict[str, BulkResult]:
+        """
+        Привести макросы хостов к заданным значениям: один usermacro.get на все
+        хосты, затем массивы usermacro.create и usermacro.update только для отличий.
+        Макросы, которых нет в host_macros, не удаляются.
+        """
+        if not host_macros:
+            return {}
+
+        current = {}
+        for macro in self._call('usermacro.get', {
+                'hostids': list(host_macros),
+                'output': ['hostmacroid', 'hostid', 'macro', 'value']}):
+            current[(macro['hostid'], macro['macro'])] = macro
+
+        create, update = [], []
+        for host_id, macros in host_macros.items():
+            for name, value in macros.items():
+                existing = current.get((host_id, name))
+                if not existing:
+                    create.append({'hostid': host_id, 'macro': name, 'value': value})
+                elif existing['value'] != value:
+                    update.append({'hostmacroid': existing['hostmacroid'], 'value': value})
+
+        results = {}
+        if create:
+            results['usermacro.create'] = self.bulk_call('usermacro.create', create)
+        if update:
+            results['usermacro.update'] = self.bulk_call('usermacro.update', update)
+        return results
+
+    def get_host_group_id(self, group_name: str) -> Optional[str]:
+        """Получить ID группы хостов"""
+        if self.index and self.index.covers('groups', group_name):
+            return self.index.groups.get(group_name)
+
+        def fetch() -> Optional[str]:
+            result = self._call('hostgroup.get', {
+                'filter': {'name': group_name},
+                'output': ['groupid', 'name']
+            })
+
+            if result:
+                return result[0]['groupid']
+            return None
+
+        return self.cached_lookup('hostgroup', group_name, fetch)
+
+    def create_host_group(self, group_name: str) -> str:
+        """Создать группу хостов"""
+        result = self._call('hostgroup.create', {
+            'name': group_name
+        })
+        if self.index:
+            self.index.groups[group_name] = result['groupids'][0]
+        return result['groupids'][0]
+
+    def get_host_id(self, hostname: str) -> Optional[str]:
+        """Получить ID хоста по имени"""
+        if self.index and self.index.covers('hosts', hostname):
+            return self.index.hosts.get(hostname)
+
+        def fetch() -> Optional[str]:
+            result = self._call('host.get', {
+                'filter': {'host': hostname},
+                'output': ['hostid', 'host']
+            })
+
+            if result:
+                return result[0]['hostid']
+            return None
+
+        return self.cached_lookup('host', hostname, fetch)
+
+    def get_host_ids(self, hostnames: List[str]) -> Dict[str, str]:
+        """Получить ID нескольких хостов одним запросом: имя -> ID"""
+        if self.index and all(self.index.covers('hosts', name) for name in hostnames):
+            return {name: self.index.hosts[name] for name in hostnames
+                    if name in self.index.hosts}
+
+        result = self._call('host.get', {
+            'filter': {'host': list(hostnames)},
+            'output': ['hostid', 'host']
+        })
+        return {host['host']: host['hostid'] for host in result}
+
+    @staticmethod
+    def host_params(hostname: str, visible_name: str, ip_address: str,
+                    group_ids: List[str], template_ids: List[str]) -> Dict:
+        """Параметры host.create для хоста с agent интерфейсом"""
+        return {
+            'host': hostname,
+            'name': visible_name,
+            'interfaces': [{
+                'type': 1,  # Agent interface
+                'main': 1,
+                'useip': 1,
+                'ip': ip_address,
+                'dns': '',
+                'port': '10050'
+            }],
+            'groups': [{'groupid': gid} for gid in group_ids],
+            'templates': [{'templateid': tid} for tid in template_ids]
+        }
+
+    def create_host(self, hostname: str, visible_name: str, ip_address: str,
+                    group_ids: List[str], template_ids: List[str]) -> str:
+        """Создать хост в Zabbix"""
+        params = self.host_params(hostname, visible_name, ip_address, group_ids, template_ids)
+
+        result = self._call('host.create', params)
+        if self.index:
+            self.index.add_host(hostname, result['hostids'][0])
+        return result['hostids'][0]
+
+    def update_host_templates(self, host_id: str, template_ids: List[str]):
+        """Обновить шаблоны хоста"""
+        self._call('host.update', {
+            'hostid': host_id,
+            'templates': [{'templateid': tid} for tid in template_ids]
+        })
+
+    def update_host_interface(self, interface_id: str, new_ip: str):
+        """Обновить IP адрес интерфейса хоста"""
+        return self._call('hostinterface.update', {
+            'interfaceid': interface_id,
+            'ip': new_ip
+        })
+
+    def get_agent_interfaces(self) -> Dict[str, Dict]:
+        """Основные agent интерфейсы всех хостов одним запросом: {имя хоста: интерфейс}"""
+        interfaces = self._call('hostinterface.get', {
+            'output': ['interfaceid', 'hostid', 'ip'],
+            'filter': {'type': '1', 'main': '1'},
+            'selectHosts': ['host']
+        })
+        return {interface['hosts'][0]['host']: interface
+                for interface in interfaces if interface.get('hosts')}
+
+    def update_host_interfaces(self, addresses: Dict[str, str]) -> BulkResult:
+        """Обновить IP адреса интерфейсов {interfaceid: ip} пакетными запросами"""
+        return self.bulk_call('hostinterface.update',
+                              [{'interfaceid': interface_id, 'ip': ip}
+                               for interface_id, ip in addresses.items()])
+
+    def create_web_scenario(self, name: str, host_id: str, url: str) -> str:
+        """Создать веб-сценарий"""
+        params = {
+            'name': name,
+            'hostid': host_id,
+            'steps': [{
+                'name': 'Homepage check',
+                'url': url,
+                'status_codes': '200',
+                'no': 1
+            }],
+            'delay': '60s'
+        }
+
+        result = self._call('httptest.create', params)
+        if self.index:
+            self.index.httptests[(host_id, name)] = result['httptestids'][0]
+        return result['httptestids'][0]
+
+    def get_web_scenario(self, host_id: str, name: str) -> Optional[str]:
+        """Получить ID веб-сценария"""
+        if self.index and self.index.covers_on_host('httptests', name, host_id):
+            return self.index.httptests.get((host_id, name))
+
+        result = self._call('httptest.get', {
+            'hostids': host_id,
+            'filter': {'name': name},
+            'output': ['httptestid', 'name']
+        })
+
+        if result:
+            return result[0]['httptestid']
+        return None
+
+    def get_item_id(self, host_id: str, key: str) -> Optional[str]:
+        """Получить ID элемента данных по ключу"""
+        def fetch() -> Optional[str]:
+            result = self._call('item.get', {
+                'hostids': host_id,
+                'search': {'key_': key},
+                'output': ['itemid', 'key_', 'name']
+            })
+
+            if result:
+                return result[0]['itemid']
+            return None
+
+        return self.cached_lookup('item', f'{host_id}:{key}', fetch)
+
+    def get_item_ids(self, host_ids: List[str], keys: List[str]) -> Dict[Tuple[str, str], str]:
+        """
+        Получить ID элементов данных для всех пар (хост, ключ) одним item.get.
+        Ключи сравниваются точно; пары без элемента в результат не попадают.
+        """
+        item_ids = {}
+        missing = set()
+        for host_id in host_ids:
+            for key in keys:
+                cached = self.id_cache.get('item', f'{host_id}:{key}') if self.id_cache else None
+                if cached:
+                    item_ids[(host_id, key)] = cached
+                else:
+                    missing.add((host_id, key))
+
+        if missing:
+            result = self._call('item.get', {
+                'hostids': list({host_id for host_id, _ in missing}),
+                'filter': {'key_': list({key for _, key in missing})},
+                'output': ['itemid', 'hostid', 'key_']
+            })
+            for item in result:
+                pair = (item['hostid'], item['key_'])
+                if pair in missing:
+                    item_ids[pair] = item['itemid']
+                    if self.id_cache:
+                        self.id_cache.put('item', f'{pair[0]}:{pair[1]}', item['itemid'])
+
+        return item_ids
+
+    @staticmethod
+    def trapper_item_params(host_id: str, key: str, name: str = None,
+                            value_type: int = VALUE_TYPE_UNSIGNED, units: str = '') -> Dict:
+        """Параметры item.create для элемента данных типа траппер (значения шлет sender)"""
+        return {
+            'hostid': host_id,
+            'key_': key,
+            'name': name or key,
+            'type': TRAPPER_ITEM_TYPE,
+            'value_type': value_type,
+            'units': units
+        }
+
+    def ensure_trapper_items(self, items: List[Dict]) -> BulkResult:
+        """
+        Создать недостающие траппер элементы (параметры из trapper_item_params):
+        один item.get на все хосты и ключи, затем массивы item.create только
+        для отсутствующих. Существующие элементы не изменяются.
+        """
+        existing = self.get_item_ids(list({item['hostid'] for item in items}),
+                                     list({item['key_'] for item in items}))
+        missing = [item for item in items if (item['hostid'], item['key_']) not in existing]
+        result = self.bulk_call('item.create', missing)
+        if self.id_cache:
+            for item, item_id in result.succeeded():
+                self.id_cache.put('item', f"{item['hostid']}:{item['key_']}", item_id)
+        return result
+
+    def get_trigger_id(self, description: str, host_id: str = None) -> Optional[str]:
+        """Получить ID триггера по описанию"""
+        if self.index and self.index.covers_on_host('triggers', description, host_id):
+            return self.index.trigger_id(description, host_id)
+
+        params = {
+            'filter': {'description': description},
+            'output': ['triggerid', 'description']
+        }
+        if host_id:
+            params['hostids'] = host_id
+
+        result = self._call('trigger.get', params)
+
+        if result:
+            return result[0]['triggerid']
+        return None
+
+    def get_trigger_keys(self, host_ids: List[str], descriptions: List[str]) -> set:
+        """Найти существующие триггеры одним запросом: множество пар (ID хоста, описание)"""
+        if self.index and self.index.covers_all('triggers', descriptions, host_ids):
+            host_ids, descriptions = set(host_ids), set(descriptions)
+            return {key for key in self.index.triggers
+                    if key[0] in host_ids and key[1] in descriptions}
+
+        result = self._call('trigger.get', {
+            'hostids': list(host_ids),
+            'filter': {'description': list(descriptions)},
+            'output': ['triggerid', 'description'],
+            'selectHosts': ['hostid']
+        })
+        return {(host['hostid'], trigger['description'])
+                for trigger in result for host in trigger['hosts']}
+
+    @staticmethod
+    def trigger_params(description: str, expression: str, priority: int,
+                       comments: str = '') -> Dict:
+        """Параметры trigger.create"""
+        return {
+            'description': description,
+            'expression': expression,
+            'priority': priority,
+            'comments': comments
+        }
+
+    def create_trigger(self, description: str, expression: str, priority: int,
+                       comments: str = '') -> str:
+        """Создать триггер"""
+        params = self.trigger_params(description, expression, priority, comments)
+
+        result = self._call('trigger.create', params)
+        if self.index:
+            self.index.add_trigger(result['triggerids'][0], description, expression)
+        return result['triggerids'][0]
+
+    def get_trigger_prototype_id(self, description: str, host_id: str) -> Optional[str]:
+        """Получить ID прототипа триггера по описанию на хосте или шаблоне"""
+        result = self._call('triggerprototype.get', {
+            'hostids': host_id,
+            'filter': {'description': description},
+            'output': ['triggerid', 'description']
+        })
+
+        if result:
+            return result[0]['triggerid']
+        return None
+
+    def create_trigger_prototype(self, description: str, expression: str, priority: int,
+                                 comments: str = '') -> str:
+        """Создать прототип триггера для элементов низкоуровневого обнаружения"""
+        params = self.trigger_params(description, expression, priority, comments)
+        result = self._call('triggerprototype.create', params)
+        return result['triggerids'][0]
+
+    def get_dashboard_id(self, name: str) -> Optional[str]:
+        """Получить ID дашборда по имени"""
+        if self.index and self.index.covers('dashboards', name):
+            return self.index.dashboards.get(name)
+
+        def fetch() -> Optional[str]:
+            result = self._call('dashboard.get', {
+                'filter': {'name': name},
+                'output': ['dashboardid', 'name']
+            })
+
+            if result:
+                return result[0]['dashboardid']
+            return None
+
+        return self.cached_lookup('dashboard', name, fetch)
+
+    def create_dashboard(self, name: str, widgets: List[Dict]) -> str:
+        """Создать дашборд"""
+        params = {
+            'name': name,
+            'pages': [{
+                'widgets': widgets
+            }]
+        }
+
+        result = self._call('dashboard.create', params)
+        if self.index:
+            self.index.dashboards[name] = result['dashboardids'][0]
+        return result['dashboardids'][0]
+
+    def sync_dashboard(self, name: str, widgets: List[Dict], **create_params) -> str:
+        """
+        Привести дашборд к заданным виджетам без удаления: создать, если его нет,
+        и вызвать dashboard.update, только если хеш виджетов отличается от сервера.
+        Возвращает 'created', 'updated' или 'unchanged'.
+        """
+        if self.index and self.index.covers('dashboards', name) \
+                and name not in self.index.dashboards:
+            current = []
+        else:
+            current = self._call('dashboard.get', dict(dashboards.DASHBOARD_OUTPUT,
+                                                       filter={'name': name}))
+
+        if not current:
+            params = dict(create_params, name=name, pages=[{'widgets': widgets}])
+            result = self._call('dashboard.create', params)
+            if self.index:
+                self.index.dashboards[name] = result['dashboardids'][0]
+            return 'created'
+
+        if dashboards.is_current(current[0], widgets):
+            return 'unchanged'
+
+        self._call('dashboard.update', dashboards.update_params(current[0], widgets))
+        return 'updated'
+
+    def iter_hosts(self, fields: Iterable[str] = ('hostid', 'host', 'name'),
+                   group_id: str = None, page_size: int = DEFAULT_PAGE_SIZE,
+                   interfaces: bool = True) -> Iterator[Dict]:
+        """
+        Обойти хосты страницами по hostid, отдавая их по мере получения.
+        Запрашиваются только поля fields и (если interfaces) интерфейсы с доступностью.
+        В API нет фильтра "hostid больше", поэтому если первая страница заполнена
+        целиком, один раз загружаются только ID хостов, и следующие страницы
+        запрашиваются по ID после последнего полученного.
+        """
+        params = {
+            'output': list(dict.fromkeys(['hostid', *fields])),
+            'sortfield': 'hostid'
+        }
+        if interfaces:
+            params['selectInterfaces'] = INTERFACE_FIELDS
+        if group_id:
+            params['groupids'] = group_id
+
+        page = self._call('host.get', dict(params, limit=page_size))
+        yield from page
+        if len(page) < page_size:
+            return
+
+        cursor = int(page[-1]['hostid'])
+        id_params = {'output': ['hostid'], 'groupids': group_id} if group_id else {'output': ['hostid']}
+        remaining = sorted(hid for hid in (int(h['hostid']) for h in self._call('host.get', id_params))
+                           if hid > cursor)
+
+        for start in range(0, len(remaining), page_size):
+            hostids = [str(hid) for hid in remaining[start:start + page_size]]
+            yield from self._call('host.get', dict(params, hostids=hostids))
+
+    def get_all_hosts(self, group_id: str = None) -> List[Dict]:
+        """Получить список всех хостов"""
+        return list(self.iter_hosts(group_id=group_id, interfaces=False))
@@ -0,0 +1,55 @@
+"""
+Асинхронная обертка над ZabbixAPI
+Методы клиента выполняются в пуле потоков поверх того же пула keep-alive
+соединений, а asyncio.Semaphore ограничивает число одновременных запросов.
+Семафор создается внутри работающего event loop при первом вызове: до
+Python 3.10 он привязывается к loop в момент создания, а обертку строят
+до asyncio.run.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from .api import ZabbixAPI
+
+
+DEFAULT_CONCURRENCY = 8
+
+
+class AsyncZabbixAPI:
+    def __init__(self, zapi: ZabbixAPI, concurrency: int = DEFAULT_CONCURRENCY):
+        self.zapi = zapi
+        self.concurrency = concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.executor = ThreadPoolExecutor(max_workers=concurrency,
+                                           thread_name_prefix='zabbix-api')
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Выполнить блокирующий вызов в пуле потоков с учетом лимита параллельности"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore, self._loop = asyncio.Semaphore(self.concurrency), loop
+        async with self._semaphore:
+            return await loop.run_in_executor(
+                self.executor, functools.partial(func, *args, **kwargs)
+            )
+
+    def __getattr__(self, name: str):
+        # Те же методы, что у ZabbixAPI, но в виде корутин
+        attr = getattr(self.zapi, name)
+        if not callable(attr) or (name.startswith('_') and name != '_call'):
+            return attr
+
+        async def method(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        method.__name__ = name
+        method.__doc__ = attr.__doc__
+        return method
+
+    def close(self):
+        """Остановить пул потоков (соединения закрываются через zapi.close())"""
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,151 @@
+"""
+Постоянный кэш соответствий имя -> ID объектов Zabbix в SQLite
+ID шаблонов, групп, хостов и элементов данных почти не меняются, поэтому
+между запусками скриптов их можно не искать заново. Кэш разделен по URL
+сервера, у каждого типа объектов свой TTL. При первом попадании в кэш
+за запуск все сохраненные ID этого типа проверяются одним *.get с фильтром
+по ID, а любая запись через клиент сбрасывает записи своего типа.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+
+# Путь к кэшу по умолчанию; переменная ZBX_ID_CACHE включает кэш для всех скриптов
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'zbxtools', 'ids.sqlite')
+CACHE_ENV = 'ZBX_ID_CACHE'
+
+# TTL по типам объектов в секундах
+DEFAULT_TTL: Dict[str, int] = {
+    'template': 7 * 24 * 3600,
+    'hostgroup': 24 * 3600,
+    'host': 3600,
+    'item': 3600,
+    'dashboard': 3600,
+}
+
+
+class IDCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, server: str = '',
+                 ttl: Dict[str, int] = None,
+                 validator: Callable[[str, List[Tuple[str, str]]], Set[str]] = None):
+        self.path = path
+        self.server = server
+        self.ttl = dict(DEFAULT_TTL, **(ttl or {}))
+        # validator(тип, [(имя, ID)]) -> имена, ID которых по-прежнему верны
+        self.validator = validator
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.validations = 0
+        self._validated = set()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Кэшем пользуются потоки AsyncZabbixAPI, поэтому соединение общее под блокировкой
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS ids (
+                server TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                name TEXT NOT NULL,
+                id TEXT NOT NULL,
+                stored REAL NOT NULL,
+                PRIMARY KEY (server, kind, name)
+            )
+        ''')
+        self._db.commit()
+        if path != ':memory:':
+            os.chmod(path, 0o600)
+
+    @classmethod
+    def from_env(cls, server: str, **kwargs) -> Optional['IDCache']:
+        """Кэш, если он включен переменной ZBX_ID_CACHE (1 - путь по умолчанию, иначе путь)"""
+        value = os.environ.get(CACHE_ENV, '')
+        if not value or value == '0':
+            return None
+        path = DEFAULT_CACHE_PATH if value == '1' else value
+        return cls(path, server, **kwargs)
+
+    def get(self, kind: str, name: str) -> Optional[str]:
+        """ID из кэша или None, если записи нет или она устарела"""
+        if kind not in self._validated and self.validator:
+            self.validate(kind)
+
+        with self._lock:
+            row = self._db.execute(
+                'SELECT id, stored FROM ids WHERE server = ? AND kind = ? AND name = ?',
+                (self.server, kind, name)
+            ).fetchone()
+
+        if row and time.time() - row[1] < self.ttl.get(kind, 0):
+            self.hits += 1
+            return row[0]
+
+        self.misses += 1
+        return None
+
+    def put(self, kind: str, name: str, object_id: str):
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO ids (server, kind, name, id, stored) VALUES (?, ?, ?, ?, ?)',
+                (self.server, kind, name, object_id, time.time())
+            )
+            self._db.commit()
+
+    def lookup(self, kind: str, name: str, fetch: Callable[[], Optional[str]]) -> Optional[str]:
+        """ID из кэша, а при промахе - результат fetch(), который сохраняется в кэш"""
+        object_id = self.get(kind, name)
+        if object_id is None:
+            object_id = fetch()
+            if object_id is not None:
+                self.put(kind, name, object_id)
+        return object_id
+
+    def validate(self, kind: str):
+        """Проверить все ID типа одним запросом и удалить исчезнувшие или переименованные"""
+        self._validated.add(kind)
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT name, id FROM ids WHERE server = ? AND kind = ?', (self.server, kind)
+            ).fetchall()
+        if not rows:
+            return
+
+        self.validations += 1
+        valid = self.validator(kind, rows)
+        stale = [name for name, _ in rows if name not in valid]
+        if stale:
+            self.stale += len(stale)
+            with self._lock:
+                self._db.executemany(
+                    'DELETE FROM ids WHERE server = ? AND kind = ? AND name = ?',
+                    [(self.server, kind, name) for name in stale]
+                )
+                self._db.commit()
+
+    def invalidate(self, kind: str = None):
+        """Удалить записи типа (или все записи сервера) после записи через API"""
+        with self._lock:
+            if kind:
+                self._db.execute('DELETE FROM ids WHERE server = ? AND kind = ?',
+                                 (self.server, kind))
+            else:
+                self._db.execute('DELETE FROM ids WHERE server = ?', (self.server,))
+            self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'validations': self.validations
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
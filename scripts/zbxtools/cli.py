@@ -0,0 +1,179 @@
+"""
+Единая точка входа zbxctl для скриптов мониторинга проекта
+Модуль подкоманды импортируется только при ее вызове, а клиент Zabbix API
+(и вместе с ним requests) - при первом обращении к нему, поэтому разбор
+аргументов и справка не загружают ничего лишнего. Все подкоманды работают
+через один пул соединений и общие метрики (см. --metrics и --profile).
+
+    zbxctl agents --zabbix-url http://158.160.104.168
+    ZABBIX_URL=http://158.160.104.168 zbxctl provision --alb-ip 158.160.1.2 --bulk
+"""
+
+import argparse
+import importlib
+import os
+import sys
+from typing import Dict, List, Tuple
+
+from .metrics import APIMetrics, profiled
+
+# Подкоманда -> (модуль в zbxtools.commands, нужен ли Zabbix API, описание)
+COMMANDS: Dict[str, Tuple[str, bool, str]] = {
+    'provision': ('provision', True,
+                  'Настроить мониторинг: хосты, шаблоны, веб-сценарий, триггеры и дашборды'),
+    'dashboards': ('dashboards', True, 'Синхронизировать дашборд веб-сервера (принцип USE)'),
+    'agents': ('agents', True, 'Показать хосты и доступность Zabbix агентов'),
+    'hosts': ('hosts', True, 'Исправить IP адреса интерфейсов агентов в Zabbix'),
+    'send': ('send', True, 'Отправить значения в траппер Zabbix (протокол sender)'),
+    'es-bridge': ('elastic', True, 'Отправлять метрики Elasticsearch и Kibana в Zabbix'),
+    'inventory': ('inventory', False, 'Обновить инвентарь Ansible по outputs Terraform'),
+    'ansible-inventory': ('ansible_inventory', False,
+                          'Динамический инвентарь Ansible по outputs Terraform (--list)'),
+    'ansible-timings': ('ansible_timings', False,
+                        'Отчет по времени задач и ролей Ansible (callback task_timing)'),
+    'outputs': ('outputs', False, 'Показать outputs Terraform из state без запуска terraform'),
+    'kibana-check': ('kibana', False, 'Проверить состояние Kibana через /api/status'),
+}
+
+
+class Context:
+    """
+    Общие ресурсы запуска подкоманды: метрики и один клиент Zabbix API,
+    который создается и проходит аутентификацию при первом вызове client().
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.metrics = APIMetrics()
+        self.zapi = None
+
+    def client(self, min_pool_size: int = 0, **options):
+        """
+        Клиент с параметрами из общих опций. min_pool_size и options
+        (например, id_cache) учитываются только при первом вызове.
+        """
+        if self.zapi is not None:
+            return self.zapi
+
+        from .api import ZabbixAPI
+        from .session import DEFAULT_SESSION_PATH, SessionCache
+        from .transport import DEFAULT_POOL_SIZE
+
+        args = self.args
+        settings = {'timeout': args.timeout, 'deadline': args.deadline,
+                    'retries': args.retries, 'hedge': args.hedge}
+        options.update({name: value for name, value in settings.items() if value is not None})
+        options['pool_size'] = max(args.pool_size or DEFAULT_POOL_SIZE, min_pool_size)
+        if args.session_cache is not None:
+            options['session_cache'] = SessionCache(args.session_cache or DEFAULT_SESSION_PATH)
+
+        self.zapi = ZabbixAPI(args.zabbix_url, args.username, args.password,
+                              metrics=self.metrics, api_token=args.api_token, **options)
+        with self.metrics.phase('login'):
+            self.zapi.login()
+        return self.zapi
+
+    def close(self):
+        if self.zapi is not None:
+            self.zapi.close()
+            self.zapi = None
+
+
+def zabbix_options() -> argparse.ArgumentParser:
+    """Опции подключения к Zabbix API, общие для подкоманд"""
+    parser = argparse.ArgumentParser(add_help=False)
+    group = parser.add_argument_group('подключение к Zabbix API')
+    group.add_argument('--zabbix-url', default=os.environ.get('ZABBIX_URL'),
+                       help='URL Zabbix сервера, например http://158.160.104.168 '
+                            '(по умолчанию: ZABBIX_URL)')
+    group.add_argument('--username', default=os.environ.get('ZABBIX_USER', 'Admin'),
+                       help='Имя пользователя Zabbix (по умолчанию: ZABBIX_USER или Admin)')
+    group.add_argument('--password', default=os.environ.get('ZABBIX_PASSWORD', 'zabbix'),
+                       help='Пароль пользователя Zabbix (по умолчанию: ZABBIX_PASSWORD или zabbix)')
+    group.add_argument('--api-token', default=os.environ.get('ZABBIX_API_TOKEN'),
+                       help='API токен Zabbix вместо входа по паролю '
+                            '(по умолчанию: ZABBIX_API_TOKEN)')
+    group.add_argument('--session-cache', nargs='?', const='', metavar='PATH',
+                       help='Сохранять сессию между запусками и проверять ее вместо user.login '
+                            '(по умолчанию ~/.cache/zbxtools/sessions.json; можно включить '
+                            'для всех скриптов переменной ZBX_SESSION_CACHE). Без кэша '
+                            'сессия закрывается user.logout по завершении')
+    group.add_argument('--pool-size', type=int,
+                       help='Размер пула keep-alive соединений')
+    group.add_argument('--timeout', type=float,
+                       help='Таймаут ответа API в секундах')
+    group.add_argument('--deadline', type=float, metavar='SECONDS',
+                       help='Бюджет времени на весь запуск: запросы не ждут дольше остатка бюджета')
+    group.add_argument('--retries', type=int,
+                       help='Повторов *.get при сетевых ошибках и ответах 429/502/503/504 '
+                            'с экспоненциальной задержкой')
+    group.add_argument('--hedge', action='store_true', default=None,
+                       help='Дублировать *.get, если ответа нет дольше p95 задержки чтения')
+    return parser
+
+
+def run_options() -> argparse.ArgumentParser:
+    """Опции измерения запуска, общие для всех подкоманд"""
+    parser = argparse.ArgumentParser(add_help=False)
+    group = parser.add_argument_group('измерение запуска')
+    group.add_argument('--metrics', metavar='PREFIX',
+                       help='Сохранить вызовы, задержки и байты по методам API и длительность фаз '
+                            'в PREFIX.prom (textfile для node_exporter) и PREFIX.json')
+    group.add_argument('--profile', metavar='PATH',
+                       help='Профилировать запуск: cProfile в PATH, фазы и самые затратные '
+                            'функции в PATH.txt')
+    return parser
+
+
+def load_command(name: str):
+    return importlib.import_module(f'.commands.{COMMANDS[name][0]}', __package__)
+
+
+def build_parser(command: str = None) -> argparse.ArgumentParser:
+    """Парсер со всеми подкомандами; аргументы добавляются только для выбранной"""
+    parser = argparse.ArgumentParser(
+        prog='zbxctl',
+        description='Настройка и проверка мониторинга инфраструктуры в Yandex Cloud'
+    )
+    subparsers = parser.add_subparsers(dest='command', metavar='КОМАНДА', required=True)
+
+    zabbix, measurement = zabbix_options(), run_options()
+    for name, (_, needs_zabbix, help_text) in COMMANDS.items():
+        parents = [zabbix, measurement] if needs_zabbix else [measurement]
+        subparser = subparsers.add_parser(name, help=help_text, description=help_text,
+                                          parents=parents)
+        if name == command:
+            load_command(name).add_arguments(subparser)
+
+    return parser
+
+
+def main(argv: List[str] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv and argv[0] in COMMANDS else None
+    parser = build_parser(command)
+    args = parser.parse_args(argv)
+    if COMMANDS[args.command][1] and not args.zabbix_url:
+        parser.error("не задан URL Zabbix: укажите --zabbix-url или ZABBIX_URL")
+
+    context = Context(args)
+    try:
+        with profiled(context.metrics, args.profile):
+            load_command(args.command).run(args, context)
+    except Exception as e:
+        print(f"\n✗ Ошибка: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        context.close()
+        if (args.metrics or args.profile) and context.metrics.total_calls():
+            print("\nВызовы Zabbix API:")
+            context.metrics.print_summary()
+        if args.metrics:
+            context.metrics.write(args.metrics)
+            print(f"\nМетрики сохранены в {args.metrics}.prom и {args.metrics}.json")
+        if args.profile:
+            print(f"Профиль сохранен в {args.profile} и {args.profile}.txt")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+"""
+Подкоманды zbxctl. Каждый модуль определяет add_arguments(parser)
+и run(args, context) и импортируется только при вызове своей подкоманды.
+"""
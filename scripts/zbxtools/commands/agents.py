@@ -0,0 +1,204 @@
+"""
+Подкоманда zbxctl agents: проверка статуса Zabbix агентов
+Кроме доступности, которую сервер хранит в интерфейсах хостов, агенты
+проверяются напрямую: TCP соединение с портом агента и agent.ping.
+С --watch команда не завершается, а раз в интервал выводит только
+изменения: доступность агентов, новые и решенные проблемы.
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# probe (asyncio) и watch (requests через api) импортируются в функциях, которые
+# их используют, чтобы не замедлять запуск и --help. Поэтому значения по умолчанию
+# для опций заданы здесь; они совпадают с умолчаниями probe и watch.
+DEFAULT_FANOUT = 512
+DEFAULT_PROBE_TIMEOUT = 3.0
+DEFAULT_RESYNC_CYCLES = 60
+DEFAULT_WATCH_INTERVAL = 30.0
+
+
+def agent_interface(host: Dict) -> Dict:
+    """Основной agent интерфейс хоста или пустой dict"""
+    for interface in host.get('interfaces', []):
+        if interface['type'] == '1' and interface['main'] == '1':
+            return interface
+    return {}
+
+
+def format_ms(seconds) -> str:
+    return f"{seconds * 1000:.1f}" if seconds is not None else "-"
+
+
+def print_probe_table(results: List, availability: Dict[str, str]):
+    """Таблица задержек по хостам: сначала проблемные, затем по имени"""
+    print(f"{'Хост':<36} {'Адрес':<22} {'Zabbix':<11} {'TCP, мс':>8} {'ping, мс':>9}  Результат")
+    for result in sorted(results, key=lambda r: (r.ok, r.host)):
+        address = f"{result.ip}:{result.port}"
+        print(f"{result.host:<36} {address:<22} {availability[result.host]:<11} "
+              f"{format_ms(result.connect_latency):>8} {format_ms(result.ping_latency):>9}  "
+              f"{'✅' if result.ok else '❌'} {result.status()}")
+
+
+def print_probe_summary(results: List, availability: Dict[str, str], elapsed: float):
+    from ..probe import percentile
+    from ..watch import AVAILABILITY
+
+    responding = [r for r in results if r.ok]
+    silent = [r for r in results if r.reachable and not r.ok]
+    # Сервер и прямая проверка расходятся: флаг устарел или агент закрыт для сервера
+    mismatched = [r for r in results if (availability[r.host] == AVAILABILITY['1']) != r.ok
+                  and availability[r.host] != AVAILABILITY['0']]
+    connect = [r.connect_latency for r in results if r.reachable]
+
+    print(f"   Проверено агентов: {len(results)} за {elapsed:.2f} с")
+    print(f"   Отвечают на agent.ping: {len(responding)}")
+    print(f"   Порт открыт, но agent.ping не прошел: {len(silent)}")
+    print(f"   Недоступны: {len(results) - len(responding) - len(silent)}")
+    print(f"   Расходятся с доступностью в Zabbix: {len(mismatched)}")
+    if connect:
+        print(f"   TCP подключение: p50 {format_ms(percentile(connect, 0.5))} мс, "
+              f"p95 {format_ms(percentile(connect, 0.95))} мс, "
+              f"макс. {format_ms(max(connect))} мс")
+
+
+def emit(record: Dict, json_lines: bool, lines: List[str]):
+    if json_lines:
+        print(json.dumps(record, ensure_ascii=False), flush=True)
+    else:
+        print("\n".join(lines), flush=True)
+
+
+def watch(zapi, args: argparse.Namespace):
+    """Наблюдение до Ctrl+C или до --cycles циклов; выводятся только переходы"""
+    from ..watch import StatusWatcher, format_change, format_snapshot
+
+    watcher = StatusWatcher(zapi, args.resync_cycles)
+    snapshot = watcher.start()
+    emit(snapshot, args.json_lines, format_snapshot(snapshot))
+
+    try:
+        while not args.cycles or watcher.cycles < args.cycles:
+            time.sleep(args.interval)
+            traffic = zapi.metrics.total_bytes()
+            changes = watcher.poll()
+            for change in changes:
+                emit(change, args.json_lines, [format_change(change)])
+            if args.verbose_watch:
+                # stderr, чтобы не смешивать с JSON строками
+                print(f"   цикл {watcher.cycles}: изменений {len(changes)}, "
+                      f"трафик API {zapi.metrics.total_bytes() - traffic} байт",
+                      file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        if not args.json_lines:
+            print("👋 Наблюдение остановлено")
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--no-probe', action='store_true',
+                        help='Не проверять агентов напрямую, только доступность в Zabbix')
+    parser.add_argument('--fanout', type=int, default=DEFAULT_FANOUT,
+                        help=f'Сколько агентов проверять одновременно (по умолчанию: {DEFAULT_FANOUT})')
+    parser.add_argument('--probe-timeout', type=float, default=DEFAULT_PROBE_TIMEOUT,
+                        help='Таймаут проверки одного агента в секундах '
+                             f'(по умолчанию: {DEFAULT_PROBE_TIMEOUT:g})')
+    parser.add_argument('--watch', action='store_true',
+                        help='Следить за изменениями доступности агентов и проблемами')
+    parser.add_argument('--interval', type=float, default=DEFAULT_WATCH_INTERVAL,
+                        help='Интервал опроса в режиме --watch, секунд '
+                             f'(по умолчанию: {DEFAULT_WATCH_INTERVAL:g})')
+    parser.add_argument('--cycles', type=int, default=0,
+                        help='Завершить --watch после стольких циклов (0 - без ограничения)')
+    parser.add_argument('--resync-cycles', type=int, default=DEFAULT_RESYNC_CYCLES,
+                        help='Раз в столько циклов заново загружать все хосты '
+                             f'(по умолчанию: {DEFAULT_RESYNC_CYCLES})')
+    parser.add_argument('--json-lines', action='store_true',
+                        help='В режиме --watch выводить каждое изменение строкой JSON')
+    parser.add_argument('--verbose-watch', action='store_true',
+                        help='Выводить в stderr число изменений и трафик API каждого цикла')
+
+
+def run(args: argparse.Namespace, context):
+    if args.watch:
+        try:
+            watch(context.client(), args)
+        except Exception as e:
+            print(f"❌ Ошибка: {e}")
+            raise SystemExit(1)
+        return
+
+    # Доступность агента в интерфейсе (поле available, Zabbix 6.0)
+    from ..watch import AVAILABILITY
+
+    try:
+        print("🔍 Проверка статуса Zabbix агентов...")
+        print(f"📡 Подключение к Zabbix: {args.zabbix_url}")
+        
+        zapi = context.client()
+        print("✅ Успешная аутентификация")
+        
+        # Хосты запрашиваются страницами и выводятся по мере получения
+        total_hosts = 0
+        enabled_hosts = 0
+        # Агенты включенных хостов для прямой проверки: (хост, IP, порт)
+        targets: List[Tuple[str, str, int]] = []
+        availability: Dict[str, str] = {}
+        
+        print("=" * 80)
+        
+        for host in zapi.iter_hosts(fields=['host', 'name', 'status']):
+            host_name = host['name']
+            host_hostname = host['host']
+            status = "Включен" if host['status'] == '0' else "Отключен"
+        
+            print(f"🖥️  {host_name} ({host_hostname})")
+            print(f"   Статус: {status}")
+        
+            # Показать интерфейсы
+            if host.get('interfaces'):
+                for interface in host['interfaces']:
+                    if interface['type'] == '1':  # Agent interface
+                        availability_text = AVAILABILITY.get(interface.get('available'), "неизвестно")
+                        print(f"   IP: {interface['ip']}:{interface['port']} (агент: {availability_text})")
+        
+            print(flush=True)
+        
+            total_hosts += 1
+            if host['status'] == '0':
+                enabled_hosts += 1
+                interface = agent_interface(host)
+                if interface:
+                    targets.append((host_hostname, interface['ip'], int(interface['port'])))
+                    availability[host_hostname] = AVAILABILITY.get(interface.get('available'),
+                                                                   "неизвестно")
+        
+        print("📈 Статистика:")
+        print(f"   Всего хостов: {total_hosts}")
+        print(f"   Включено: {enabled_hosts}")
+        
+        if enabled_hosts > 0:
+            print("🎉 Хосты настроены в Zabbix!")
+        else:
+            print("❌ Нет активных хостов")
+        
+        if targets and not args.no_probe:
+            print("=" * 80)
+            print(f"🩺 Прямая проверка агентов: {len(targets)}, одновременно до {args.fanout}, "
+                  f"таймаут {args.probe_timeout:g} с", flush=True)
+            from ..probe import probe_agents
+
+            started = time.monotonic()
+            results = probe_agents(targets, args.fanout, args.probe_timeout)
+            elapsed = time.monotonic() - started
+            print_probe_table(results, availability)
+            print("📈 Прямая проверка:")
+            print_probe_summary(results, availability, elapsed)
+        
+        zapi.print_connection_stats()
+    except Exception as e:
+        # Строку с ❌ ищет zabbix_status_report.sh в stdout
+        print(f"❌ Ошибка: {e}")
+        raise SystemExit(1)
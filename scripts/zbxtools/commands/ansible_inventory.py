@@ -0,0 +1,72 @@
+"""
+Подкоманда zbxctl ansible-inventory: динамический инвентарь Ansible
+Отвечает на --list группами и _meta.hostvars по outputs Terraform (тот же
+инвентарь, что zbxctl inventory пишет в prod.yml). Ответ хранится на диске
+вместе с отпечатком локального state: пока state не менялся, команда
+только сравнивает размер и mtime terraform.tfstate и выводит готовый JSON.
+Вызывается из ansible/inventories/terraform.py.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Optional
+
+from ..inventory import DEFAULT_SSH_KEY, ansible_list, build_inventory
+from ..metrics import write_atomic
+from ..terraform import get_outputs, state_fingerprint
+from .inventory import add_outputs_arguments, outputs_cache
+
+DEFAULT_ANSWER_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'zbxtools',
+                                    'ansible-inventory.json')
+
+
+def cached_answer(path: str, key: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry.get('answer') if entry.get('key') == key else None
+
+
+def list_answer(args: argparse.Namespace) -> str:
+    """JSON ответа на --list: из кэша ответа или по outputs"""
+    fingerprint = None if args.outputs else state_fingerprint(args.terraform_dir)
+    # Ответ зависит от state, каталога и ключа SSH
+    key = f'{fingerprint}|{os.path.abspath(args.terraform_dir)}|{args.ssh_key}'
+    use_cache = fingerprint and not args.no_outputs_cache
+    if use_cache:
+        answer = cached_answer(args.answer_cache, key)
+        if answer is not None:
+            return answer
+
+    outputs, _ = get_outputs(args.terraform_dir, outputs_cache(args), args.outputs,
+                             args.outputs_max_age)
+    inventory = build_inventory(outputs['public_ips']['value'], outputs['private_ips']['value'],
+                                args.ssh_key or None)
+    answer = json.dumps(ansible_list(inventory), separators=(',', ':'))
+    if use_cache:
+        write_atomic(args.answer_cache, json.dumps({'key': key, 'answer': answer}))
+    return answer
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--list', action='store_true', help='Все группы и hostvars (JSON)')
+    mode.add_argument('--host', help='Переменные одного хоста (JSON)')
+    add_outputs_arguments(parser)
+    parser.add_argument('--ssh-key', default=DEFAULT_SSH_KEY,
+                        help=f"Приватный ключ SSH (по умолчанию: {DEFAULT_SSH_KEY}; "
+                             "'' - не указывать)")
+    parser.add_argument('--answer-cache', default=DEFAULT_ANSWER_CACHE,
+                        help=f'Кэш ответа --list (по умолчанию: {DEFAULT_ANSWER_CACHE})')
+
+
+def run(args: argparse.Namespace, context):
+    answer = list_answer(args)
+    if args.host:
+        # Ansible вызывает --host, только если в --list нет _meta
+        answer = json.dumps(json.loads(answer)['_meta']['hostvars'].get(args.host, {}))
+    sys.stdout.write(answer + '\n')
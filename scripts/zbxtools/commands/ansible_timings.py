@@ -0,0 +1,113 @@
+"""
+Подкоманда zbxctl ansible-timings: отчет по времени запусков Ansible
+Читает записи callback плагина task_timing (включен в ansible/ansible.cfg)
+и выводит для запуска самые долгие задачи, время по ролям и три времени
+запуска (см. zbxtools.timings), а для последних запусков - динамику
+wall, critical и serial вместе с настройками ansible.cfg, чтобы было
+видно, помогло ли изменение pipelining или кэша фактов.
+
+    zbxctl ansible-timings --playbook site.yml --top 15
+"""
+
+import argparse
+import os
+import time
+from typing import List
+
+from ..timings import DEFAULT_TIMINGS_PATH, TIMINGS_ENV, RunTimings, load_runs
+
+DEFAULT_TOP = 10
+DEFAULT_TREND = 8
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    default_path = os.environ.get(TIMINGS_ENV) or DEFAULT_TIMINGS_PATH
+    parser.add_argument('--path', default=default_path,
+                        help=f'Файл плагина task_timing (по умолчанию: {TIMINGS_ENV} '
+                             f'или {DEFAULT_TIMINGS_PATH})')
+    parser.add_argument('--playbook', help='Только запуски этого плейбука, например site.yml')
+    parser.add_argument('--run', help='ID запуска или его начало (по умолчанию: последний)')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP,
+                        help=f'Сколько самых долгих задач показать (по умолчанию: {DEFAULT_TOP})')
+    parser.add_argument('--trend', type=int, default=DEFAULT_TREND,
+                        help=f'Сколько последних запусков сравнить (по умолчанию: {DEFAULT_TREND})')
+
+
+def started(run: RunTimings) -> str:
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(run.start))
+
+
+def settings_label(run: RunTimings) -> str:
+    settings = run.settings
+    if not settings:
+        return 'нет итогов (прерван)'
+    return (f"forks={settings.get('forks')} pipelining={settings.get('pipelining')} "
+            f"cache={settings.get('fact_caching')} cfg={run.summary.get('config') or '-'}")
+
+
+def print_run(run: RunTimings, top: int):
+    critical, wall, serial = run.critical, run.wall, run.serial
+    print(f"Запуск {run.run_id} ({run.playbook}, {started(run)})")
+    print(f"  Хостов: {len(run.host_totals())}, задач: {len(run.tasks)}, "
+          f"changed: {run.changed()}, failed: {run.failed()}")
+    print(f"  Настройки: {settings_label(run)}")
+    print(f"  wall: {wall:.1f} с, critical: {critical:.1f} с, serial: {serial:.1f} с")
+    if wall:
+        print(f"  Параллельность: {serial / wall:.1f}x, ожидание forks и накладные расходы: "
+              f"{max(wall - critical, 0.0):.1f} с")
+
+    print("\nСамые долгие задачи (по самому медленному хосту):")
+    print(f"{'Макс, с':>8} {'Сумма, с':>9} {'Хостов':>7} {'Changed':>8}  {'Хост':<30} Задача")
+    for task in run.slowest(top):
+        print(f"{task.longest:>8.1f} {task.total:>9.1f} {len(task.hosts):>7} "
+              f"{task.count('changed'):>8}  {task.slowest_host:<30} {task.label}")
+
+    print("\nПо ролям:")
+    print(f"{'Critical, с':>12} {'Доля':>6} {'Serial, с':>10} {'Задач':>6}  Роль")
+    for role, totals in sorted(run.by_role().items(), key=lambda r: r[1]['critical'],
+                               reverse=True):
+        share = totals['critical'] / critical * 100 if critical else 0.0
+        print(f"{totals['critical']:>12.1f} {share:>5.0f}% {totals['serial']:>10.1f} "
+              f"{int(totals['tasks']):>6}  {role}")
+
+
+def print_trend(runs: List[RunTimings]):
+    print("\nПоследние запуски:")
+    print(f"{'Начало':<17} {'Плейбук':<18} {'Wall, с':>8} {'Critical, с':>12} {'Serial, с':>10} "
+          f"{'Changed':>8}  Настройки")
+    for run in runs:
+        print(f"{started(run):<17} {(run.playbook or '-'):<18} {run.wall:>8.1f} "
+              f"{run.critical:>12.1f} {run.serial:>10.1f} {run.changed():>8}  "
+              f"{settings_label(run)}")
+
+    # Critical по ролям: какая роль растет или ускорилась от запуска к запуску
+    roles = list(dict.fromkeys(role for run in runs for role in run.by_role()))
+    by_role = [run.by_role() for run in runs]
+    print("\nCritical по ролям, с (запуски слева направо, последний справа):")
+    for role in roles:
+        values = ' '.join(f"{r[role]['critical']:>7.1f}" if role in r else f"{'-':>7}"
+                          for r in by_role)
+        print(f"  {role:<24} {values}")
+
+
+def run(args: argparse.Namespace, context):
+    if not os.path.exists(args.path):
+        raise ValueError(f"нет {args.path}: включите callback task_timing в ansible.cfg "
+                         "и выполните плейбук")
+    runs = load_runs(args.path)
+    if args.playbook:
+        runs = [r for r in runs if r.playbook == os.path.basename(args.playbook)]
+    if not runs:
+        raise ValueError("нет записей о запусках")
+
+    if args.run:
+        matching = [r for r in runs if r.run_id.startswith(args.run)]
+        if not matching:
+            raise ValueError(f"запуск {args.run!r} не найден")
+        selected = matching[-1]
+    else:
+        selected = runs[-1]
+
+    print_run(selected, args.top)
+    if len(runs) > 1 and args.trend > 1:
+        print_trend(runs[-args.trend:])
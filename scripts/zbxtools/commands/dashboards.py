@@ -0,0 +1,168 @@
+"""
+Подкоманда zbxctl dashboards: дашборд веб-сервера по принципу USE
+Добавляет недостающие веб-серверы (из outputs Terraform, см.
+zbxtools.hostsource) в группу Linux servers и синхронизирует
+дашборд с графиками CPU и памяти web1 и, если настроен zbxctl es-bridge,
+нагрузки Elasticsearch и Kibana (обновляется на месте, только если
+виджеты изменились).
+"""
+
+import argparse
+from typing import Dict, List, Optional
+
+from ..api import ZabbixAPI, ZabbixAPIError
+from ..elastic import ES_HOST, KIBANA_HOST
+from ..hostsource import web_servers
+from .hosts import add_hosts_arguments, load_hosts_config
+
+LINUX_GROUP_NAME = "Linux servers"
+LINUX_TEMPLATE_NAME = "Linux by Zabbix agent"
+# ID группы и шаблона в стандартной установке, если найти их по имени не удалось
+DEFAULT_GROUP_ID = "2"
+DEFAULT_TEMPLATE_ID = "10001"
+
+DASHBOARD_NAME = "Web Server Monitoring (USE)"
+DASHBOARD_HOST = "web1.ru-central1.internal"
+DASHBOARD_USER_ID = 1  # Admin
+
+ITEMS = {
+    "CPU Load": "system.cpu.load[all,avg1]",
+    "CPU Util": "system.cpu.util[,user]",  # or just system.cpu.util
+    "Memory": "vm.memory.size[pavailable]",
+    "Disk": "vfs.fs.size[/,pused]",
+    "Net In": "net.if.in[eth0]",
+    "Net Out": "net.if.out[eth0]"
+}
+
+# Насыщение конвейера логов рядом с веб-сервером: элементы zbxctl es-bridge
+PIPELINE_ITEMS = {
+    "ES Heap": (ES_HOST, "es.jvm.heap.pused"),
+    "ES Indexing": (ES_HOST, "es.indexing.rate"),
+    "ES Write Rejected": (ES_HOST, "es.thread_pool.write.rejected"),
+    "Kibana Event Loop": (KIBANA_HOST, "kibana.event_loop.delay"),
+}
+
+
+def ensure_hosts(zapi: ZabbixAPI, hosts: List[Dict], group_id: str, template_id: str):
+    """Создать отсутствующие хосты (формат hosts_config) с agent интерфейсом"""
+    for h in hosts:
+        host_id = zapi.get_host_id(h["hostname"])
+        if host_id:
+            print(f"Host {h['hostname']} already exists ID: {host_id}")
+            continue
+
+        print(f"Creating host {h['hostname']}...")
+        try:
+            host_id = zapi.create_host(h["hostname"], h["hostname"], h["ip"], [group_id],
+                                       [template_id])
+            print(f"Created host {h['hostname']} ID: {host_id}")
+        except ZabbixAPIError as e:
+            print(f"Failed to create host: {e}")
+
+
+def get_item_ids(zapi: ZabbixAPI, host_id: str, items: Dict[str, str]) -> Dict[str, str]:
+    """Look up all item keys with a single item.get, keyed by item name"""
+    found = zapi.get_item_ids([host_id], list(items.values()))
+    return {name: found[(host_id, key)] for name, key in items.items() if (host_id, key) in found}
+
+
+def get_pipeline_item_ids(zapi: ZabbixAPI) -> Dict[str, str]:
+    """Элементы ES и Kibana одним item.get; пока es-bridge не настроен, их нет"""
+    host_ids = zapi.get_host_ids(sorted({host for host, _ in PIPELINE_ITEMS.values()}))
+    found = zapi.get_item_ids(list(host_ids.values()), [key for _, key in PIPELINE_ITEMS.values()])
+    return {name: found[(host_ids[host], key)] for name, (host, key) in PIPELINE_ITEMS.items()
+            if host in host_ids and (host_ids[host], key) in found}
+
+
+def build_widgets(item_ids: Dict[str, str]) -> List[Dict]:
+    widgets = []
+
+    # CPU Graph
+    if "CPU Load" in item_ids:
+        widgets.append({
+            "type": "graph",
+            "name": "CPU Load",
+            "x": 0, "y": 0, "width": 12, "height": 5,
+            "fields": [
+                {"type": 1, "name": "source_type", "value": "1"},  # Simple graph
+                {"type": 4, "name": "itemid", "value": str(item_ids["CPU Load"])}
+            ]
+        })
+
+    # Memory Graph
+    if "Memory" in item_ids:
+        widgets.append({
+            "type": "graph",
+            "name": "Memory Usage",
+            "x": 12, "y": 0, "width": 12, "height": 5,
+            "fields": [
+                {"type": 1, "name": "source_type", "value": "1"},
+                {"type": 4, "name": "itemid", "value": str(item_ids["Memory"])}
+            ]
+        })
+
+    # Log pipeline graphs below, two per row
+    pipeline = [name for name in PIPELINE_ITEMS if name in item_ids]
+    for i, name in enumerate(pipeline):
+        widgets.append({
+            "type": "graph",
+            "name": name,
+            "x": (i % 2) * 12, "y": 5 + (i // 2) * 5, "width": 12, "height": 5,
+            "fields": [
+                {"type": 1, "name": "source_type", "value": "1"},
+                {"type": 4, "name": "itemid", "value": str(item_ids[name])}
+            ]
+        })
+
+    return widgets
+
+
+def setup_dashboard(zapi: ZabbixAPI, web_hosts: List[Dict]) -> Optional[str]:
+    """
+    Хосты и дашборд через аутентифицированный клиент. web_hosts - веб-серверы
+    в формате hosts_config. Возвращает действие над дашбордом
+    (см. ZabbixAPI.sync_dashboard) или None, если хоста нет.
+    """
+    group_id = zapi.get_host_group_id(LINUX_GROUP_NAME) or DEFAULT_GROUP_ID
+    template_id = zapi.get_template_id(LINUX_TEMPLATE_NAME) or DEFAULT_TEMPLATE_ID
+    ensure_hosts(zapi, web_hosts, group_id, template_id)
+
+    host_id = zapi.get_host_id(DASHBOARD_HOST)
+    if not host_id:
+        print(f"Host {DASHBOARD_HOST} not found")
+        return None
+    print(f"Found {DASHBOARD_HOST} ID: {host_id}")
+
+    item_ids = get_item_ids(zapi, host_id, ITEMS)
+    for name, key in ITEMS.items():
+        if name in item_ids:
+            print(f"Found item {name}: {item_ids[name]}")
+        else:
+            print(f"Item {name} with key {key} not found")
+
+    pipeline_ids = get_pipeline_item_ids(zapi)
+    if pipeline_ids:
+        print(f"Found log pipeline items: {', '.join(pipeline_ids)}")
+    item_ids.update(pipeline_ids)
+
+    # Update in place (keeps the dashboard ID and URL) only if the widgets changed
+    return zapi.sync_dashboard(DASHBOARD_NAME, build_widgets(item_ids), userid=DASHBOARD_USER_ID)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    add_hosts_arguments(parser)
+
+
+def run(args: argparse.Namespace, context):
+    hosts_config, _ = load_hosts_config(args)
+
+    print(f"Connecting to {args.zabbix_url}...")
+    zapi = context.client()
+    print("Login successful.")
+
+    action = setup_dashboard(zapi, web_servers(hosts_config))
+    if action:
+        print(f"Dashboard {DASHBOARD_NAME}: {action}")
+
+    zapi.print_connection_stats()
+    zapi.print_cache_stats()
@@ -0,0 +1,100 @@
+"""
+Подкоманда zbxctl es-bridge: метрики Elasticsearch и Kibana в Zabbix
+Опрашивает Elasticsearch и Kibana и отправляет значения в траппер одним
+пакетом на цикл. С --setup сначала создает траппер элементы и триггеры на
+хостах ES и Kibana. Без --interval выполняется один цикл (для cron или
+systemd timer).
+
+    zbxctl es-bridge --setup --elasticsearch-url http://10.0.11.19:9200 \\
+        --kibana-url http://10.0.1.9:5601
+"""
+
+import argparse
+import os
+import time
+from urllib.parse import urlparse
+
+from ..elastic import (ES_HOST, KIBANA_HOST, bridge_config, collect_elasticsearch,
+                       collect_kibana, ensure_bridge)
+from ..sender import DEFAULT_SENDER_PORT, SenderError, ZabbixSender, sender_value
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--elasticsearch-url', default=os.environ.get('ELASTICSEARCH_URL'),
+                        help='URL Elasticsearch, например http://10.0.11.19:9200 '
+                             '(по умолчанию: ELASTICSEARCH_URL)')
+    parser.add_argument('--kibana-url', default=os.environ.get('KIBANA_URL'),
+                        help='URL Kibana, например http://10.0.1.9:5601 (по умолчанию: KIBANA_URL)')
+    parser.add_argument('--es-host', default=ES_HOST,
+                        help=f'Хост Zabbix для метрик Elasticsearch (по умолчанию: {ES_HOST})')
+    parser.add_argument('--kibana-host', default=KIBANA_HOST,
+                        help=f'Хост Zabbix для метрик Kibana (по умолчанию: {KIBANA_HOST})')
+    parser.add_argument('--setup', action='store_true',
+                        help='Создать недостающие траппер элементы и триггеры')
+    parser.add_argument('--server',
+                        help='Адрес траппера Zabbix (по умолчанию: хост из --zabbix-url)')
+    parser.add_argument('--port', type=int, default=DEFAULT_SENDER_PORT,
+                        help=f'Порт траппера (по умолчанию: {DEFAULT_SENDER_PORT})')
+    parser.add_argument('--interval', type=float, default=0,
+                        help='Повторять сбор раз в столько секунд (0 - один цикл)')
+    parser.add_argument('--cycles', type=int, default=0,
+                        help='Завершить после стольких циклов (0 - без ограничения)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Вывести значения, не отправляя их в Zabbix')
+    parser.add_argument('--http-timeout', type=float, default=10,
+                        help='Таймаут ответа Elasticsearch и Kibana в секундах (по умолчанию: 10)')
+
+
+def collect(transport, args) -> list:
+    """Значения всех источников; недоступный источник пропускается (его ловит nodata)"""
+    values = []
+    sources = [(args.es_host, args.elasticsearch_url, collect_elasticsearch, 'Elasticsearch'),
+               (args.kibana_host, args.kibana_url, collect_kibana, 'Kibana')]
+    now = time.time()
+    for host, url, collector, title in sources:
+        if not url:
+            continue
+        try:
+            metrics = collector(transport, url)
+        except Exception as e:
+            print(f"⚠ {title} ({url}): {e}")
+            continue
+        values += [sender_value(host, key, value, now) for key, value in metrics.items()]
+    return values
+
+
+def run(args: argparse.Namespace, context):
+    if not args.elasticsearch_url and not args.kibana_url:
+        raise ValueError("не заданы --elasticsearch-url и --kibana-url")
+
+    from ..transport import HTTPTransport
+
+    if args.setup:
+        hosts, triggers = bridge_config(args.es_host if args.elasticsearch_url else None,
+                                        args.kibana_host if args.kibana_url else None)
+        results = ensure_bridge(context.client(), hosts, triggers)
+        for method, result in results.items():
+            print(f"✓ {method}: создано {len(result.succeeded())}")
+            for params, error in result.failed():
+                print(f"⚠ {params.get('key_') or params.get('description')}: {error}")
+
+    server = args.server or urlparse(args.zabbix_url).hostname
+    sender = ZabbixSender(server, args.port)
+    cycles = 0
+    with HTTPTransport(pool_size=2, timeout=args.http_timeout) as transport:
+        while True:
+            values = collect(transport, args)
+            cycles += 1
+            if args.dry_run:
+                for value in values:
+                    print(f"{value['host']} {value['key']} {value['value']}")
+            elif values:
+                try:
+                    result = sender.send(values)
+                    print(f"✓ {server}:{args.port}: {result}", flush=True)
+                except SenderError as e:
+                    print(f"⚠ Траппер недоступен: {e}", flush=True)
+
+            if not args.interval or (args.cycles and cycles >= args.cycles):
+                break
+            time.sleep(args.interval)
@@ -0,0 +1,82 @@
+"""
+Подкоманда zbxctl hosts: сверка IP адресов agent интерфейсов в Zabbix
+Правильные адреса берутся из outputs Terraform (или из динамического
+инвентаря), интерфейсы всех хостов читаются одним hostinterface.get,
+расхождения исправляются одним пакетным hostinterface.update.
+"""
+
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from ..hostsource import (DEFAULT_INVENTORY_SOURCE, SOURCES, STATIC_HOSTS, fix_interfaces,
+                          hosts_from_inventory, hosts_from_outputs, load_inventory_answer,
+                          verify_interfaces)
+from .inventory import add_outputs_arguments, get_terraform_outputs
+
+
+def add_hosts_arguments(parser: argparse.ArgumentParser):
+    """Опции источника хостов мониторинга, общие для подкоманд"""
+    parser.add_argument('--hosts-from', choices=SOURCES, default='terraform',
+                        help='Источник хостов и адресов агентов: outputs Terraform, '
+                             'динамический инвентарь Ansible или встроенная таблица '
+                             '(по умолчанию: terraform)')
+    parser.add_argument('--inventory-source', default=DEFAULT_INVENTORY_SOURCE,
+                        help='С --hosts-from inventory: скрипт динамического инвентаря или '
+                             f'JSON его ответа на --list (по умолчанию: {DEFAULT_INVENTORY_SOURCE})')
+    add_outputs_arguments(parser)
+
+
+def load_hosts_config(args: argparse.Namespace) -> Tuple[List[Dict], Optional[Dict]]:
+    """Хосты по опциям add_hosts_arguments и outputs Terraform, если они читались"""
+    if args.hosts_from == 'static':
+        print("⚠ Хосты из встроенной таблицы адресов, она может не совпадать с Terraform")
+        return [dict(host) for host in STATIC_HOSTS], None
+    if args.hosts_from == 'inventory':
+        return hosts_from_inventory(load_inventory_answer(args.inventory_source)), None
+    outputs = get_terraform_outputs(args)
+    return hosts_from_outputs(outputs), outputs
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    add_hosts_arguments(parser)
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Только вывести расхождения, ничего не меняя')
+
+
+def verify(zapi, hosts_config: List[Dict], dry_run: bool = False) -> int:
+    """Сверить и исправить адреса; возвращает число неисправленных расхождений"""
+    mismatches, missing = verify_interfaces(zapi, hosts_config)
+
+    for host in missing:
+        print(f"⚠️  {host['visible_name']}: нет в Zabbix или нет agent интерфейса")
+    if not mismatches:
+        print(f"✅ Все IP адреса уже корректные ({len(hosts_config) - len(missing)} хостов)")
+        return 0
+
+    for mismatch in mismatches:
+        print(f"🔄 {mismatch}")
+    if dry_run:
+        print(f"\n📊 Расхождений: {len(mismatches)}")
+        return len(mismatches)
+
+    result = fix_interfaces(zapi, mismatches)
+    for params, error in result.failed():
+        print(f"   ❌ Интерфейс {params['interfaceid']}: {error}")
+    updated = len(result.succeeded())
+    print(f"\n📊 Обновлено интерфейсов: {updated} (запросов: {result.calls})")
+    if updated:
+        print("🎉 IP адреса успешно обновлены!")
+    return len(mismatches) - updated
+
+
+def run(args: argparse.Namespace, context):
+    print("🔧 Сверка IP адресов хостов в Zabbix...")
+    hosts_config, _ = load_hosts_config(args)
+
+    zapi = context.client()
+    print("✅ Успешная аутентификация")
+
+    remaining = verify(zapi, hosts_config, args.dry_run)
+    zapi.print_connection_stats()
+    if remaining and not args.dry_run:
+        raise Exception(f"Не удалось исправить интерфейсов: {remaining}")
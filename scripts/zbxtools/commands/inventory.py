@@ -0,0 +1,82 @@
+"""
+Подкоманда zbxctl inventory: обновление IP адресов в инвентаре Ansible
+по outputs Terraform (запускается из корня репозитория)
+Инвентарь строится заново из карт public_ips и private_ips и записывается,
+только если изменился (см. zbxtools.inventory).
+Outputs читаются из state и кэшируются по его отпечатку (см. zbxtools.terraform),
+terraform output не запускается.
+"""
+
+import argparse
+from typing import Dict, Optional
+
+from ..inventory import DEFAULT_SSH_KEY, render_inventory, write_if_changed
+from ..terraform import DEFAULT_OUTPUTS_CACHE, OutputsCache, get_outputs
+
+TERRAFORM_DIR = "terraform"
+INVENTORY_FILE = "ansible/inventories/prod.yml"
+
+
+def add_outputs_arguments(parser: argparse.ArgumentParser, remote_max_age: float = 0):
+    """
+    Опции источника outputs Terraform, общие для подкоманд. remote_max_age -
+    сколько секунд по умолчанию доверять кэшу удаленного state без state pull.
+    """
+    parser.add_argument('--terraform-dir', default=TERRAFORM_DIR,
+                        help=f'Каталог конфигурации Terraform (по умолчанию: {TERRAFORM_DIR})')
+    parser.add_argument('--outputs', metavar='FILE',
+                        help='Взять outputs из файла state или выгрузки terraform output -json')
+    parser.add_argument('--outputs-cache', metavar='PATH',
+                        help='Кэш outputs (по умолчанию ZBX_TF_CACHE или '
+                             f'{DEFAULT_OUTPUTS_CACHE})')
+    parser.add_argument('--no-outputs-cache', action='store_true',
+                        help='Не использовать кэш outputs')
+    parser.add_argument('--outputs-max-age', type=float, default=remote_max_age,
+                        metavar='SECONDS',
+                        help='С удаленным backend: брать outputs из кэша без terraform state '
+                             f'pull, если запись моложе SECONDS (по умолчанию: {remote_max_age:g}; '
+                             'apply с другой машины за это время не будет виден)')
+
+
+def outputs_cache(args: argparse.Namespace) -> Optional[OutputsCache]:
+    if args.no_outputs_cache:
+        return None
+    if args.outputs_cache:
+        return OutputsCache(args.outputs_cache)
+    return OutputsCache.from_env()
+
+
+def get_terraform_outputs(args: argparse.Namespace) -> Dict:
+    """Outputs по опциям add_outputs_arguments"""
+    outputs, source = get_outputs(args.terraform_dir, outputs_cache(args), args.outputs,
+                                  args.outputs_max_age)
+    print(f"Terraform outputs: {source}")
+    return outputs
+
+
+def update_inventory(outputs: Dict, inventory_file: str = INVENTORY_FILE,
+                     key_file: Optional[str] = DEFAULT_SSH_KEY):
+    content = render_inventory(outputs, key_file)
+    if write_if_changed(inventory_file, content):
+        print("Inventory updated successfully.")
+    else:
+        # Файл не трогаем: mtime не меняется, кэш фактов и ControlPersist живут дальше
+        print("Inventory is up to date.")
+
+    public_ips = outputs['public_ips']['value']
+    print("New Bastion Public IP:", public_ips['bastion'])
+    print("New Zabbix Public IP:", public_ips.get('zabbix'))
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    add_outputs_arguments(parser)
+    parser.add_argument('--inventory', default=INVENTORY_FILE,
+                       help=f'Файл инвентаря Ansible (по умолчанию: {INVENTORY_FILE})')
+    parser.add_argument('--ssh-key', default=DEFAULT_SSH_KEY,
+                        help='Приватный ключ SSH для хостов и ProxyCommand '
+                             f"(по умолчанию: {DEFAULT_SSH_KEY}; '' - не указывать)")
+
+
+def run(args: argparse.Namespace, context):
+    outputs = get_terraform_outputs(args)
+    update_inventory(outputs, args.inventory, args.ssh_key or None)
@@ -0,0 +1,36 @@
+"""
+Подкоманда zbxctl kibana-check: проверка Kibana через /api/status
+"""
+
+import argparse
+import os
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--kibana-url', default=os.environ.get('KIBANA_URL'),
+                       help='URL Kibana, например http://158.160.97.16:5601 '
+                            '(по умолчанию: KIBANA_URL)')
+    parser.add_argument('--timeout', type=float, default=10,
+                       help='Таймаут ответа в секундах (по умолчанию: 10)')
+
+
+def run(args: argparse.Namespace, context):
+    if not args.kibana_url:
+        raise ValueError("не задан URL Kibana: укажите --kibana-url или KIBANA_URL")
+
+    from ..elastic import kibana_values
+    from ..transport import HTTPTransport
+
+    kibana_url = args.kibana_url.rstrip('/')
+    print(f"Checking Kibana at {kibana_url}...")
+    with HTTPTransport(pool_size=1, timeout=args.timeout) as transport:
+        resp = transport.get(f"{kibana_url}/api/status")
+        print(f"Status Code: {resp.status_code}")
+        if resp.status_code == 200:
+            print("Kibana is UP")
+            # Те же значения, что zbxctl es-bridge отправляет в Zabbix
+            for key, value in kibana_values(resp.json()).items():
+                print(f"  {key}: {value}")
+        else:
+            print("Kibana returned non-200 status")
+            print(resp.text[:200])
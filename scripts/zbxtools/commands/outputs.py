@@ -0,0 +1,42 @@
+"""
+Подкоманда zbxctl outputs: outputs Terraform из state или кэша
+Замена terraform output -json и terraform output -raw NAME для скриптов,
+которым нужны адреса хостов: terraform не запускается.
+
+    ALB_IP=$(zbxctl outputs alb_public_ip --raw)
+"""
+
+import argparse
+import json
+import sys
+
+from ..terraform import DEFAULT_REMOTE_MAX_AGE, get_outputs
+from .inventory import add_outputs_arguments, outputs_cache
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('name', nargs='?', help='Имя output; без него - все outputs')
+    parser.add_argument('--raw', action='store_true',
+                        help='Вывести значение без JSON (только для строк и чисел)')
+    add_outputs_arguments(parser, DEFAULT_REMOTE_MAX_AGE)
+
+
+def run(args: argparse.Namespace, context):
+    outputs, source = get_outputs(args.terraform_dir, outputs_cache(args), args.outputs,
+                                  args.outputs_max_age)
+    # Источник - в stderr, чтобы stdout можно было подставить в переменную
+    print(f"Terraform outputs: {source}", file=sys.stderr)
+
+    if not args.name:
+        print(json.dumps(outputs, indent=2, ensure_ascii=False))
+        return
+    if args.name not in outputs:
+        raise ValueError(f"output {args.name!r} не найден")
+
+    value = outputs[args.name]['value']
+    if args.raw:
+        if isinstance(value, (dict, list)):
+            raise ValueError(f"output {args.name!r} - не строка и не число, используйте без --raw")
+        print(value)
+    else:
+        print(json.dumps(value, indent=2, ensure_ascii=False))
@@ -0,0 +1,1057 @@
+"""
+Подкоманда zbxctl provision: автоматическая настройка мониторинга в Zabbix
+Выполняет:
+- Добавление всех хостов в Zabbix
+- Применение шаблонов "Linux by Zabbix agent" ко всем хостам
+- Применение шаблона "Nginx by Zabbix agent" к веб-серверам
+- Настройку веб-сценария для проверки доступности сайта через ALB
+Выполненные операции записываются в журнал, и с --resume повторный запуск
+после сбоя выполняет только то, что не успело завершиться.
+Хосты и адреса агентов берутся из outputs Terraform (см. zbxtools.hostsource),
+с --verify только сверяются адреса уже зарегистрированных интерфейсов.
+"""
+
+import re
+import time
+import asyncio
+import argparse
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..api import DEFAULT_CHUNK_SIZE, ZabbixAPI, ZabbixAPIError
+from ..async_api import AsyncZabbixAPI
+from ..cache import IDCache
+from ..journal import DEFAULT_JOURNAL_PATH, Journal
+from ..reconcile import DesiredState, Snapshot, apply_plan, build_plan
+from .hosts import add_hosts_arguments, load_hosts_config, verify
+
+
+# Имена объектов, с которыми работает скрипт
+LINUX_TEMPLATE_NAME = 'Linux by Zabbix agent'
+NGINX_TEMPLATE_NAME = 'Nginx by Zabbix agent'
+HOST_GROUP_NAME = 'Yandex Cloud Infrastructure'
+WEB_SCENARIO_NAME = 'ALB Website Availability'
+DASHBOARD_NAMES = ['System Overview', 'Web Servers']
+
+# Ключи элементов данных для графиков дашбордов (из шаблонов Linux и Nginx)
+CPU_ITEM_KEY = 'system.cpu.util'
+NGINX_ITEM_KEY = 'nginx.connections.active'
+DASHBOARD_ITEM_KEYS = [CPU_ITEM_KEY, NGINX_ITEM_KEY]
+
+# Шаблон проекта с триггерами, пороги которых задаются макросами.
+# Он связан с шаблоном Linux (его элементы наследуются) и привязывается к хостам
+# вместо него, поэтому макросы шаблона проекта перекрывают одноименные макросы Linux.
+PROJECT_TEMPLATE_NAME = 'Yandex Cloud Project Triggers'
+TEMPLATE_GROUP_NAME = 'Templates'
+TRIGGER_MACROS = {
+    '{$CPU.UTIL.CRIT}': '80',
+    '{$VFS.PFREE.MIN}': '15',
+}
+
+# Имя пользовательского макроса Zabbix, с необязательным контекстом: {$NAME} или {$NAME:"ctx"}
+MACRO_NAME = re.compile(r'^\{\$[A-Z0-9_.]+(:.*)?\}$')
+
+
+def run_async(zapi: ZabbixAPI, concurrency: int, phase: Callable, *args):
+    """Выполнить асинхронную фазу настройки в собственном event loop"""
+    azapi = AsyncZabbixAPI(zapi, concurrency)
+    try:
+        return asyncio.run(phase(azapi, *args))
+    finally:
+        azapi.close()
+
+
+async def resolve_host_ids_async(azapi: AsyncZabbixAPI, hostnames: List[str]) -> Dict[str, str]:
+    """Параллельно получить ID хостов: имя -> ID (только найденные)"""
+    host_ids = await asyncio.gather(*(azapi.get_host_id(name) for name in hostnames))
+    return {name: host_id for name, host_id in zip(hostnames, host_ids) if host_id}
+
+
+def build_trigger_definitions(hosts_config: List[Dict], web_scenario_host: str,
+                              per_host: bool = True) -> List[Dict]:
+    """
+    Описания триггеров для всех хостов и веб-сценария.
+    Без per_host остается только триггер веб-сценария: триггеры CPU и диска
+    задает шаблон проекта (см. configure_trigger_template).
+    """
+    definitions = []
+    
+    for host_config in hosts_config if per_host else []:
+        hostname = host_config['hostname']
+        
+        # Триггер: CPU > 80% в течение 5 минут
+        definitions.append({
+            'host': hostname,
+            'label': f"CPU для {hostname}",
+            'description': f"High CPU usage on {hostname}",
+            'expression': f"avg(//{hostname}/system.cpu.util,5m)>80",
+            'priority': 2,  # Warning
+            'comments': "CPU загрузка превышает 80% в течение 5 минут"
+        })
+        
+        # Триггер: свободное место на диске < 15%
+        definitions.append({
+            'host': hostname,
+            'label': f"диска для {hostname}",
+            'description': f"Low disk space on {hostname}",
+            'expression': f"last(//{hostname}/vfs.fs.size[/,pfree])<15",
+            'priority': 3,  # Average
+            'comments': "Свободное место на диске меньше 15%"
+        })
+    
+    # Триггер для веб-сценария
+    definitions.append({
+        'host': web_scenario_host,
+        'label': "веб-сценария",
+        'description': "ALB Website is unavailable",
+        'expression': f"last(//{web_scenario_host}/web.test.fail[{WEB_SCENARIO_NAME}])>0",
+        'priority': 4,  # High
+        'comments': "Веб-сценарий проверки доступности ALB завершился с ошибкой"
+    })
+    
+    return definitions
+
+
+def configure_triggers(zapi: ZabbixAPI, hosts_config: List[Dict], web_scenario_host: str,
+                       bulk: bool = False, concurrency: int = 1, per_host: bool = True,
+                       journal: Journal = None):
+    """Настроить триггеры для мониторинга"""
+    print("\nНастройка триггеров...")
+    journal = journal or Journal()
+    
+    definitions = [d for d in build_trigger_definitions(hosts_config, web_scenario_host, per_host)
+                   if not journal.done('trigger', d['description'], d)]
+    if not definitions:
+        print("  ✓ Все триггеры уже созданы (по журналу)")
+        return
+    if bulk:
+        configure_triggers_bulk(zapi, definitions, journal)
+        return
+    if concurrency > 1:
+        run_async(zapi, concurrency, configure_triggers_async, definitions, journal)
+        return
+    
+    triggers_created = 0
+    host_ids = {}
+    
+    for definition in definitions:
+        hostname = definition['host']
+        if hostname not in host_ids:
+            host_ids[hostname] = zapi.get_host_id(hostname)
+            if not host_ids[hostname]:
+                print(f"  ⚠ Хост '{hostname}' не найден, пропускаем")
+        
+        host_id = host_ids[hostname]
+        if not host_id:
+            continue
+        
+        trigger_name = definition['description']
+        trigger_id = zapi.get_trigger_id(trigger_name, host_id)
+        if not trigger_id:
+            try:
+                trigger_id = zapi.create_trigger(
+                    description=trigger_name,
+                    expression=definition['expression'],
+                    priority=definition['priority'],
+                    comments=definition['comments']
+                )
+                print(f"  ✓ Создан триггер: {trigger_name}")
+                triggers_created += 1
+            except ZabbixAPIError as e:
+                print(f"  ⚠ Не удалось создать триггер {definition['label']}: {e}")
+                journal.fail('trigger', trigger_name, e)
+                continue
+        journal.record('trigger', trigger_name, trigger_id, definition)
+    
+    print(f"  Создано триггеров: {triggers_created}")
+
+
+async def configure_triggers_async(azapi: AsyncZabbixAPI, definitions: List[Dict],
+                                   journal: Journal):
+    """Проверить и создать триггеры параллельно по всем хостам"""
+    hostnames = list(dict.fromkeys(d['host'] for d in definitions))
+    host_ids = await resolve_host_ids_async(azapi, hostnames)
+    
+    for hostname in hostnames:
+        if hostname not in host_ids:
+            print(f"  ⚠ Хост '{hostname}' не найден, пропускаем")
+    
+    async def ensure_trigger(definition: Dict) -> bool:
+        host_id = host_ids.get(definition['host'])
+        trigger_name = definition['description']
+        if not host_id:
+            return False
+        trigger_id = await azapi.get_trigger_id(trigger_name, host_id)
+        if trigger_id:
+            journal.record('trigger', trigger_name, trigger_id, definition)
+            return False
+        
+        try:
+            trigger_id = await azapi.create_trigger(
+                description=trigger_name,
+                expression=definition['expression'],
+                priority=definition['priority'],
+                comments=definition['comments']
+            )
+        except ZabbixAPIError as e:
+            # Триггер мог успеть создать параллельный запуск - это не ошибка
+            if e.already_exists:
+                journal.record('trigger', trigger_name, None, definition)
+            else:
+                print(f"  ⚠ Не удалось создать триггер {definition['label']}: {e}")
+                journal.fail('trigger', trigger_name, e)
+            return False
+        
+        print(f"  ✓ Создан триггер: {trigger_name}")
+        journal.record('trigger', trigger_name, trigger_id, definition)
+        return True
+    
+    created = await asyncio.gather(*(ensure_trigger(d) for d in definitions))
+    print(f"  Создано триггеров: {sum(created)}")
+
+
+def configure_triggers_bulk(zapi: ZabbixAPI, definitions: List[Dict], journal: Journal):
+    """Создать недостающие триггеры пакетом: два запроса на поиск и массив trigger.create"""
+    hostnames = list(dict.fromkeys(d['host'] for d in definitions))
+    host_ids = zapi.get_host_ids(hostnames)
+    
+    for hostname in hostnames:
+        if hostname not in host_ids:
+            print(f"  ⚠ Хост '{hostname}' не найден, пропускаем")
+    
+    existing = zapi.get_trigger_keys(
+        list(host_ids.values()),
+        list(dict.fromkeys(d['description'] for d in definitions))
+    ) if host_ids else set()
+    
+    by_description = {d['description']: d for d in definitions}
+    for definition in definitions:
+        host_id = host_ids.get(definition['host'])
+        if not host_id:
+            continue
+        if (host_id, definition['description']) in existing:
+            # ID существующих триггеров пакетный поиск не возвращает
+            journal.record('trigger', definition['description'], None, definition)
+            continue
+        
+        zapi.queue('trigger.create', zapi.trigger_params(
+            definition['description'], definition['expression'],
+            definition['priority'], definition['comments']
+        ))
+    
+    result = zapi.flush().get('trigger.create')
+    if not result:
+        print("  Создано триггеров: 0")
+        return
+    
+    for params, trigger_id in result.succeeded():
+        print(f"  ✓ Создан триггер: {params['description']}")
+        journal.record('trigger', params['description'], trigger_id,
+                       by_description[params['description']])
+    for params, error in result.failed():
+        print(f"  ⚠ Не удалось создать триггер '{params['description']}': {error}")
+        journal.fail('trigger', params['description'], error)
+    
+    print(f"  Создано триггеров: {len(result.succeeded())} (запросов: {result.calls})")
+
+
+def build_template_triggers() -> List[Dict]:
+    """Триггеры шаблона проекта; диск проверяется прототипом по обнаруженным ФС шаблона Linux"""
+    template = PROJECT_TEMPLATE_NAME
+    return [
+        {
+            'description': "High CPU usage on {HOST.NAME}",
+            'expression': f"avg(/{template}/system.cpu.util,5m)>{{$CPU.UTIL.CRIT}}",
+            'priority': 2,  # Warning
+            'comments': "CPU загрузка превышает {$CPU.UTIL.CRIT}% в течение 5 минут",
+            'prototype': False
+        },
+        {
+            'description': "Low disk space on {HOST.NAME}: {#FSNAME}",
+            'expression': f"100-last(/{template}/vfs.fs.size[{{#FSNAME}},pused])<{{$VFS.PFREE.MIN}}",
+            'priority': 3,  # Average
+            'comments': "Свободное место на диске меньше {$VFS.PFREE.MIN}%",
+            'prototype': True
+        }
+    ]
+
+
+def configure_trigger_template(zapi: ZabbixAPI, linux_template_id: str, group_id: str,
+                               macros: Dict[str, str], journal: Journal = None) -> str:
+    """
+    Создать или обновить шаблон проекта с триггерами и макросами порогов.
+    Изменение порога - один template.update, хосты при этом не затрагиваются.
+    """
+    print("\nНастройка шаблона триггеров...")
+    journal = journal or Journal()
+    
+    inputs = {'linux_template': linux_template_id, 'group': group_id, 'macros': macros,
+              'triggers': build_template_triggers()}
+    entry = journal.done('template', PROJECT_TEMPLATE_NAME, inputs)
+    if entry:
+        print(f"  ✓ Шаблон '{PROJECT_TEMPLATE_NAME}' уже настроен (по журналу)")
+        return entry['id']
+    
+    template = zapi.get_template(PROJECT_TEMPLATE_NAME)
+    if not template:
+        template_group_id = zapi.get_host_group_id(TEMPLATE_GROUP_NAME) or group_id
+        template_id = zapi.create_template(PROJECT_TEMPLATE_NAME, [template_group_id],
+                                           [linux_template_id], macros)
+        print(f"  ✓ Создан шаблон '{PROJECT_TEMPLATE_NAME}'")
+    else:
+        template_id = template['templateid']
+        current = {m['macro']: m['value'] for m in template.get('macros', [])}
+        changed = {m: v for m, v in macros.items() if current.get(m) != v}
+        if changed:
+            # Макросы шаблона заменяются целиком, поэтому остальные сохраняются
+            zapi.update_template_macros(template_id, dict(current, **macros))
+            for macro, value in changed.items():
+                print(f"  ✓ Порог {macro}: {current.get(macro, '-')} → {value}")
+        else:
+            print(f"  ✓ Шаблон '{PROJECT_TEMPLATE_NAME}' уже существует")
+    
+    failed = False
+    for trigger in build_template_triggers():
+        if trigger['prototype']:
+            exists = zapi.get_trigger_prototype_id(trigger['description'], template_id)
+            create = zapi.create_trigger_prototype
+        else:
+            exists = zapi.get_trigger_id(trigger['description'], template_id)
+            create = zapi.create_trigger
+        if exists:
+            continue
+        
+        try:
+            create(trigger['description'], trigger['expression'],
+                   trigger['priority'], trigger['comments'])
+            print(f"  ✓ Создан триггер шаблона: {trigger['description']}")
+        except ZabbixAPIError as e:
+            print(f"  ⚠ Не удалось создать триггер шаблона '{trigger['description']}': {e}")
+            journal.fail('trigger', trigger['description'], e)
+            failed = True
+    
+    if not failed:
+        journal.record('template', PROJECT_TEMPLATE_NAME, template_id, inputs)
+    return template_id
+
+
+def link_trigger_template(zapi: ZabbixAPI, group_id: str, hostnames: List[str],
+                          journal: Journal = None):
+    """Привязать шаблон проекта ко всем хостам группы, где его еще нет, одним template.massadd"""
+    journal = journal or Journal()
+    inputs = {'group': group_id, 'hosts': sorted(hostnames)}
+    if journal.done('template_link', PROJECT_TEMPLATE_NAME, inputs):
+        return
+    
+    template = zapi.get_template(PROJECT_TEMPLATE_NAME)
+    if not template:
+        return
+    
+    linked = {host['hostid'] for host in template['hosts']}
+    missing = [host['hostid'] for host in zapi.get_all_hosts(group_id)
+               if host['hostid'] not in linked]
+    
+    if missing:
+        zapi.link_templates([template['templateid']], missing)
+        print(f"  ✓ Шаблон '{PROJECT_TEMPLATE_NAME}' привязан еще к {len(missing)} хостам группы")
+    journal.record('template_link', PROJECT_TEMPLATE_NAME, template['templateid'], inputs)
+
+
+def configure_host_macros(zapi: ZabbixAPI, hosts_config: List[Dict], journal: Journal = None):
+    """Задать переопределения порогов макросами хостов ('macros' в конфигурации хоста)"""
+    journal = journal or Journal()
+    overrides = {h['hostname']: h['macros'] for h in hosts_config
+                 if h.get('macros') and not journal.done('hostmacro', h['hostname'], h['macros'])}
+    if not overrides:
+        return
+    
+    host_ids = zapi.get_host_ids(list(overrides))
+    results = zapi.sync_host_macros({host_ids[name]: macros
+                                     for name, macros in overrides.items() if name in host_ids})
+    
+    failed = False
+    for result in results.values():
+        for params, error in result.failed():
+            macro = params.get('macro', params.get('hostmacroid'))
+            print(f"  ⚠ Не удалось задать макрос {macro}: {error}")
+            journal.fail('hostmacro', macro, error)
+            failed = True
+    # usermacro.update не несет hostid, поэтому при ошибках не записываем ни один хост
+    if not failed:
+        for name, macros in overrides.items():
+            if name in host_ids:
+                journal.record('hostmacro', name, host_ids[name], macros)
+    changed = sum(len(result.succeeded()) for result in results.values())
+    print(f"  ✓ Макросы хостов: изменено {changed} для {len(host_ids)} хостов")
+
+
+def build_dashboards(hosts_config: List[Dict], host_ids: Dict[str, str],
+                     item_ids: Dict[Tuple[str, str], str]) -> Dict[str, List[Dict]]:
+    """
+    Виджеты дашбордов по имени дашборда для хостов с известными ID.
+    item_ids - ID элементов данных по (hostid, ключ), см. ZabbixAPI.get_item_ids;
+    хосты без нужного элемента в графики не попадают.
+    """
+    all_hosts = []
+    web_hosts = []
+    
+    for host_config in hosts_config:
+        host_id = host_ids.get(host_config['hostname'])
+        if not host_id:
+            continue
+        
+        cpu_item_id = item_ids.get((host_id, CPU_ITEM_KEY))
+        if cpu_item_id:
+            all_hosts.append({'itemid': cpu_item_id, 'name': host_config['visible_name']})
+        
+        nginx_item_id = item_ids.get((host_id, NGINX_ITEM_KEY))
+        if host_config.get('is_web_server', False) and nginx_item_id:
+            web_hosts.append({'itemid': nginx_item_id, 'name': host_config['visible_name']})
+    
+    dashboards = {}
+    
+    # Дашборд 1: System Overview
+    widgets = []
+    y_pos = 0
+    
+    # Виджет: Статус всех хостов
+    widgets.append({
+        'type': 'problemhosts',
+        'name': 'Host Status',
+        'x': 0,
+        'y': y_pos,
+        'width': 12,
+        'height': 4,
+        'fields': [
+            {'type': 0, 'name': 'groupids', 'value': ''}
+        ]
+    })
+    y_pos += 4
+    
+    # Виджеты CPU для каждого хоста
+    x_pos = 0
+    for i, host in enumerate(all_hosts[:4]):  # Максимум 4 хоста
+        widgets.append({
+            'type': 'graph',
+            'name': f"CPU - {host['name']}",
+            'x': x_pos,
+            'y': y_pos,
+            'width': 6,
+            'height': 4,
+            'fields': [
+                {'type': 0, 'name': 'source_type', 'value': '1'},
+                {'type': 4, 'name': 'itemid', 'value': host['itemid']}
+            ]
+        })
+        x_pos += 6
+        if x_pos >= 12:
+            x_pos = 0
+            y_pos += 4
+    
+    dashboards[DASHBOARD_NAMES[0]] = widgets
+    
+    # Дашборд 2: Web Servers
+    if web_hosts:
+        widgets = []
+        y_pos = 0
+        
+        # Виджет: Проблемы веб-серверов
+        widgets.append({
+            'type': 'problems',
+            'name': 'Web Server Problems',
+            'x': 0,
+            'y': y_pos,
+            'width': 12,
+            'height': 4,
+            'fields': [
+                {'type': 0, 'name': 'show', 'value': '3'}
+            ]
+        })
+        y_pos += 4
+        
+        # Виджеты для каждого веб-сервера
+        for i, host in enumerate(web_hosts):
+            x_pos = (i % 2) * 6
+            if i > 0 and i % 2 == 0:
+                y_pos += 4
+            
+            widgets.append({
+                'type': 'graph',
+                'name': f"Nginx - {host['name']}",
+                'x': x_pos,
+                'y': y_pos,
+                'width': 6,
+                'height': 4,
+                'fields': [
+                    {'type': 0, 'name': 'source_type', 'value': '1'},
+                    {'type': 4, 'name': 'itemid', 'value': host['itemid']}
+                ]
+            })
+        
+        dashboards[DASHBOARD_NAMES[1]] = widgets
+    
+    return dashboards
+
+
+def dashboard_inputs(hosts_config: List[Dict]) -> List[Dict]:
+    """Входные данные дашбордов для журнала: от них зависят состав и подписи графиков"""
+    return [{'hostname': h['hostname'], 'visible_name': h['visible_name'],
+             'is_web_server': h.get('is_web_server', False)} for h in hosts_config]
+
+
+def configure_dashboards(zapi: ZabbixAPI, hosts_config: List[Dict], bulk: bool = False,
+                         concurrency: int = 1, journal: Journal = None):
+    """Создать или обновить дашборды для мониторинга"""
+    print("\nСинхронизация дашбордов...")
+    journal = journal or Journal()
+    
+    inputs = dashboard_inputs(hosts_config)
+    if all(journal.done('dashboard', name, inputs) for name in DASHBOARD_NAMES):
+        print("  ✓ Дашборды уже синхронизированы (по журналу)")
+        return
+    
+    # Получить ID всех хостов
+    hostnames = [h['hostname'] for h in hosts_config]
+    if bulk:
+        # Один host.get на все хосты (с --prefetch - из индекса, без запросов)
+        host_ids = zapi.get_host_ids(hostnames)
+    elif concurrency > 1:
+        host_ids = run_async(zapi, concurrency, resolve_host_ids_async, hostnames)
+    else:
+        host_ids = {name: zapi.get_host_id(name) for name in hostnames}
+    
+    # ID элементов данных для графиков всех хостов одним запросом
+    item_ids = zapi.get_item_ids([hid for hid in host_ids.values() if hid], DASHBOARD_ITEM_KEYS)
+    
+    # Существующие дашборды обновляются на месте, только если изменились виджеты
+    messages = {
+        'created': "Создан дашборд",
+        'updated': "Обновлен дашборд",
+        'unchanged': "Без изменений: дашборд"
+    }
+    for dashboard_name, widgets in build_dashboards(hosts_config, host_ids, item_ids).items():
+        try:
+            action = zapi.sync_dashboard(dashboard_name, widgets)
+        except ZabbixAPIError as e:
+            print(f"  ⚠ Не удалось синхронизировать дашборд '{dashboard_name}': {e}")
+            journal.fail('dashboard', dashboard_name, e)
+            continue
+        print(f"  ✓ {messages[action]} '{dashboard_name}'")
+        journal.record('dashboard', dashboard_name, None, inputs)
+
+
+def host_template_ids(host_config: Dict, linux_template_id: str,
+                      nginx_template_id: Optional[str]) -> List[str]:
+    """Определить шаблоны для хоста"""
+    template_ids = [linux_template_id]
+    if host_config.get('is_web_server', False) and nginx_template_id:
+        template_ids.append(nginx_template_id)
+    return template_ids
+
+
+def host_inputs(host_config: Dict, group_id: str, template_ids: List[str]) -> Dict:
+    """Входные данные хоста для журнала"""
+    return {'visible_name': host_config['visible_name'], 'ip': host_config['ip'],
+            'group': group_id, 'templates': template_ids}
+
+
+def configure_hosts(zapi: ZabbixAPI, hosts_config: List[Dict], group_id: str,
+                    linux_template_id: str, nginx_template_id: Optional[str],
+                    journal: Journal = None):
+    """Добавить хосты или обновить их шаблоны, по одному запросу на хост"""
+    journal = journal or Journal()
+    for host_config in hosts_config:
+        hostname = host_config['hostname']
+        visible_name = host_config['visible_name']
+        ip_address = host_config['ip']
+        template_ids = host_template_ids(host_config, linux_template_id, nginx_template_id)
+        
+        try:
+            # Проверить существование хоста
+            host_id = zapi.get_host_id(hostname)
+            
+            if host_id:
+                print(f"  ⚠ Хост '{visible_name}' уже существует, обновление шаблонов...")
+                zapi.update_host_templates(host_id, template_ids)
+                print(f"  ✓ Обновлены шаблоны для '{visible_name}'")
+            else:
+                host_id = zapi.create_host(
+                    hostname=hostname,
+                    visible_name=visible_name,
+                    ip_address=ip_address,
+                    group_ids=[group_id],
+                    template_ids=template_ids
+                )
+                print(f"  ✓ Добавлен хост '{visible_name}' ({ip_address})")
+        except ZabbixAPIError as e:
+            print(f"  ⚠ Не удалось настроить хост '{visible_name}': {e}")
+            journal.fail('host', hostname, e)
+            continue
+        
+        journal.record('host', hostname, host_id,
+                       host_inputs(host_config, group_id, template_ids))
+
+
+async def configure_hosts_async(azapi: AsyncZabbixAPI, hosts_config: List[Dict], group_id: str,
+                                linux_template_id: str, nginx_template_id: Optional[str],
+                                journal: Journal):
+    """Добавить хосты или обновить их шаблоны параллельно"""
+    async def ensure_host(host_config: Dict, template_ids: List[str]) -> str:
+        hostname = host_config['hostname']
+        visible_name = host_config['visible_name']
+        ip_address = host_config['ip']
+        
+        host_id = await azapi.get_host_id(hostname)
+        if not host_id:
+            try:
+                host_id = await azapi.create_host(
+                    hostname=hostname,
+                    visible_name=visible_name,
+                    ip_address=ip_address,
+                    group_ids=[group_id],
+                    template_ids=template_ids
+                )
+                print(f"  ✓ Добавлен хост '{visible_name}' ({ip_address})")
+                return host_id
+            except ZabbixAPIError as e:
+                # Хост создан параллельным запуском - обновляем его как существующий
+                if not e.already_exists:
+                    raise
+                host_id = await azapi.get_host_id(hostname)
+        
+        await azapi.update_host_templates(host_id, template_ids)
+        print(f"  ✓ Обновлены шаблоны для '{visible_name}'")
+        return host_id
+    
+    async def configure_host(host_config: Dict):
+        template_ids = host_template_ids(host_config, linux_template_id, nginx_template_id)
+        try:
+            host_id = await ensure_host(host_config, template_ids)
+        except ZabbixAPIError as e:
+            print(f"  ⚠ Не удалось настроить хост '{host_config['visible_name']}': {e}")
+            journal.fail('host', host_config['hostname'], e)
+            return
+        journal.record('host', host_config['hostname'], host_id,
+                       host_inputs(host_config, group_id, template_ids))
+    
+    await asyncio.gather(*(configure_host(h) for h in hosts_config))
+
+
+def configure_hosts_bulk(zapi: ZabbixAPI, hosts_config: List[Dict], group_id: str,
+                         linux_template_id: str, nginx_template_id: Optional[str],
+                         journal: Journal = None):
+    """
+    Добавить хосты пакетом: один host.get на все хосты, массив host.create
+    для новых и host.massupdate по наборам шаблонов для существующих
+    """
+    journal = journal or Journal()
+    existing = zapi.get_host_ids([h['hostname'] for h in hosts_config])
+    names = {}
+    # Входные данные для журнала по имени хоста и по ID существующего хоста
+    inputs = {}
+    by_id = {}
+    
+    for host_config in hosts_config:
+        template_ids = host_template_ids(host_config, linux_template_id, nginx_template_id)
+        host_id = existing.get(host_config['hostname'])
+        inputs[host_config['hostname']] = host_inputs(host_config, group_id, template_ids)
+        
+        if host_id:
+            zapi.queue_template_link(host_id, template_ids)
+            names[host_id] = host_config['visible_name']
+            by_id[host_id] = host_config['hostname']
+        else:
+            zapi.queue('host.create', zapi.host_params(
+                hostname=host_config['hostname'],
+                visible_name=host_config['visible_name'],
+                ip_address=host_config['ip'],
+                group_ids=[group_id],
+                template_ids=template_ids
+            ))
+    
+    results = zapi.flush()
+    
+    if 'host.create' in results:
+        for params, host_id in results['host.create'].succeeded():
+            print(f"  ✓ Добавлен хост '{params['name']}' ({params['interfaces'][0]['ip']})")
+            journal.record('host', params['host'], host_id, inputs[params['host']])
+        for params, error in results['host.create'].failed():
+            print(f"  ⚠ Не удалось добавить хост '{params['name']}': {error}")
+            journal.fail('host', params['host'], error)
+    
+    if 'host.massupdate' in results:
+        for host_id, _ in results['host.massupdate'].succeeded():
+            print(f"  ✓ Обновлены шаблоны для '{names[host_id]}'")
+            journal.record('host', by_id[host_id], host_id, inputs[by_id[host_id]])
+        for host_id, error in results['host.massupdate'].failed():
+            print(f"  ⚠ Не удалось обновить шаблоны для '{names[host_id]}': {error}")
+            journal.fail('host', by_id[host_id], error)
+    
+    calls = sum(result.calls for result in results.values())
+    print(f"  Хостов обработано: {len(hosts_config)} (запросов на запись: {calls})")
+
+
+def configure_monitoring(zapi: ZabbixAPI, alb_ip: str, hosts_config: List[Dict],
+                        bulk: bool = False, concurrency: int = 1, prefetch: bool = False,
+                        trigger_template: bool = False, trigger_macros: Dict[str, str] = None,
+                        journal: Journal = None):
+    """
+    Основная функция настройки мониторинга через аутентифицированный клиент.
+    Для concurrency > 1 в пуле клиента нужно не меньше concurrency соединений.
+    С trigger_template триггеры CPU и диска задаются шаблоном проекта с макросами
+    порогов вместо отдельных триггеров на каждом хосте. Выполненные операции
+    записываются в journal; операции, которые journal считает выполненными
+    (см. Journal.resume), пропускаются. Если какие-то операции не удались,
+    после всех фаз выбрасывается ZabbixAPIError.
+    """
+    web_scenario_host = hosts_config[0]['hostname']  # Используем первый хост
+    journal = journal or Journal()
+    if journal.entries:
+        print(f"✓ Журнал {journal.path}: {len(journal.entries)} выполненных операций")
+    
+    with zapi.metrics.phase('lookups'):
+        # Загрузить все нужные объекты заранее, по одному запросу на тип
+        if prefetch:
+            definitions = build_trigger_definitions(hosts_config, web_scenario_host,
+                                                    per_host=not trigger_template)
+            templates = [LINUX_TEMPLATE_NAME, NGINX_TEMPLATE_NAME]
+            if trigger_template:
+                templates.append(PROJECT_TEMPLATE_NAME)
+            index = zapi.prefetch(
+                hosts=[h['hostname'] for h in hosts_config],
+                templates=templates,
+                groups=[HOST_GROUP_NAME],
+                triggers=[d['description'] for d in definitions],
+                httptests=[WEB_SCENARIO_NAME],
+                dashboards=DASHBOARD_NAMES
+            )
+            print(f"✓ Загружен индекс объектов: {index.size()} объектов за {index.calls} запросов")
+        
+        # Получить ID необходимых шаблонов
+        print("\nПоиск шаблонов...")
+        linux_template_id = zapi.get_template_id(LINUX_TEMPLATE_NAME)
+        nginx_template_id = zapi.get_template_id(NGINX_TEMPLATE_NAME)
+        
+        if not linux_template_id:
+            raise Exception(f"Шаблон '{LINUX_TEMPLATE_NAME}' не найден")
+        print(f"  ✓ Найден шаблон '{LINUX_TEMPLATE_NAME}' (ID: {linux_template_id})")
+        
+        if nginx_template_id:
+            print(f"  ✓ Найден шаблон '{NGINX_TEMPLATE_NAME}' (ID: {nginx_template_id})")
+        else:
+            print(f"  ⚠ Шаблон '{NGINX_TEMPLATE_NAME}' не найден, будет пропущен")
+        
+        # Создать или получить группу хостов
+        print("\nНастройка группы хостов...")
+        group_name = HOST_GROUP_NAME
+        entry = journal.done('hostgroup', group_name, {})
+        group_id = entry['id'] if entry else zapi.get_host_group_id(group_name)
+        
+        if not group_id:
+            group_id = zapi.create_host_group(group_name)
+            print(f"  ✓ Создана группа хостов '{group_name}'")
+        else:
+            print(f"  ✓ Группа хостов '{group_name}' уже существует")
+        if not entry:
+            journal.record('hostgroup', group_name, group_id, {})
+        
+        # Шаблон проекта привязывается к хостам вместо шаблона Linux, который он включает
+        base_template_id = linux_template_id
+        if trigger_template:
+            base_template_id = configure_trigger_template(
+                zapi, linux_template_id, group_id, dict(TRIGGER_MACROS, **(trigger_macros or {})),
+                journal
+            )
+    
+    # Добавить хосты
+    print("\nДобавление хостов...")
+    with zapi.metrics.phase('hosts'):
+        pending = [h for h in hosts_config if not journal.done('host', h['hostname'], host_inputs(
+            h, group_id, host_template_ids(h, base_template_id, nginx_template_id)))]
+        if len(pending) < len(hosts_config):
+            print(f"  ✓ Уже настроено хостов (по журналу): {len(hosts_config) - len(pending)}")
+        
+        if pending and bulk:
+            configure_hosts_bulk(zapi, pending, group_id, base_template_id, nginx_template_id,
+                                 journal)
+        elif pending and concurrency > 1:
+            run_async(zapi, concurrency, configure_hosts_async,
+                      pending, group_id, base_template_id, nginx_template_id, journal)
+        elif pending:
+            configure_hosts(zapi, pending, group_id, base_template_id, nginx_template_id, journal)
+        
+        if trigger_template:
+            link_trigger_template(zapi, group_id, [h['hostname'] for h in hosts_config], journal)
+            configure_host_macros(zapi, hosts_config, journal)
+    
+    # Настроить веб-сценарий на одном из хостов
+    print("\nНастройка веб-сценария...")
+    with zapi.metrics.phase('web_scenario'):
+        scenario_name = WEB_SCENARIO_NAME
+        scenario_url = f'http://{alb_ip}/'
+        scenario_inputs = {'host': web_scenario_host, 'url': scenario_url}
+        
+        if journal.done('httptest', scenario_name, scenario_inputs):
+            print(f"  ✓ Веб-сценарий '{scenario_name}' уже создан (по журналу)")
+            web_scenario_host_id = None
+        else:
+            web_scenario_host_id = zapi.get_host_id(web_scenario_host)
+        
+        if web_scenario_host_id:
+            scenario_id = zapi.get_web_scenario(web_scenario_host_id, scenario_name)
+            
+            if scenario_id:
+                print(f"  ⚠ Веб-сценарий '{scenario_name}' уже существует")
+            else:
+                try:
+                    scenario_id = zapi.create_web_scenario(
+                        name=scenario_name,
+                        host_id=web_scenario_host_id,
+                        url=scenario_url
+                    )
+                    print(f"  ✓ Создан веб-сценарий '{scenario_name}' для проверки {scenario_url}")
+                except ZabbixAPIError as e:
+                    print(f"  ⚠ Не удалось создать веб-сценарий '{scenario_name}': {e}")
+                    journal.fail('httptest', scenario_name, e)
+            if scenario_id:
+                journal.record('httptest', scenario_name, scenario_id, scenario_inputs)
+    
+    # Настроить триггеры
+    with zapi.metrics.phase('triggers'):
+        configure_triggers(zapi, hosts_config, web_scenario_host, bulk=bulk,
+                           concurrency=concurrency, per_host=not trigger_template,
+                           journal=journal)
+    
+    # Создать дашборды
+    with zapi.metrics.phase('dashboards'):
+        configure_dashboards(zapi, hosts_config, bulk=bulk or prefetch, concurrency=concurrency,
+                             journal=journal)
+    
+    print("\nСоединения с Zabbix API:")
+    zapi.print_connection_stats()
+    zapi.print_cache_stats()
+    
+    print("\nОперации:")
+    journal.print_summary()
+    if journal.failures:
+        raise ZabbixAPIError(f"Не удалось выполнить операций: {len(journal.failures)}")
+    
+    print("\n✓ Настройка мониторинга завершена успешно!")
+
+
+def build_desired_state(hosts_config: List[Dict], alb_ip: str, trigger_template: bool = False,
+                        trigger_macros: Dict[str, str] = None) -> DesiredState:
+    """
+    Желаемое состояние мониторинга: хосты, веб-сценарий, триггеры и дашборды.
+    С trigger_template - как после configure_monitoring с тем же флагом: хостам
+    привязан шаблон проекта вместо Linux, триггеры CPU и диска и их пороги
+    (макросы шаблона и 'macros' хостов) задает шаблон.
+    """
+    web_scenario_host = hosts_config[0]['hostname']  # Используем первый хост
+    base_template = PROJECT_TEMPLATE_NAME if trigger_template else LINUX_TEMPLATE_NAME
+    
+    hosts = []
+    for host_config in hosts_config:
+        templates = [base_template]
+        if host_config.get('is_web_server', False):
+            templates.append(NGINX_TEMPLATE_NAME)
+        hosts.append({
+            'host': host_config['hostname'],
+            'name': host_config['visible_name'],
+            'ip': host_config['ip'],
+            'groups': [HOST_GROUP_NAME],
+            'templates': templates,
+            'macros': host_config.get('macros', {})
+        })
+    
+    template_macros = {}
+    if trigger_template:
+        template_macros[PROJECT_TEMPLATE_NAME] = dict(TRIGGER_MACROS, **(trigger_macros or {}))
+    
+    return DesiredState(
+        hosts=hosts,
+        web_scenarios=[{
+            'host': web_scenario_host,
+            'name': WEB_SCENARIO_NAME,
+            'url': f'http://{alb_ip}/'
+        }],
+        triggers=build_trigger_definitions(hosts_config, web_scenario_host,
+                                           per_host=not trigger_template),
+        dashboards=lambda host_ids, item_ids: build_dashboards(hosts_config, host_ids, item_ids),
+        dashboard_items=DASHBOARD_ITEM_KEYS,
+        template_macros=template_macros
+    )
+
+
+def reconcile_monitoring(zapi: ZabbixAPI, alb_ip: str, hosts_config: List[Dict],
+                         apply: bool = False, prune: bool = False,
+                         trigger_template: bool = False, trigger_macros: Dict[str, str] = None):
+    """
+    Сравнить конфигурацию с одним снимком сервера и вывести план изменений.
+    С apply план выполняется минимальным числом массивных запросов.
+    trigger_template и trigger_macros - как у configure_monitoring; сам шаблон
+    проекта с триггерами план не создает.
+    """
+    started = time.monotonic()
+    writes_before = zapi.metrics.write_calls()
+    desired = build_desired_state(hosts_config, alb_ip, trigger_template, trigger_macros)
+    with zapi.metrics.phase('snapshot'):
+        snapshot = Snapshot.load(zapi, desired, prune=prune)
+    if trigger_template and PROJECT_TEMPLATE_NAME not in snapshot.templates:
+        # Без шаблона хосты остались бы без триггеров и без шаблона Linux
+        raise ValueError(f"шаблон '{PROJECT_TEMPLATE_NAME}' не найден: создайте его "
+                         "запуском provision --trigger-template без --plan/--apply")
+    with zapi.metrics.phase('plan'):
+        plan = build_plan(desired, snapshot, prune=prune)
+    
+    print("\nПлан изменений:")
+    plan.print()
+    
+    if apply and plan:
+        print("\nПрименение плана...")
+        with zapi.metrics.phase('apply'):
+            apply_plan(zapi, plan, desired, snapshot)
+        for change in plan.changes:
+            if change.error:
+                print(f"  ⚠ {change}: {change.error}")
+            elif change.skipped:
+                print(f"  ⚠ {change}: пропущен, {change.skipped}")
+            else:
+                print(f"  ✓ {change}")
+    
+    elapsed = time.monotonic() - started
+    writes = zapi.metrics.write_calls() - writes_before
+    print(f"\nЗапросов на чтение: {snapshot.calls}, на запись: {writes}, время: {elapsed:.2f} с")
+    zapi.print_connection_stats()
+    
+    failed = [change for change in plan.changes if change.error]
+    if failed:
+        raise Exception(f"Не удалось применить изменений: {len(failed)}")
+
+
+def macro_assignment(text: str) -> Tuple[str, str]:
+    """Аргумент MACRO=VALUE -> (макрос, значение)"""
+    name, sep, value = text.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"ожидается MACRO=VALUE, получено {text!r}")
+    if not MACRO_NAME.match(name):
+        raise argparse.ArgumentTypeError(
+            f"{name!r} не макрос Zabbix: ожидается {{$NAME}}, например {{$CPU.UTIL.CRIT}}")
+    if not value:
+        raise argparse.ArgumentTypeError(f"не задано значение макроса {name}")
+    return name, value
+
+
+def host_macro_assignment(text: str) -> Tuple[str, str, str]:
+    """Аргумент HOST:MACRO=VALUE -> (хост, макрос, значение)"""
+    hostname, sep, assignment = text.partition(':')
+    if not sep or not hostname:
+        raise argparse.ArgumentTypeError(f"ожидается HOST:MACRO=VALUE, получено {text!r}")
+    return (hostname,) + macro_assignment(assignment)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--alb-ip',
+                       help='Публичный IP адрес ALB (по умолчанию: из outputs Terraform)')
+    add_hosts_arguments(parser)
+    parser.add_argument('--bulk', action='store_true',
+                       help='Пакетный режим: хосты, шаблоны и триггеры отправляются массивами')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                       help=f'Объектов в одном пакетном запросе (по умолчанию: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--concurrency', type=int, default=1,
+                       help='Число параллельных запросов в пофазовой обработке хостов '
+                            '(по умолчанию: 1 - последовательно)')
+    parser.add_argument('--id-cache', metavar='PATH',
+                       help='Файл SQLite для кэша ID шаблонов, групп и хостов между запусками '
+                            '(можно включить для всех скриптов переменной ZBX_ID_CACHE)')
+    parser.add_argument('--journal', metavar='PATH', default=DEFAULT_JOURNAL_PATH,
+                       help='Журнал выполненных операций, дописывается при каждом запуске '
+                            f'(по умолчанию: {DEFAULT_JOURNAL_PATH})')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--resume', action='store_true',
+                     help='Пропустить операции, которые журнал отмечает выполненными с теми же '
+                          'входными данными, и выполнить только остальные')
+    mode.add_argument('--plan', action='store_true',
+                     help='Сравнить конфигурацию с сервером и вывести план изменений, ничего не меняя')
+    mode.add_argument('--apply', action='store_true',
+                     help='Построить план и применить только необходимые изменения')
+    mode.add_argument('--verify', action='store_true',
+                     help='Только сверить адреса agent интерфейсов с источником хостов '
+                          'и исправить расхождения пакетным запросом')
+    parser.add_argument('--prune', action='store_true',
+                       help='С --plan/--apply: удалять хосты группы и собственные триггеры хостов, '
+                            'которых нет в конфигурации')
+    parser.add_argument('--prefetch', action='store_true',
+                       help='Загрузить хосты, шаблоны, группы, триггеры, веб-сценарии и дашборды '
+                            'в начале запуска и искать их ID без запросов к API')
+    parser.add_argument('--trigger-template', action='store_true',
+                       help=f"Триггеры CPU и диска через шаблон '{PROJECT_TEMPLATE_NAME}' "
+                            'с макросами порогов вместо триггеров на каждом хосте')
+    parser.add_argument('--trigger-macro', action='append', default=[], metavar='MACRO=VALUE',
+                       type=macro_assignment,
+                       help='С --trigger-template: порог в шаблоне проекта, например '
+                            '{$CPU.UTIL.CRIT}=90 (можно указать несколько раз)')
+    parser.add_argument('--host-macro', action='append', default=[], metavar='HOST:MACRO=VALUE',
+                       type=host_macro_assignment,
+                       help='С --trigger-template: переопределение порога для хоста, например '
+                            'web1.ru-central1.internal:{$VFS.PFREE.MIN}=10')
+
+
+def run(args: argparse.Namespace, context):
+    """Настройка или план/применение изменений по аргументам командной строки"""
+    trigger_macros = dict(args.trigger_macro)
+    if (args.trigger_macro or args.host_macro) and not args.trigger_template:
+        # Макросы порогов используют только триггеры шаблона проекта
+        raise ValueError("--trigger-macro и --host-macro задают пороги шаблона проекта "
+                         "и работают только с --trigger-template")
+    
+    hosts_config, outputs = load_hosts_config(args)
+    alb_ip = args.alb_ip
+    if not alb_ip and outputs:
+        alb_ip = outputs.get('alb_public_ip', {}).get('value')
+    if not alb_ip and not args.verify:
+        raise ValueError("не задан --alb-ip, и в outputs Terraform нет адреса ALB")
+    
+    by_name = {host_config['hostname']: host_config for host_config in hosts_config}
+    unknown = sorted({hostname for hostname, _, _ in args.host_macro if hostname not in by_name})
+    if unknown:
+        raise ValueError(f"--host-macro для хостов, которых нет в источнике хостов: "
+                         f"{', '.join(unknown)}")
+    for hostname, name, value in args.host_macro:
+        by_name[hostname].setdefault('macros', {})[name] = value
+    
+    print(f"Подключение к Zabbix API: {args.zabbix_url}")
+    # Каждому параллельному запросу нужно свое соединение в пуле
+    zapi = context.client(min_pool_size=args.concurrency, chunk_size=args.chunk_size,
+                          id_cache=IDCache(args.id_cache) if args.id_cache else None)
+    print("✓ Успешная аутентификация")
+    
+    if args.verify:
+        remaining = verify(zapi, hosts_config)
+        zapi.print_connection_stats()
+        if remaining:
+            raise Exception(f"Не удалось исправить интерфейсов: {remaining}")
+        return
+    
+    if args.plan or args.apply:
+        reconcile_monitoring(zapi, alb_ip, hosts_config, apply=args.apply, prune=args.prune,
+                             trigger_template=args.trigger_template,
+                             trigger_macros=trigger_macros)
+        return
+    
+    journal = Journal(args.journal, server=zapi.url, resume=args.resume)
+    success = False
+    try:
+        configure_monitoring(
+            zapi,
+            alb_ip=alb_ip,
+            hosts_config=hosts_config,
+            bulk=args.bulk,
+            concurrency=args.concurrency,
+            prefetch=args.prefetch,
+            trigger_template=args.trigger_template,
+            trigger_macros=trigger_macros,
+            journal=journal
+        )
+        success = True
+    finally:
+        journal.close(success)
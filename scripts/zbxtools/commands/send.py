@@ -0,0 +1,105 @@
+"""
+Подкоманда zbxctl send: отправка значений в траппер Zabbix
+Значения берутся из --host/--key/--value или из файла в формате
+zabbix_sender -i: строка "хост ключ значение". Адрес траппера по
+умолчанию - хост из --zabbix-url, порт 10051.
+
+    zbxctl send --host web1 --key nginx.log.5xx --value 3
+    ./count_5xx.sh | zbxctl send --input - --create-items --compress
+"""
+
+import argparse
+import shlex
+import sys
+from typing import Dict, Iterable, Iterator, List
+from urllib.parse import urlparse
+
+from ..sender import (DEFAULT_BATCH_SIZE, DEFAULT_SENDER_PORT, SenderError, ZabbixSender,
+                      sender_value)
+
+# --value-type -> value_type элемента данных (см. VALUE_TYPE_* в api)
+VALUE_TYPES = {'float': 0, 'unsigned': 3, 'text': 4}
+
+
+def read_values(lines: Iterable[str]) -> Iterator[Dict]:
+    """Строки "хост ключ значение"; пустые строки и комментарии пропускаются"""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        fields = shlex.split(line)
+        if len(fields) != 3:
+            raise ValueError(f"строка {number}: ожидается 'хост ключ значение': {line!r}")
+        yield sender_value(*fields)
+
+
+def create_items(context, values: List[Dict], value_type: int):
+    """Создать недостающие траппер элементы для всех пар (хост, ключ) из values"""
+    zapi = context.client()
+    host_ids = zapi.get_host_ids(sorted({value['host'] for value in values}))
+    missing_hosts = sorted({value['host'] for value in values} - set(host_ids))
+    for host in missing_hosts:
+        print(f"⚠ Хост {host} не найден в Zabbix")
+
+    pairs = sorted({(value['host'], value['key']) for value in values if value['host'] in host_ids})
+    result = zapi.ensure_trapper_items([zapi.trapper_item_params(host_ids[host], key,
+                                                                 value_type=value_type)
+                                        for host, key in pairs])
+    if result.items:
+        print(f"✓ Создано траппер элементов: {len(result.succeeded())}")
+    for item, error in result.failed():
+        print(f"⚠ {item['key_']} (хост {item['hostid']}): {error}")
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input', metavar='FILE',
+                        help="Файл со строками 'хост ключ значение' ('-' - stdin)")
+    source.add_argument('--host', help='Хост для одного значения (вместе с --key и --value)')
+    parser.add_argument('--key', help='Ключ траппер элемента')
+    parser.add_argument('--value', help='Значение')
+    parser.add_argument('--server',
+                        help='Адрес траппера Zabbix (по умолчанию: хост из --zabbix-url)')
+    parser.add_argument('--port', type=int, default=DEFAULT_SENDER_PORT,
+                        help=f'Порт траппера (по умолчанию: {DEFAULT_SENDER_PORT})')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Значений в одном пакете (по умолчанию: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--compress', action='store_true',
+                        help='Сжимать пакеты zlib (Zabbix 4.0+)')
+    parser.add_argument('--create-items', action='store_true',
+                        help='Создать недостающие траппер элементы через API перед отправкой')
+    parser.add_argument('--value-type', choices=sorted(VALUE_TYPES), default='unsigned',
+                        help='Тип значений создаваемых элементов (по умолчанию: unsigned)')
+
+
+def run(args: argparse.Namespace, context):
+    if args.host:
+        if args.key is None or args.value is None:
+            raise ValueError("с --host нужны --key и --value")
+        values = [sender_value(args.host, args.key, args.value)]
+    elif args.input == '-':
+        values = list(read_values(sys.stdin))
+    else:
+        with open(args.input, encoding='utf-8') as f:
+            values = list(read_values(f))
+
+    if not values:
+        print("⚠ Нет значений для отправки")
+        return
+
+    if args.create_items:
+        create_items(context, values, VALUE_TYPES[args.value_type])
+
+    server = args.server or urlparse(args.zabbix_url).hostname
+    sender = ZabbixSender(server, args.port, batch_size=args.batch_size, compress=args.compress)
+    try:
+        result = sender.send(values)
+    except SenderError as e:
+        raise SystemExit(f"✗ Траппер недоступен: {e}")
+
+    print(f"✓ {server}:{args.port}: {result} ({result.bytes_sent} байт)")
+    if result.failed:
+        # Сервер не говорит, какие именно значения отклонены
+        print(f"⚠ Отклонено значений: {result.failed} - нет траппер элемента с таким ключом "
+              "на хосте или значение не подходит по типу")
+        raise SystemExit(1)
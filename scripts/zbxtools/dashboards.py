@@ -0,0 +1,76 @@
+"""
+Сравнение дашбордов Zabbix по содержимому
+Виджеты приводятся к каноничному виду (без ID, значения строками, поля
+и виджеты в стабильном порядке), от которого берется хеш. Дашборд
+обновляется на месте только если хеш отрисованных виджетов отличается
+от хеша виджетов на сервере, поэтому ID и URL дашборда не меняются.
+"""
+
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+
+# Параметры dashboard.get, с которыми возвращаются виджеты для сравнения
+DASHBOARD_OUTPUT = {
+    'output': ['dashboardid', 'name'],
+    'selectPages': ['dashboard_pageid', 'widgets']
+}
+
+
+def canonical_widget(widget: Dict) -> Dict:
+    """Виджет без ID и значений по умолчанию, в том виде, в каком его хранит сервер"""
+    fields = sorted((str(f['type']), f['name'], str(f['value'])) for f in widget.get('fields', []))
+    return {
+        'type': widget['type'],
+        'name': widget.get('name', ''),
+        'x': str(widget.get('x', 0)),
+        'y': str(widget.get('y', 0)),
+        'width': str(widget.get('width', 1)),
+        'height': str(widget.get('height', 2)),
+        'view_mode': str(widget.get('view_mode', 0)),
+        'fields': [list(field) for field in fields]
+    }
+
+
+def widgets_hash(widgets: List[Dict]) -> str:
+    """Хеш набора виджетов, не зависящий от их порядка и ID"""
+    canonical = sorted((canonical_widget(w) for w in widgets),
+                       key=lambda w: (int(w['y']), int(w['x']), w['type'], w['name']))
+    data = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def live_widgets(dashboard: Dict) -> List[Dict]:
+    """Виджеты первой страницы дашборда из dashboard.get с selectPages"""
+    pages = dashboard.get('pages') or [{}]
+    return pages[0].get('widgets', [])
+
+
+def is_current(dashboard: Dict, widgets: List[Dict]) -> bool:
+    return widgets_hash(live_widgets(dashboard)) == widgets_hash(widgets)
+
+
+def update_params(dashboard: Dict, widgets: List[Dict]) -> Dict:
+    """
+    Параметры dashboard.update для замены виджетов первой страницы.
+    ID страницы и виджетов с тем же типом и именем сохраняются, остальные
+    страницы передаются только по ID, чтобы сервер их не удалил.
+    """
+    pages = dashboard.get('pages') or [{}]
+    existing = {(w['type'], w.get('name', '')): w['widgetid']
+                for w in pages[0].get('widgets', []) if 'widgetid' in w}
+
+    page_widgets = []
+    for widget in widgets:
+        widget = dict(widget)
+        widgetid: Optional[str] = existing.pop((widget['type'], widget.get('name', '')), None)
+        if widgetid:
+            widget['widgetid'] = widgetid
+        page_widgets.append(widget)
+
+    page = {'widgets': page_widgets}
+    if pages[0].get('dashboard_pageid'):
+        page['dashboard_pageid'] = pages[0]['dashboard_pageid']
+    others = [{'dashboard_pageid': p['dashboard_pageid']} for p in pages[1:]]
+    return {'dashboardid': dashboard['dashboardid'], 'pages': [page] + others}
@@ -0,0 +1,226 @@
+"""
+Метрики Elasticsearch и Kibana для Zabbix
+Elasticsearch опрашивается через _nodes/stats, _cluster/health и
+_cat/indices, Kibana - через /api/status. Из ответов извлекаются значения
+по ключам траппер элементов (ES_ITEMS, KIBANA_ITEMS), которые затем уходят
+в Zabbix одним пакетом sender. Счетчики (время GC, число индексаций и
+поисковых запросов) отправляются как есть: в скорость за секунду их
+переводит предобработка элемента, поэтому сборщику не нужно хранить
+прошлые значения между запусками.
+"""
+
+from typing import Dict, List, Optional
+
+from .api import (VALUE_TYPE_FLOAT, VALUE_TYPE_UNSIGNED, BulkResult, ZabbixAPI,
+                  ZabbixAPIError)
+from .transport import HTTPTransport
+
+ES_HOST = 'elastic.ru-central1.internal'
+KIBANA_HOST = 'kibana.ru-central1.internal'
+
+# Шаг предобработки "Изменение в секунду"
+CHANGE_PER_SECOND = [{'type': 10, 'params': '', 'error_handler': 0, 'error_handler_params': ''}]
+
+# Состояние кластера и Kibana числом: 0 - норма, 1 - деградация, 2 - недоступен
+CLUSTER_STATUS = {'green': 0, 'yellow': 1, 'red': 2}
+KIBANA_STATUS = {'available': 0, 'green': 0, 'degraded': 1, 'yellow': 1,
+                 'unavailable': 2, 'critical': 2, 'red': 2}
+
+
+def item(key: str, name: str, value_type: int = VALUE_TYPE_UNSIGNED, units: str = '',
+         rate: bool = False) -> Dict:
+    return {'key': key, 'name': name, 'value_type': value_type, 'units': units, 'rate': rate}
+
+
+ES_ITEMS = [
+    item('es.cluster.status', 'ES: состояние кластера (0 green, 1 yellow, 2 red)'),
+    item('es.cluster.nodes', 'ES: узлов в кластере'),
+    item('es.cluster.unassigned_shards', 'ES: неназначенных шардов'),
+    item('es.jvm.heap.pused', 'ES: занято heap', VALUE_TYPE_FLOAT, '%'),
+    item('es.jvm.heap.used', 'ES: занято heap, байт', units='B'),
+    item('es.jvm.gc.time', 'ES: время GC в секунду', VALUE_TYPE_FLOAT, 'ms', rate=True),
+    item('es.jvm.gc.old.count', 'ES: old GC в секунду', VALUE_TYPE_FLOAT, 'gc/s', rate=True),
+    item('es.indexing.rate', 'ES: индексаций в секунду', VALUE_TYPE_FLOAT, 'docs/s', rate=True),
+    item('es.indexing.time', 'ES: время индексации в секунду', VALUE_TYPE_FLOAT, 'ms', rate=True),
+    item('es.search.rate', 'ES: поисковых запросов в секунду', VALUE_TYPE_FLOAT, 'q/s', rate=True),
+    item('es.search.time', 'ES: время поиска в секунду', VALUE_TYPE_FLOAT, 'ms', rate=True),
+    item('es.thread_pool.write.queue', 'ES: очередь пула write'),
+    item('es.thread_pool.write.rejected', 'ES: отклонено записей в секунду', VALUE_TYPE_FLOAT,
+         'req/s', rate=True),
+    item('es.indices.count', 'ES: индексов'),
+    item('es.indices.unhealthy', 'ES: индексов не в состоянии green'),
+    item('es.indices.docs', 'ES: документов'),
+    item('es.indices.store', 'ES: размер индексов', units='B'),
+]
+
+KIBANA_ITEMS = [
+    item('kibana.status', 'Kibana: состояние (0 available, 1 degraded, 2 unavailable)'),
+    item('kibana.response_time.avg', 'Kibana: среднее время ответа', VALUE_TYPE_FLOAT, 'ms'),
+    item('kibana.response_time.max', 'Kibana: максимальное время ответа', VALUE_TYPE_FLOAT, 'ms'),
+    item('kibana.event_loop.delay', 'Kibana: задержка event loop', VALUE_TYPE_FLOAT, 'ms'),
+    item('kibana.heap.used', 'Kibana: занято heap', units='B'),
+    item('kibana.requests', 'Kibana: запросов за интервал сбора'),
+    item('kibana.connections', 'Kibana: открытых соединений'),
+]
+
+# {host} подставляется при создании; nodata срабатывает, если сборщик не работает
+ES_TRIGGERS = [
+    {'description': 'Elasticsearch cluster is red on {host}',
+     'expression': 'last(/{host}/es.cluster.status)=2', 'priority': 4,
+     'comments': 'Часть первичных шардов не назначена: логи не индексируются'},
+    {'description': 'Elasticsearch heap usage is high on {host}',
+     'expression': 'min(/{host}/es.jvm.heap.pused,5m)>85', 'priority': 3,
+     'comments': 'Heap занят больше чем на 85% в течение 5 минут'},
+    {'description': 'Elasticsearch spends too much time in GC on {host}',
+     'expression': 'avg(/{host}/es.jvm.gc.time,5m)>200', 'priority': 3,
+     'comments': 'Сборка мусора занимает больше 20% времени в течение 5 минут'},
+    {'description': 'Elasticsearch rejects indexing requests on {host}',
+     'expression': 'last(/{host}/es.thread_pool.write.rejected)>0', 'priority': 3,
+     'comments': 'Пул write переполнен: конвейер логов не успевает'},
+    {'description': 'No Elasticsearch metrics from {host}',
+     'expression': 'nodata(/{host}/es.jvm.heap.pused,10m)=1', 'priority': 2,
+     'comments': 'Сборщик zbxctl es-bridge не присылает данные 10 минут'},
+]
+
+KIBANA_TRIGGERS = [
+    {'description': 'Kibana is not available on {host}',
+     'expression': 'last(/{host}/kibana.status)>0', 'priority': 3,
+     'comments': 'Общее состояние Kibana в /api/status не available'},
+    {'description': 'Kibana event loop is delayed on {host}',
+     'expression': 'min(/{host}/kibana.event_loop.delay,5m)>500', 'priority': 2,
+     'comments': 'Задержка event loop больше 500 мс в течение 5 минут'},
+    {'description': 'Kibana responds slowly on {host}',
+     'expression': 'avg(/{host}/kibana.response_time.avg,5m)>2000', 'priority': 2,
+     'comments': 'Среднее время ответа больше 2 с в течение 5 минут'},
+    {'description': 'No Kibana metrics from {host}',
+     'expression': 'nodata(/{host}/kibana.status,10m)=1', 'priority': 2,
+     'comments': 'Сборщик zbxctl es-bridge не присылает данные 10 минут'},
+]
+
+
+def es_values(nodes_stats: Dict, health: Dict, indices: List[Dict]) -> Dict[str, object]:
+    """Значения ES_ITEMS: счетчики суммируются по узлам, занятость heap - максимум"""
+    nodes = list(nodes_stats.get('nodes', {}).values())
+    heap_pused = max((n['jvm']['mem']['heap_used_percent'] for n in nodes), default=0)
+
+    def total(*path: str) -> int:
+        result = 0
+        for node in nodes:
+            value = node
+            for name in path:
+                value = value.get(name, {})
+            result += value if isinstance(value, (int, float)) else 0
+        return result
+
+    gc_time = sum(collector.get('collection_time_in_millis', 0)
+                  for node in nodes
+                  for collector in node['jvm']['gc']['collectors'].values())
+
+    return {
+        'es.cluster.status': CLUSTER_STATUS.get(health.get('status'), 2),
+        'es.cluster.nodes': health.get('number_of_nodes', 0),
+        'es.cluster.unassigned_shards': health.get('unassigned_shards', 0),
+        'es.jvm.heap.pused': heap_pused,
+        'es.jvm.heap.used': total('jvm', 'mem', 'heap_used_in_bytes'),
+        'es.jvm.gc.time': gc_time,
+        'es.jvm.gc.old.count': total('jvm', 'gc', 'collectors', 'old', 'collection_count'),
+        'es.indexing.rate': total('indices', 'indexing', 'index_total'),
+        'es.indexing.time': total('indices', 'indexing', 'index_time_in_millis'),
+        'es.search.rate': total('indices', 'search', 'query_total'),
+        'es.search.time': total('indices', 'search', 'query_time_in_millis'),
+        'es.thread_pool.write.queue': total('thread_pool', 'write', 'queue'),
+        'es.thread_pool.write.rejected': total('thread_pool', 'write', 'rejected'),
+        'es.indices.count': len(indices),
+        'es.indices.unhealthy': sum(1 for index in indices if index.get('health') != 'green'),
+        'es.indices.docs': sum(int(index.get('docs.count') or 0) for index in indices),
+        'es.indices.store': sum(int(index.get('store.size') or 0) for index in indices),
+    }
+
+
+def kibana_values(status: Dict) -> Dict[str, object]:
+    """
+    Значения KIBANA_ITEMS из /api/status (формат Kibana 8: status.overall.level;
+    у Kibana 7 - status.overall.state)
+    """
+    overall = status.get('status', {}).get('overall', {})
+    metrics = status.get('metrics', {})
+    process = metrics.get('process', {})
+    response_times = metrics.get('response_times', {})
+    return {
+        'kibana.status': KIBANA_STATUS.get(overall.get('level') or overall.get('state'), 2),
+        'kibana.response_time.avg': response_times.get('avg_in_millis', 0),
+        'kibana.response_time.max': response_times.get('max_in_millis', 0),
+        'kibana.event_loop.delay': process.get('event_loop_delay', 0),
+        'kibana.heap.used': process.get('memory', {}).get('heap', {}).get('used_in_bytes', 0),
+        'kibana.requests': metrics.get('requests', {}).get('total', 0),
+        'kibana.connections': metrics.get('concurrent_connections', 0),
+    }
+
+
+def collect_elasticsearch(transport: HTTPTransport, url: str) -> Dict[str, object]:
+    url = url.rstrip('/')
+
+    def fetch(path: str, **params):
+        response = transport.get(f"{url}/{path}", params=params)
+        response.raise_for_status()
+        return response.json()
+
+    return es_values(fetch('_nodes/stats/jvm,indices,thread_pool'),
+                     fetch('_cluster/health'),
+                     fetch('_cat/indices', format='json', bytes='b',
+                           h='index,health,docs.count,store.size'))
+
+
+def collect_kibana(transport: HTTPTransport, url: str) -> Dict[str, object]:
+    response = transport.get(f"{url.rstrip('/')}/api/status")
+    # 503 Kibana отдает вместе с телом статуса, когда она недоступна
+    if response.status_code not in (200, 503):
+        response.raise_for_status()
+    return kibana_values(response.json())
+
+
+def item_params(host_id: str, definition: Dict) -> Dict:
+    params = ZabbixAPI.trapper_item_params(host_id, definition['key'], definition['name'],
+                                           definition['value_type'], definition['units'])
+    if definition['rate']:
+        params['preprocessing'] = CHANGE_PER_SECOND
+    return params
+
+
+def ensure_bridge(zapi: ZabbixAPI, hosts: Dict[str, List[Dict]],
+                  triggers: Dict[str, List[Dict]]) -> Dict[str, BulkResult]:
+    """
+    Создать траппер элементы и триггеры для хостов: имя хоста -> описания
+    элементов (ES_ITEMS, KIBANA_ITEMS) и триггеров. Поиск существующих -
+    один item.get и один trigger.get на все хосты, создание - массивами.
+    """
+    host_ids = zapi.get_host_ids(list(hosts))
+    missing = sorted(set(hosts) - set(host_ids))
+    if missing:
+        raise ZabbixAPIError(f"Хосты не найдены в Zabbix: {', '.join(missing)}")
+
+    results = {'item.create': zapi.ensure_trapper_items([
+        item_params(host_ids[host], definition)
+        for host, definitions in hosts.items() for definition in definitions
+    ])}
+
+    wanted = [(host_ids[host], dict(trigger, description=trigger['description'].format(host=host),
+                                    expression=trigger['expression'].format(host=host)))
+              for host, definitions in triggers.items() for trigger in definitions]
+    existing = zapi.get_trigger_keys(list(host_ids.values()),
+                                     [trigger['description'] for _, trigger in wanted])
+    results['trigger.create'] = zapi.bulk_call('trigger.create', [
+        zapi.trigger_params(t['description'], t['expression'], t['priority'], t['comments'])
+        for host_id, t in wanted if (host_id, t['description']) not in existing
+    ])
+    return results
+
+
+def bridge_config(es_host: Optional[str], kibana_host: Optional[str]):
+    """Элементы и триггеры для хостов ES и Kibana; None - источник не опрашивается"""
+    hosts, triggers = {}, {}
+    if es_host:
+        hosts[es_host], triggers[es_host] = ES_ITEMS, ES_TRIGGERS
+    if kibana_host:
+        hosts[kibana_host], triggers[kibana_host] = KIBANA_ITEMS, KIBANA_TRIGGERS
+    return hosts, triggers
@@ -0,0 +1,100 @@
+"""
+Локальная замена Zabbix агента для проверки probe и zbxctl agents
+Слушает TCP порт на 127.0.0.1 и отвечает на пассивные проверки по
+протоколу Zabbix: agent.ping -> 1, остальные ключи -> ZBX_NOTSUPPORTED.
+Режим reject имитирует агента, в параметре Server которого нет нашего
+адреса (соединение закрывается без ответа), а silent - зависшего агента,
+который принимает соединение, но не отвечает. Режимы garbage и corrupt
+отвечают не пакетом ZBXD и сжатым пакетом с испорченными данными.
+"""
+
+import socketserver
+import struct
+import threading
+import time
+from typing import Optional
+
+from . import protocol
+
+
+MODES = ('ok', 'reject', 'silent', 'garbage', 'corrupt')
+
+
+class FakeAgent:
+    """
+    with FakeAgent(latency=0.01) as agent:
+        probe_agents([('web1', '127.0.0.1', agent.port)])
+    """
+
+    def __init__(self, latency: float = 0.0, mode: str = 'ok'):
+        if mode not in MODES:
+            raise ValueError(f"mode должен быть одним из {MODES}")
+        self.latency = latency
+        self.mode = mode
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        # Очередь соединений для одновременного обхода сотен "хостов"
+        self._server.socket.listen(1024)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> 'FakeAgent':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeAgent':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler_class(self):
+        agent = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                with agent._lock:
+                    agent.connections += 1
+                if agent.mode == 'reject':
+                    return
+                key = self._read_key()
+                if agent.mode == 'silent':
+                    # Ждем, пока клиент не закроет соединение по своему таймауту
+                    try:
+                        while self.request.recv(4096):
+                            pass
+                    except OSError:
+                        pass
+                    return
+                if agent.latency:
+                    time.sleep(agent.latency)
+                if agent.mode == 'garbage':
+                    self.request.sendall(b'HTTP/1.1 400 Bad Request\r\n\r\n')
+                    return
+                if agent.mode == 'corrupt':
+                    packet = protocol.encode(b'1' * 64, compress=True)
+                    # Заголовок и длины верные, данные zlib испорчены
+                    header = protocol.PREFIX_SIZE + 8
+                    self.request.sendall(packet[:header] + bytes(len(packet) - header))
+                    return
+                value = '1' if key == 'agent.ping' else 'ZBX_NOTSUPPORTED\0Unsupported item key.'
+                self.request.sendall(protocol.encode(value.encode()))
+
+            def _read_key(self) -> str:
+                try:
+                    data = protocol.recv_packet(self.request)
+                except (protocol.ProtocolError, struct.error, OSError):
+                    return ''
+                return data.decode(errors='replace').strip()
+
+        return Handler
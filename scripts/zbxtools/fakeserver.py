@@ -0,0 +1,752 @@
+"""
+Локальная замена Zabbix JSON-RPC API для нагрузочных тестов и бенчмарков
+Сервер работает в том же процессе, хранит объекты в памяти и реализует
+методы, которыми пользуются скрипты проекта: user.login, user.logout и
+user.checkAuthentication (а также API токены в auth или в заголовке
+Bearer), get/create/update/delete для host, hostgroup, template, item,
+trigger, httptest, dashboard, а также host.massupdate, template.massadd,
+hostinterface и usermacro. Для проверки наблюдения есть event.get и
+problem.get: события создают raise_problem и resolve_problem хранилища,
+а доступность агентов меняет set_available. Триггеры, которые создает
+низкоуровневое обнаружение (flags=4), добавляет discover_trigger; удалить
+их через API, как и на настоящем сервере, нельзя.
+Задержка каждого вызова задается latency и jitter, сервер считает вызовы
+по методам и байты запросов и ответов с HTTP-заголовками. Для проверки
+повторов и дублирующих запросов доля вызовов может отвечать 503 (error_rate)
+или зависать на stall секунд (stall_rate).
+"""
+
+import gzip
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Union
+
+
+# Таблицы объектов: поле ID и поле с именем объекта
+TABLES = {
+    'host': ('hostid', 'host'),
+    'template': ('templateid', 'host'),
+    'hostgroup': ('groupid', 'name'),
+    'hostinterface': ('interfaceid', 'ip'),
+    'item': ('itemid', 'key_'),
+    'trigger': ('triggerid', 'description'),
+    'triggerprototype': ('triggerid', 'description'),
+    'httptest': ('httptestid', 'name'),
+    'dashboard': ('dashboardid', 'name'),
+    'usermacro': ('hostmacroid', 'macro'),
+    'event': ('eventid', 'name'),
+    'problem': ('eventid', 'name'),
+}
+
+# Таблицы с уникальными именами и таблицы объектов, принадлежащих хосту или шаблону
+NAMED_KINDS = ('host', 'template', 'hostgroup', 'dashboard')
+OWNED_KINDS = ('hostinterface', 'item', 'trigger', 'triggerprototype', 'httptest', 'usermacro')
+
+# Поля, которые возвращаются только через select*, а не в output
+NESTED_FIELDS = ('groups', 'templates', 'interfaces', 'macros', 'steps', 'pages', 'hosts')
+
+# Шаблоны и их элементы данных, которые есть на сервере сразу после установки
+DEFAULT_TEMPLATES = {
+    'Linux by Zabbix agent': [
+        'agent.ping', 'system.cpu.util', 'system.cpu.util[,user]', 'system.cpu.util[,idle]',
+        'system.cpu.load[all,avg1]', 'vm.memory.size[pavailable]', 'vfs.fs.size[/,pused]',
+        'net.if.in["eth0"]', 'net.if.out["eth0"]'
+    ],
+    'Nginx by Zabbix agent': ['nginx.connections.active', 'nginx.requests.total.rate'],
+}
+DEFAULT_GROUPS = ('Templates', 'Linux servers')
+
+# Имена хостов и шаблонов в выражении триггера: avg(/host/key,5m) и avg(//host/key,5m)
+EXPRESSION_HOST = re.compile(r'\(/+([^/()]+)/')
+
+# Ответы меньше этого размера не сжимаются (как gzip_min_length у nginx)
+GZIP_MIN_LENGTH = 1024
+
+
+class FakeAPIError(Exception):
+    def __init__(self, data: str, code: int = -32602, message: str = 'Invalid params.'):
+        super().__init__(data)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class FakeZabbixStore:
+    """Объекты сервера в памяти и реализация методов API"""
+
+    def __init__(self, templates: Dict[str, List[str]] = None):
+        self.lock = threading.RLock()
+        self.ids = itertools.count(10001)
+        self.tables: Dict[str, Dict[str, Dict]] = {kind: {} for kind in TABLES}
+        # Индексы, чтобы поиск по имени и по хосту не перебирал всю таблицу
+        self.by_name: Dict[str, Dict[str, str]] = {kind: {} for kind in NAMED_KINDS}
+        self.by_owner: Dict[str, Dict[str, set]] = {kind: {} for kind in OWNED_KINDS}
+        self.tokens = set()
+        # API токены (Администрирование -> API токены) и версия, которую отдает apiinfo.version
+        self.api_tokens = set()
+        self.version = '6.0.0'
+
+        for name in DEFAULT_GROUPS:
+            self._insert('hostgroup', {'name': name})
+        templates_group = self._find('hostgroup', 'name', 'Templates')
+        for name, keys in (templates or DEFAULT_TEMPLATES).items():
+            template = self._insert('template', {
+                'host': name, 'name': name, 'groups': [templates_group['groupid']],
+                'templates': []
+            })
+            for key in keys:
+                self._insert('item', {'hostid': template['templateid'], 'key_': key,
+                                      'name': key, 'templateid': '0'})
+
+    # --- Вспомогательные операции над таблицами
+
+    @staticmethod
+    def _owners(kind: str, obj: Dict) -> List[str]:
+        return obj['hosts'] if kind in ('trigger', 'triggerprototype') else [obj['hostid']]
+
+    def _index(self, kind: str, obj: Dict):
+        object_id = obj[TABLES[kind][0]]
+        if kind in NAMED_KINDS:
+            self.by_name[kind][obj[TABLES[kind][1]]] = object_id
+        if kind in OWNED_KINDS:
+            for owner_id in self._owners(kind, obj):
+                self.by_owner[kind].setdefault(owner_id, set()).add(object_id)
+
+    def _unindex(self, kind: str, obj: Dict):
+        object_id = obj[TABLES[kind][0]]
+        if kind in NAMED_KINDS:
+            self.by_name[kind].pop(obj[TABLES[kind][1]], None)
+        if kind in OWNED_KINDS:
+            for owner_id in self._owners(kind, obj):
+                self.by_owner[kind].get(owner_id, set()).discard(object_id)
+
+    def _insert(self, kind: str, obj: Dict) -> Dict:
+        id_field = TABLES[kind][0]
+        obj = dict(obj)
+        obj[id_field] = str(next(self.ids))
+        self.tables[kind][obj[id_field]] = obj
+        self._index(kind, obj)
+        return obj
+
+    def _remove(self, kind: str, object_id: str):
+        obj = self.tables[kind].pop(object_id, None)
+        if obj:
+            self._unindex(kind, obj)
+
+    def _find(self, kind: str, field: str, value: str) -> Optional[Dict]:
+        if kind in NAMED_KINDS and field == TABLES[kind][1]:
+            object_id = self.by_name[kind].get(value)
+            return self.tables[kind][object_id] if object_id else None
+        return next((o for o in self.tables[kind].values() if o.get(field) == value), None)
+
+    def _owned(self, kind: str, owner_id: str) -> List[Dict]:
+        return [self.tables[kind][i] for i in self.by_owner[kind].get(owner_id, ())]
+
+    def _owner(self, owner_id: str) -> Optional[Dict]:
+        return self.tables['host'].get(owner_id) or self.tables['template'].get(owner_id)
+
+    def _get_object(self, kind: str, object_id: str) -> Dict:
+        obj = self.tables[kind].get(str(object_id))
+        if obj is None:
+            raise FakeAPIError('No permissions to referred object or it does not exist!')
+        return obj
+
+    def _template_closure(self, template_ids: Iterable[str]) -> List[str]:
+        """Шаблоны вместе со всеми шаблонами, которые в них вложены"""
+        result, stack = [], list(template_ids)
+        while stack:
+            template_id = stack.pop()
+            if template_id in result or template_id not in self.tables['template']:
+                continue
+            result.append(template_id)
+            stack.extend(self.tables['template'][template_id].get('templates', []))
+        return result
+
+    def _link(self, owner_id: str, template_ids: Iterable[str]):
+        """Унаследовать элементы данных привязанных шаблонов (и вложенных в них)"""
+        keys = {i['key_'] for i in self._owned('item', owner_id)}
+        for template_id in self._template_closure(template_ids):
+            for item in self._owned('item', template_id):
+                if item['key_'] not in keys:
+                    keys.add(item['key_'])
+                    self._insert('item', dict(item, hostid=owner_id, templateid=item['itemid']))
+
+    def _trigger_hosts(self, expression: str) -> List[str]:
+        hosts = []
+        for name in EXPRESSION_HOST.findall(expression):
+            owner = self._find('host', 'host', name) or self._find('template', 'host', name)
+            if owner is None:
+                raise FakeAPIError(f'Incorrect trigger expression. Host "{name}" does not exist.')
+            owner_id = owner.get('hostid') or owner.get('templateid')
+            if owner_id not in hosts:
+                hosts.append(owner_id)
+        return hosts
+
+    # --- Чтение
+
+    def _related(self, kind: str, obj: Dict, field: str) -> List[str]:
+        """ID связанных объектов для фильтров hostids, groupids, templateids"""
+        if field == 'hostids':
+            if kind in ('host', 'template'):
+                return [obj[TABLES[kind][0]]] if kind == 'host' else [
+                    h['hostid'] for h in self.tables['host'].values()
+                    if obj['templateid'] in h.get('templates', [])] + [obj['templateid']]
+            if kind == 'hostgroup':
+                return [h['hostid'] for h in self.tables['host'].values()
+                        if obj['groupid'] in h.get('groups', [])]
+            if kind in ('trigger', 'triggerprototype', 'event', 'problem'):
+                return obj.get('hosts', [])
+            return [obj.get('hostid')]
+        if field == 'groupids':
+            return obj.get('groups', []) if kind in ('host', 'template') else [obj.get('groupid')]
+        if field == 'templateids':
+            if kind == 'host':
+                return obj.get('templates', [])
+            if kind in ('trigger', 'triggerprototype'):
+                return obj.get('hosts', [])
+            return [obj.get('templateid') if kind == 'template' else obj.get('hostid')]
+        return [obj.get(field[:-1])]
+
+    @staticmethod
+    def _conditions(params: Dict) -> Dict:
+        """Фильтры запроса в виде множеств строк, один раз на запрос"""
+        def as_set(values) -> set:
+            return {str(v) for v in (values if isinstance(values, list) else [values])}
+
+        return {
+            'ids': {field: as_set(values) for field, values in params.items()
+                    if field.endswith('ids') and values is not None},
+            'filter': {field: as_set(values) for field, values in (params.get('filter') or {}).items()},
+            'search': {field: str(value).lower() for field, value in (params.get('search') or {}).items()},
+            'own': params.get('inherited') is False
+        }
+
+    def _matches(self, kind: str, obj: Dict, conditions: Dict) -> bool:
+        for field, values in conditions['ids'].items():
+            if not values.intersection(str(v) for v in self._related(kind, obj, field)):
+                return False
+
+        for field, values in conditions['filter'].items():
+            if str(obj.get(field)) not in values:
+                return False
+
+        for field, value in conditions['search'].items():
+            if value not in str(obj.get(field, '')).lower():
+                return False
+
+        if conditions['own'] and obj.get('templateid', '0') != '0':
+            return False
+        return True
+
+    @staticmethod
+    def _project(obj: Dict, output: Union[str, List[str]]) -> Dict:
+        if output == 'extend':
+            return {k: v for k, v in obj.items() if k not in NESTED_FIELDS}
+        return {k: obj[k] for k in output if k in obj}
+
+    def _select(self, kind: str, obj: Dict, params: Dict) -> Dict:
+        """Добавить вложенные объекты по параметрам select*"""
+        def sub(objects: List[Dict], option) -> Union[str, List[Dict]]:
+            if option == 'count':
+                return str(len(objects))
+            return [self._project(o, option) for o in objects]
+
+        result = {}
+        for option, value in params.items():
+            if not option.startswith('select'):
+                continue
+            if option == 'selectInterfaces':
+                result['interfaces'] = sub([self.tables['hostinterface'][i]
+                                            for i in obj.get('interfaces', [])], value)
+            elif option in ('selectGroups', 'selectHostGroups'):
+                result['groups'] = sub([self.tables['hostgroup'][g]
+                                        for g in obj.get('groups', [])], value)
+            elif option in ('selectParentTemplates', 'selectTemplates') and kind != 'hostgroup':
+                key = 'parentTemplates' if option == 'selectParentTemplates' else 'templates'
+                result[key] = sub([self.tables['template'][t]
+                                   for t in obj.get('templates', [])], value)
+            elif option == 'selectHosts':
+                if kind in ('trigger', 'triggerprototype'):
+                    owners = [self._owner(h) for h in obj.get('hosts', [])]
+                    hosts = [dict(o, hostid=o.get('hostid') or o['templateid']) for o in owners if o]
+                else:
+                    hosts = [self.tables['host'][h] for h in self._related(kind, obj, 'hostids')
+                             if h in self.tables['host']]
+                result['hosts'] = sub(hosts, value)
+            elif option == 'selectMacros':
+                owner_id = obj.get('hostid') or obj.get('templateid')
+                result['macros'] = sub(self._owned('usermacro', owner_id), value)
+            elif option == 'selectItems':
+                owner_id = obj.get('hostid') or obj.get('templateid')
+                result['items'] = sub(self._owned('item', owner_id), value)
+            elif option == 'selectSteps':
+                result['steps'] = sub(obj.get('steps', []), value)
+            elif option == 'selectPages':
+                pages = obj.get('pages', [])
+                if value != 'extend':
+                    pages = [{k: p[k] for k in value if k in p} for p in pages]
+                result['pages'] = pages
+        return result
+
+    def _candidates(self, kind: str, params: Dict) -> Iterable[Dict]:
+        """Объекты, которые стоит проверять фильтрами: по индексу, если он подходит"""
+        id_field, name_field = TABLES[kind]
+        table = self.tables[kind]
+        ids = params.get(f'{id_field}s')
+        if ids is not None:
+            ids = ids if isinstance(ids, list) else [ids]
+            return [table[str(i)] for i in ids if str(i) in table]
+
+        names = (params.get('filter') or {}).get(name_field)
+        if kind in NAMED_KINDS and names is not None:
+            names = names if isinstance(names, list) else [names]
+            return [table[self.by_name[kind][n]] for n in names if n in self.by_name[kind]]
+
+        owners = params.get('hostids')
+        if kind in OWNED_KINDS and owners is not None:
+            owners = owners if isinstance(owners, list) else [owners]
+            found = set()
+            for owner_id in owners:
+                found |= self.by_owner[kind].get(str(owner_id), set())
+            return [table[i] for i in sorted(found, key=int)]
+
+        return table.values()
+
+    def get(self, kind: str, params: Dict) -> Union[str, List[Dict]]:
+        conditions = self._conditions(params)
+        objects = [o for o in self._candidates(kind, params) if self._matches(kind, o, conditions)]
+        if params.get('eventid_from') is not None:
+            objects = [o for o in objects if int(o['eventid']) >= int(params['eventid_from'])]
+
+        sortfield = params.get('sortfield')
+        if sortfield:
+            id_field = TABLES[kind][0]
+            numeric = sortfield == id_field
+            objects.sort(key=lambda o: int(o[sortfield]) if numeric else str(o.get(sortfield, '')),
+                         reverse=params.get('sortorder') == 'DESC')
+        if params.get('limit'):
+            objects = objects[:int(params['limit'])]
+
+        if params.get('countOutput'):
+            return str(len(objects))
+
+        output = params.get('output', 'extend')
+        return [dict(self._project(o, output), **self._select(kind, o, params)) for o in objects]
+
+    # --- Запись
+
+    def _unique(self, kind: str, field: str, value: str, owner_id: str = None):
+        if owner_id is not None:
+            exists = any(o.get(field) == value for o in self._owned(kind, owner_id))
+        else:
+            exists = self._find(kind, field, value) is not None
+        if exists:
+            raise FakeAPIError(f'{kind.capitalize()} "{value}" already exists.')
+
+    def _set_interfaces(self, host_id: str, interfaces: List[Dict]) -> List[str]:
+        ids = []
+        for interface in interfaces:
+            obj = self._insert('hostinterface', dict({
+                'hostid': host_id, 'type': '1', 'main': '1', 'useip': '1', 'dns': '',
+                'port': '10050', 'available': '1', 'error': ''
+            }, **{k: str(v) for k, v in interface.items()}))
+            ids.append(obj['interfaceid'])
+        return ids
+
+    def _set_macros(self, owner_id: str, macros: List[Dict]):
+        for macro in self._owned('usermacro', owner_id):
+            self._remove('usermacro', macro['hostmacroid'])
+        for macro in macros:
+            self._insert('usermacro', {'hostid': owner_id, 'macro': macro['macro'],
+                                       'value': str(macro.get('value', ''))})
+
+    def _set_pages(self, pages: List[Dict], current: List[Dict] = ()) -> List[Dict]:
+        """Страницы дашборда в том виде, в каком их возвращает dashboard.get"""
+        current = {p['dashboard_pageid']: p for p in current}
+        result = []
+        for page in pages:
+            page_id = page.get('dashboard_pageid')
+            if page_id and 'widgets' not in page and page_id in current:
+                result.append(current[page_id])
+                continue
+            widgets = []
+            for widget in page.get('widgets', []):
+                widgets.append({
+                    'widgetid': widget.get('widgetid') or str(next(self.ids)),
+                    'type': widget['type'],
+                    'name': widget.get('name', ''),
+                    'x': str(widget.get('x', 0)),
+                    'y': str(widget.get('y', 0)),
+                    'width': str(widget.get('width', 1)),
+                    'height': str(widget.get('height', 2)),
+                    'view_mode': str(widget.get('view_mode', 0)),
+                    'fields': [{'type': str(f['type']), 'name': f['name'], 'value': str(f['value'])}
+                               for f in widget.get('fields', [])]
+                })
+            result.append({'dashboard_pageid': page_id or str(next(self.ids)),
+                           'name': page.get('name', ''), 'display_period': '0',
+                           'widgets': widgets})
+        return result
+
+    def create(self, kind: str, params: Dict) -> str:
+        if kind == 'hostgroup':
+            self._unique('hostgroup', 'name', params['name'])
+            return self._insert('hostgroup', {'name': params['name']})['groupid']
+
+        if kind in ('host', 'template'):
+            self._unique('host', 'host', params['host'])
+            self._unique('template', 'host', params['host'])
+            if not params.get('groups'):
+                raise FakeAPIError('Host "%s" cannot be without host group.' % params['host'])
+            template_ids = [str(t['templateid']) for t in params.get('templates', [])]
+            obj = self._insert(kind, {
+                'host': params['host'],
+                'name': params.get('name') or params['host'],
+                'status': str(params.get('status', 0)),
+                'groups': [str(g['groupid']) for g in params['groups']],
+                'templates': template_ids
+            })
+            owner_id = obj[TABLES[kind][0]]
+            if kind == 'host':
+                obj['interfaces'] = self._set_interfaces(owner_id, params.get('interfaces', []))
+            self._set_macros(owner_id, params.get('macros', []))
+            self._link(owner_id, template_ids)
+            return owner_id
+
+        if kind == 'item':
+            self._unique('item', 'key_', params['key_'], str(params['hostid']))
+            # Как настоящий API, числовые поля возвращаются строками
+            item = {field: value if isinstance(value, (list, dict)) else str(value)
+                    for field, value in params.items()}
+            return self._insert('item', dict(item, templateid='0'))['itemid']
+
+        if kind in ('trigger', 'triggerprototype'):
+            hosts = self._trigger_hosts(params['expression'])
+            for host_id in hosts:
+                self._unique(kind, 'description', params['description'], host_id)
+            return self._insert(kind, {
+                'description': params['description'],
+                'expression': params['expression'],
+                'priority': str(params.get('priority', 0)),
+                'comments': params.get('comments', ''),
+                'templateid': '0',
+                'flags': '0',
+                'hosts': hosts
+            })['triggerid']
+
+        if kind == 'httptest':
+            host_id = str(params['hostid'])
+            self._unique('httptest', 'name', params['name'], host_id)
+            return self._insert('httptest', {
+                'hostid': host_id, 'name': params['name'], 'delay': params.get('delay', '1m'),
+                'templateid': '0',
+                'steps': [{k: str(v) for k, v in step.items()} for step in params.get('steps', [])]
+            })['httptestid']
+
+        if kind == 'dashboard':
+            self._unique('dashboard', 'name', params['name'])
+            return self._insert('dashboard', {
+                'name': params['name'], 'userid': str(params.get('userid', 1)),
+                'pages': self._set_pages(params.get('pages', []))
+            })['dashboardid']
+
+        if kind == 'usermacro':
+            host_id = str(params['hostid'])
+            self._unique('usermacro', 'macro', params['macro'], host_id)
+            return self._insert('usermacro', {'hostid': host_id, 'macro': params['macro'],
+                                              'value': str(params.get('value', ''))})['hostmacroid']
+
+        raise FakeAPIError(f'Incorrect method "{kind}.create".', -32601, 'Method not found.')
+
+    def _create_all(self, kind: str, params: Union[Dict, List]) -> List[str]:
+        """
+        Создать объекты массива целиком или никак: как настоящий сервер, при
+        ошибке в одном объекте откатываем уже созданные (вместе с их интерфейсами,
+        элементами и макросами), иначе повтор половин массива их бы задублировал
+        """
+        created = []
+        try:
+            for obj in params if isinstance(params, list) else [params]:
+                created.append(self.create(kind, obj))
+        except FakeAPIError:
+            for object_id in reversed(created):
+                self.delete(kind, object_id)
+            raise
+        return created
+
+    def update(self, kind: str, params: Dict) -> str:
+        id_field = TABLES[kind][0]
+        obj = self._get_object(kind, params[id_field])
+        object_id = obj[id_field]
+        self._unindex(kind, obj)
+
+        for field, value in params.items():
+            if field == id_field:
+                continue
+            if field == 'templates' and kind in ('host', 'template'):
+                obj['templates'] = [str(t['templateid']) for t in value]
+                self._link(object_id, obj['templates'])
+            elif field == 'groups':
+                obj['groups'] = [str(g['groupid']) for g in value]
+            elif field == 'interfaces':
+                for interface_id in obj.get('interfaces', []):
+                    self._remove('hostinterface', interface_id)
+                obj['interfaces'] = self._set_interfaces(object_id, value)
+            elif field == 'macros':
+                self._set_macros(object_id, value)
+            elif field == 'pages':
+                obj['pages'] = self._set_pages(value, obj.get('pages', []))
+            elif field == 'steps':
+                obj['steps'] = [{k: str(v) for k, v in step.items()} for step in value]
+            elif field == 'expression':
+                obj['hosts'] = self._trigger_hosts(value)
+                obj['expression'] = value
+            else:
+                obj[field] = value if isinstance(value, (list, dict)) else str(value)
+
+        self._index(kind, obj)
+        return object_id
+
+    # --- События и доступность (их меняет сервер, а не API)
+
+    def raise_problem(self, host_id: str, name: str, severity: int = 3) -> str:
+        """Событие о проблеме на хосте и открытая проблема с тем же eventid"""
+        with self.lock:
+            event = self._insert('event', {'name': name, 'hosts': [str(host_id)], 'value': '1',
+                                           'severity': str(severity), 'r_eventid': '0',
+                                           'clock': str(int(time.time()))})
+            self.tables['problem'][event['eventid']] = dict(event)
+            return event['eventid']
+
+    def resolve_problem(self, eventid: str) -> str:
+        """Событие восстановления; проблема закрывается"""
+        with self.lock:
+            problem = self.tables['problem'].pop(str(eventid))
+            recovery = self._insert('event', dict(problem, value='0', severity='0',
+                                                  clock=str(int(time.time()))))
+            self.tables['event'][str(eventid)]['r_eventid'] = recovery['eventid']
+            return recovery['eventid']
+
+    def discover_trigger(self, host_id: str, description: str, expression: str) -> str:
+        """Триггер, созданный обнаружением по прототипу (например, для файловой системы)"""
+        with self.lock:
+            return self._insert('trigger', {
+                'description': description, 'expression': expression, 'priority': '2',
+                'comments': '', 'templateid': '0', 'flags': '4', 'hosts': [str(host_id)]
+            })['triggerid']
+
+    def set_available(self, host_id: str, available: str, error: str = ''):
+        """Изменить доступность agent интерфейсов хоста"""
+        with self.lock:
+            for interface in self._owned('hostinterface', str(host_id)):
+                interface['available'] = str(available)
+                interface['error'] = error
+
+    def delete(self, kind: str, object_id: str) -> str:
+        obj = self._get_object(kind, object_id)
+        object_id = obj[TABLES[kind][0]]
+        if kind == 'trigger' and obj.get('flags', '0') != '0':
+            raise FakeAPIError(f'Cannot delete discovered trigger "{obj["description"]}".')
+        self._remove(kind, object_id)
+        if kind in ('host', 'template'):
+            for table in OWNED_KINDS:
+                for child in self._owned(table, object_id):
+                    self._remove(table, child[TABLES[table][0]])
+        return object_id
+
+    # --- Диспетчер методов
+
+    def call(self, method: str, params: Union[Dict, List], auth: Optional[str]):
+        if method == 'apiinfo.version':
+            return self.version
+        if method == 'user.login':
+            if not (params.get('username') or params.get('user')):
+                raise FakeAPIError('Incorrect user name or password or account is temporarily blocked.')
+            token = '%032x' % random.getrandbits(128)
+            self.tokens.add(token)
+            return token
+        if method == 'user.checkAuthentication':
+            if auth:
+                raise FakeAPIError('The "user.checkAuthentication" method must be called '
+                                   'without the "auth" parameter.')
+            sessionid = params.get('sessionid') or params.get('token')
+            if sessionid not in self.tokens and sessionid not in self.api_tokens:
+                raise FakeAPIError('Session terminated, re-login, please.')
+            return {'userid': '1', 'username': 'Admin', 'sessionid': sessionid}
+        if auth not in self.tokens and auth not in self.api_tokens:
+            raise FakeAPIError('Session terminated, re-login, please.', -32602, 'Invalid params.')
+        if method == 'user.logout':
+            self.tokens.discard(auth)
+            return True
+
+        kind, _, operation = method.partition('.')
+        if kind not in TABLES:
+            raise FakeAPIError(f'Incorrect API "{kind}".', -32601, 'Method not found.')
+        id_field = TABLES[kind][0]
+
+        with self.lock:
+            if operation == 'get':
+                return self.get(kind, params)
+            if operation == 'create':
+                return {f'{id_field}s': self._create_all(kind, params)}
+            if operation in ('update', 'delete'):
+                objects = params if isinstance(params, list) else [params]
+                handler = getattr(self, operation)
+                return {f'{id_field}s': [handler(kind, obj) for obj in objects]}
+            if method == 'host.massupdate':
+                host_ids = [str(h['hostid']) for h in params['hosts']]
+                for host_id in host_ids:
+                    self.update('host', dict({k: v for k, v in params.items() if k != 'hosts'},
+                                             hostid=host_id))
+                return {'hostids': host_ids}
+            if method == 'template.massadd':
+                template_ids = [str(t['templateid']) for t in params['templates']]
+                for host in params.get('hosts', []):
+                    owner = self._get_object('host', host['hostid'])
+                    owner['templates'] += [t for t in template_ids if t not in owner['templates']]
+                    self._link(owner['hostid'], template_ids)
+                return {'templateids': template_ids}
+
+        raise FakeAPIError(f'Incorrect method "{method}".', -32601, 'Method not found.')
+
+
+class FakeZabbixServer:
+    """
+    HTTP-сервер с API Zabbix в отдельном потоке.
+    with FakeZabbixServer(latency=0.01, jitter=0.005) as server:
+        zapi = ZabbixAPI(server.url, 'Admin', 'zabbix')
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0,
+                 store: FakeZabbixStore = None, compress: bool = True,
+                 error_rate: float = 0.0, stall_rate: float = 0.0, stall: float = 1.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.errors = 0
+        self.stalls = 0
+        self.compress = compress
+        self.store = store or FakeZabbixStore()
+        self.calls: Counter = Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._stats_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self._httpd.server_port}'
+
+    def start(self) -> 'FakeZabbixServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'FakeZabbixServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.calls.clear()
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.errors = 0
+            self.stalls = 0
+
+    def _delay(self):
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if self.stall_rate and random.random() < self.stall_rate:
+            delay += self.stall
+            with self._stats_lock:
+                self.stalls += 1
+        if delay > 0:
+            time.sleep(delay)
+
+    def _dispatch(self, body: bytes, authorization: str = '') -> Dict:
+        request = json.loads(body)
+        method = request.get('method', '')
+        with self._stats_lock:
+            self.calls[method] += 1
+        self._delay()
+
+        response = {'jsonrpc': '2.0', 'id': request.get('id')}
+        try:
+            # Zabbix 6.4+ принимает токен и в заголовке Authorization: Bearer
+            auth = request.get('auth')
+            if auth is None and authorization.startswith('Bearer '):
+                auth = authorization[len('Bearer '):]
+            response['result'] = self.store.call(method, request.get('params', {}), auth)
+        except FakeAPIError as e:
+            response['error'] = {'code': e.code, 'message': e.message, 'data': e.data}
+        except (KeyError, TypeError, ValueError) as e:
+            response['error'] = {'code': -32602, 'message': 'Invalid params.',
+                                 'data': f'Invalid parameter: {e}'}
+        return response
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Заголовки и тело уходят разными send(); без этого задержка ACK добавляет ~40 мс
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length)
+
+                # Перегруженный фронтенд: вызов не выполняется, клиент может повторить
+                if server.error_rate and random.random() < server.error_rate:
+                    with server._stats_lock:
+                        server.errors += 1
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                payload = json.dumps(server._dispatch(
+                    body, self.headers.get('Authorization', ''))).encode()
+
+                headers = {'Content-Type': 'application/json'}
+                if (server.compress and len(payload) >= GZIP_MIN_LENGTH
+                        and 'gzip' in self.headers.get('Accept-Encoding', '')):
+                    payload = gzip.compress(payload, compresslevel=1)
+                    headers['Content-Encoding'] = 'gzip'
+                headers['Content-Length'] = str(len(payload))
+
+                self.send_response(200)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+                request_head = len(self.requestline) + len(str(self.headers)) + 2
+                response_head = sum(len(n) + len(v) + 4 for n, v in headers.items()) + 40
+                with server._stats_lock:
+                    server.bytes_in += request_head + length
+                    server.bytes_out += response_head + len(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,122 @@
+"""
+Локальная замена траппера Zabbix сервера для проверки sender и бенчмарков
+Слушает TCP порт на 127.0.0.1, принимает пакеты "sender data" (в том числе
+сжатые) и отвечает как сервер: processed/failed/total/seconds spent.
+Значение принимается, если на хосте есть элемент данных типа траппер с
+таким ключом: их берет из хранилища FakeZabbixStore (store) или из
+множества пар (хост, ключ) known. Без store и known принимается все.
+"""
+
+import json
+import socketserver
+import threading
+import time
+from typing import List, Optional, Set, Tuple
+
+from . import protocol
+
+# Тип элемента данных "Zabbix траппер"
+TRAPPER_ITEM_TYPE = '2'
+
+
+class FakeTrapper:
+    """
+    with FakeTrapper() as trapper:
+        ZabbixSender('127.0.0.1', trapper.port).send([...])
+    """
+
+    def __init__(self, known: Set[Tuple[str, str]] = None, store=None,
+                 latency: float = 0.0, keep_values: bool = True):
+        self.known = known
+        self.store = store
+        self.latency = latency
+        # Для бенчмарков значения можно не хранить, только считать
+        self.keep_values = keep_values
+        self.values: List[dict] = []
+        self.frames = 0
+        self.processed = 0
+        self.failed = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._server.socket.listen(1024)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> 'FakeTrapper':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeTrapper':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def trapper_keys(self) -> Optional[Set[Tuple[str, str]]]:
+        """Пары (хост, ключ), для которых есть траппер; None - принимать все"""
+        if self.store is None:
+            return self.known
+        with self.store.lock:
+            hosts = {host['hostid']: host['host']
+                     for host in self.store.tables['host'].values()}
+            return {(hosts[item['hostid']], item['key_'])
+                    for item in self.store.tables['item'].values()
+                    if item.get('type') == TRAPPER_ITEM_TYPE and item.get('hostid') in hosts}
+
+    def _process(self, request: dict) -> dict:
+        started = time.monotonic()
+        values = request.get('data', [])
+        known = self.trapper_keys()
+        accepted = [value for value in values
+                    if known is None or (value.get('host'), value.get('key')) in known]
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.frames += 1
+            self.processed += len(accepted)
+            self.failed += len(values) - len(accepted)
+            if self.keep_values:
+                self.values.extend(accepted)
+
+        return {
+            'response': 'success',
+            'info': f"processed: {len(accepted)}; failed: {len(values) - len(accepted)}; "
+                    f"total: {len(values)}; seconds spent: {time.monotonic() - started:.6f}"
+        }
+
+    def _handler_class(self):
+        trapper = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                try:
+                    data = protocol.recv_packet(self.request)
+                except (protocol.ProtocolError, OSError):
+                    return
+                if not data:
+                    return
+                with trapper._lock:
+                    trapper.bytes_received += len(data)
+
+                try:
+                    request = json.loads(data)
+                except ValueError:
+                    return
+                if request.get('request') != 'sender data':
+                    response = {'response': 'failed', 'info': 'unsupported request'}
+                else:
+                    response = trapper._process(request)
+                self.request.sendall(protocol.encode(json.dumps(response).encode()))
+
+        return Handler
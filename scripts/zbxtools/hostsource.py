@@ -0,0 +1,186 @@
+"""
+Хосты мониторинга из источника истины вместо таблиц IP в коде
+Конфигурация хостов (hostname, visible_name, ip, is_web_server) строится
+по приватным адресам из outputs Terraform или из ответа динамического
+инвентаря Ansible на --list: агент Zabbix опрашивается по внутренней
+сети. STATIC_HOSTS - прежняя таблица адресов для стенда без state,
+используется только явно (--hosts-from static).
+Сверка с сервером (verify_interfaces) читает основные agent интерфейсы
+всех хостов одним hostinterface.get, а расхождения исправляются одним
+пакетным hostinterface.update.
+"""
+
+import json
+import os
+import subprocess
+from typing import Dict, List, Tuple
+
+from .api import BulkResult, ZabbixAPI
+from .inventory import DOMAIN, host_group, natural_key
+
+SOURCES = ('terraform', 'inventory', 'static')
+
+# Скрипт динамического инвентаря (относительно корня репозитория)
+DEFAULT_INVENTORY_SOURCE = 'ansible/inventories/terraform.py'
+
+# Видимое имя по имени хоста без номера; {number} - номер хоста (web1 -> 1)
+VISIBLE_NAMES = {
+    'bastion': 'Bastion Host',
+    'web': 'Web Server {number}',
+    'zabbix': 'Zabbix Server',
+    'elastic': 'Elasticsearch Server',
+    'kibana': 'Kibana Server'
+}
+
+WEB_GROUP = 'web'
+
+# Адреса на момент первой настройки стенда; с outputs Terraform могут расходиться
+STATIC_HOSTS = [
+    {
+        'hostname': 'bastion.ru-central1.internal',
+        'visible_name': 'Bastion Host',
+        'ip': '10.0.1.33',
+        'is_web_server': False
+    },
+    {
+        'hostname': 'web1.ru-central1.internal',
+        'visible_name': 'Web Server 1',
+        'ip': '10.0.10.4',
+        'is_web_server': True
+    },
+    {
+        'hostname': 'web2.ru-central1.internal',
+        'visible_name': 'Web Server 2',
+        'ip': '10.0.11.5',
+        'is_web_server': True
+    },
+    {
+        'hostname': 'zabbix.ru-central1.internal',
+        'visible_name': 'Zabbix Server',
+        'ip': '10.0.1.22',
+        'is_web_server': False
+    },
+    {
+        'hostname': 'elastic.ru-central1.internal',
+        'visible_name': 'Elasticsearch Server',
+        'ip': '10.0.11.19',
+        'is_web_server': False
+    },
+    {
+        'hostname': 'kibana.ru-central1.internal',
+        'visible_name': 'Kibana Server',
+        'ip': '10.0.1.9',
+        'is_web_server': False
+    }
+]
+
+
+def visible_name(name: str) -> str:
+    role = name.rstrip('0123456789')
+    template = VISIBLE_NAMES.get(role)
+    if not template:
+        return name
+    return template.format(number=name[len(role):]).strip()
+
+
+def host_config(name: str, ip: str) -> Dict:
+    """Хост в формате configure_monitoring по короткому имени (web1) и адресу агента"""
+    return {
+        'hostname': f'{name}.{DOMAIN}',
+        'visible_name': visible_name(name),
+        'ip': ip,
+        'is_web_server': host_group(name) == WEB_GROUP
+    }
+
+
+def hosts_from_ips(private_ips: Dict[str, str]) -> List[Dict]:
+    hosts = []
+    for name in sorted(private_ips, key=natural_key):
+        if private_ips[name]:
+            hosts.append(host_config(name, private_ips[name]))
+        else:
+            print(f"⚠ Нет приватного адреса для {name}, хост пропущен")
+    return hosts
+
+
+def hosts_from_outputs(outputs: Dict) -> List[Dict]:
+    """Хосты по output private_ips (формат terraform output -json)"""
+    if 'private_ips' not in outputs:
+        raise ValueError("в outputs Terraform нет private_ips")
+    return hosts_from_ips(outputs['private_ips']['value'])
+
+
+def load_inventory_answer(source: str) -> Dict:
+    """
+    Ответ динамического инвентаря на --list: исполняемый скрипт
+    запускается, другой файл читается как сохраненный JSON
+    """
+    if os.access(source, os.X_OK) and not source.endswith('.json'):
+        try:
+            result = subprocess.run([os.path.abspath(source), '--list'],
+                                    capture_output=True, text=True, check=True)
+        except subprocess.CalledProcessError as e:
+            raise ValueError(f"{source} --list: {e.stderr.strip() or e}")
+        return json.loads(result.stdout)
+    with open(source) as f:
+        return json.load(f)
+
+
+def hosts_from_inventory(answer: Dict) -> List[Dict]:
+    """
+    Хосты по _meta.hostvars. Для хостов с публичным ansible_host адрес
+    агента берется из private_ip (его пишет zbxtools.inventory).
+    """
+    hosts = []
+    hostvars = answer.get('_meta', {}).get('hostvars', {})
+    for hostname in sorted(hostvars, key=natural_key):
+        variables = hostvars[hostname]
+        ip = variables.get('private_ip') or variables.get('ansible_host')
+        if not ip:
+            print(f"⚠ Нет адреса для {hostname}, хост пропущен")
+            continue
+        host = host_config(hostname.split('.', 1)[0], ip)
+        host['hostname'] = hostname
+        hosts.append(host)
+    return hosts
+
+
+def web_servers(hosts_config: List[Dict]) -> List[Dict]:
+    return [host for host in hosts_config if host['is_web_server']]
+
+
+class InterfaceMismatch:
+    """Адрес agent интерфейса в Zabbix, отличающийся от источника истины"""
+
+    def __init__(self, host: Dict, interface: Dict):
+        self.hostname = host['hostname']
+        self.visible_name = host['visible_name']
+        self.interface_id = interface['interfaceid']
+        self.current = interface['ip']
+        self.expected = host['ip']
+
+    def __str__(self) -> str:
+        return f"{self.visible_name}: {self.current} → {self.expected}"
+
+
+def verify_interfaces(zapi: ZabbixAPI, hosts_config: List[Dict]
+                      ) -> Tuple[List[InterfaceMismatch], List[Dict]]:
+    """
+    Сравнить адреса основных agent интерфейсов с конфигурацией одним
+    hostinterface.get. Возвращает расхождения и хосты, которых нет в
+    Zabbix (или у которых нет agent интерфейса).
+    """
+    interfaces = zapi.get_agent_interfaces()
+    mismatches, missing = [], []
+    for host in hosts_config:
+        interface = interfaces.get(host['hostname'])
+        if interface is None:
+            missing.append(host)
+        elif interface['ip'] != host['ip']:
+            mismatches.append(InterfaceMismatch(host, interface))
+    return mismatches, missing
+
+
+def fix_interfaces(zapi: ZabbixAPI, mismatches: List[InterfaceMismatch]) -> BulkResult:
+    """Исправить адреса пакетным hostinterface.update"""
+    return zapi.update_host_interfaces({m.interface_id: m.expected for m in mismatches})
@@ -0,0 +1,127 @@
+"""
+Индекс объектов Zabbix на время одного запуска
+Загружается одним *.get на каждый тип объектов, после чего поиск ID
+по имени не требует запросов к API. Создаваемые объекты добавляются
+в индекс сразу после создания.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Типы объектов, которые загружает индекс (атрибуты ObjectIndex)
+KINDS = ('hosts', 'templates', 'groups', 'triggers', 'httptests', 'dashboards')
+
+# Имена хостов в выражении триггера: avg(//web1/system.cpu.util,5m)
+EXPRESSION_HOST = re.compile(r'\(/+([^/()]+)/')
+
+
+class ObjectIndex:
+    def __init__(self):
+        self.hosts: Dict[str, str] = {}
+        self.templates: Dict[str, str] = {}
+        self.groups: Dict[str, str] = {}
+        self.triggers: Dict[Tuple[str, str], str] = {}
+        self.httptests: Dict[Tuple[str, str], str] = {}
+        self.dashboards: Dict[str, str] = {}
+
+        # Какие имена загружены для каждого типа: None - все объекты типа.
+        # Типы, которых здесь нет, не загружались и ищутся через API.
+        self._scopes: Dict[str, Optional[set]] = {}
+        self._host_ids = set()
+        self.calls = 0
+
+    def covers(self, kind: str, name: str) -> bool:
+        """Можно ли ответить на поиск по индексу без запроса к API"""
+        if kind not in self._scopes:
+            return False
+        scope = self._scopes[kind]
+        return scope is None or name in scope
+
+    def covers_on_host(self, kind: str, name: str, host_id: str = None) -> bool:
+        """То же для триггеров и веб-сценариев, которые загружались только для известных хостов"""
+        if not self.covers(kind, name):
+            return False
+        if host_id:
+            return host_id in self._host_ids
+        return self._scopes.get('hosts', ()) is None
+
+    def covers_all(self, kind: str, names: Iterable[str], host_ids: Iterable[str]) -> bool:
+        """covers_on_host для всех сочетаний имен и хостов без перебора пар"""
+        if not all(self.covers(kind, name) for name in names):
+            return False
+        return all(host_id in self._host_ids for host_id in host_ids)
+
+    def load(self, zapi, hosts: Iterable[str] = None, templates: Iterable[str] = None,
+             groups: Iterable[str] = None, triggers: Iterable[str] = None,
+             httptests: Iterable[str] = None, dashboards: Iterable[str] = None):
+        """
+        Загрузить объекты, по одному запросу на тип.
+        Для каждого типа можно передать список имен, иначе загружаются все объекты.
+        Триггеры и веб-сценарии загружаются только для загруженных хостов.
+        """
+        def name_filter(field: str, names: Optional[List[str]]) -> Dict:
+            return {'filter': {field: names}} if names is not None else {}
+
+        scopes = {kind: list(names) if names is not None else None
+                  for kind, names in zip(KINDS, (hosts, templates, groups, triggers,
+                                                 httptests, dashboards))}
+
+        for host in self._get(zapi, 'host.get', {'output': ['hostid', 'host'],
+                                                 **name_filter('host', scopes['hosts'])}):
+            self.add_host(host['host'], host['hostid'])
+
+        for template in self._get(zapi, 'template.get', {
+                'output': ['templateid', 'host'], **name_filter('host', scopes['templates'])}):
+            self.templates[template['host']] = template['templateid']
+
+        for group in self._get(zapi, 'hostgroup.get', {
+                'output': ['groupid', 'name'], **name_filter('name', scopes['groups'])}):
+            self.groups[group['name']] = group['groupid']
+
+        host_ids = list(self.hosts.values())
+        if host_ids:
+            for trigger in self._get(zapi, 'trigger.get', {
+                    'output': ['triggerid', 'description'],
+                    'hostids': host_ids,
+                    'selectHosts': ['hostid'],
+                    **name_filter('description', scopes['triggers'])}):
+                for host in trigger['hosts']:
+                    self.triggers[(host['hostid'], trigger['description'])] = trigger['triggerid']
+
+            for httptest in self._get(zapi, 'httptest.get', {
+                    'output': ['httptestid', 'name', 'hostid'],
+                    'hostids': host_ids,
+                    **name_filter('name', scopes['httptests'])}):
+                self.httptests[(httptest['hostid'], httptest['name'])] = httptest['httptestid']
+
+        for dashboard in self._get(zapi, 'dashboard.get', {
+                'output': ['dashboardid', 'name'], **name_filter('name', scopes['dashboards'])}):
+            self.dashboards[dashboard['name']] = dashboard['dashboardid']
+
+        self._scopes = {kind: set(names) if names is not None else None
+                        for kind, names in scopes.items()}
+
+    def _get(self, zapi, method: str, params: Dict) -> List[Dict]:
+        self.calls += 1
+        return zapi._call(method, params)
+
+    def add_host(self, hostname: str, host_id: str):
+        self.hosts[hostname] = host_id
+        self._host_ids.add(host_id)
+
+    def trigger_id(self, description: str, host_id: str = None) -> Optional[str]:
+        if host_id:
+            return self.triggers.get((host_id, description))
+        return next((tid for (_, desc), tid in self.triggers.items() if desc == description), None)
+
+    def add_trigger(self, triggerid: str, description: str, expression: str):
+        """Добавить созданный триггер; хосты определяются по выражению"""
+        for hostname in EXPRESSION_HOST.findall(expression):
+            host_id = self.hosts.get(hostname)
+            if host_id:
+                self.triggers[(host_id, description)] = triggerid
+
+    def size(self) -> int:
+        """Число объектов в индексе"""
+        return sum(len(getattr(self, kind)) for kind in KINDS)
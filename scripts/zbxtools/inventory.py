@@ -0,0 +1,151 @@
+"""
+Инвентарь Ansible по outputs Terraform
+Инвентарь собирается как структура данных за один проход по картам
+public_ips и private_ips: группа хоста определяется по его имени без
+номера (web1 -> web), хосты из DIRECT_HOSTS доступны по публичному адресу,
+остальные - через bastion (ProxyCommand в all:vars). Файл перезаписывается
+атомарно и только если содержимое изменилось, чтобы не сбрасывать кэш
+фактов Ansible и сессии SSH ControlPersist. Та же структура отдается
+динамическому инвентарю (ansible_list) в формате ответа на --list.
+"""
+
+import hashlib
+import json
+import re
+import sys
+from typing import Dict, List, Optional
+
+from .metrics import write_atomic
+
+DOMAIN = 'ru-central1.internal'
+ANSIBLE_USER = 'ubuntu'
+# Ключ, который прописывает generate_inventory.sh
+DEFAULT_SSH_KEY = '~/.ssh/id_ed25519'
+
+# Имя хоста без номера -> группа инвентаря; остальные попадают в группу по своему имени
+GROUPS = {'bastion': 'bastion', 'web': 'web', 'elastic': 'elk', 'kibana': 'elk',
+          'zabbix': 'zabbix'}
+
+# Хосты, к которым Ansible подключается напрямую по публичному адресу
+DIRECT_HOSTS = ('bastion', 'zabbix')
+
+DIRECT_SSH_ARGS = '-o StrictHostKeyChecking=no'
+
+# Строки, которые YAML читает без кавычек как строки (IP адреса, имена хостов)
+PLAIN = re.compile(r'[A-Za-z0-9_./~@%-]+')
+NUMBER = re.compile(r'[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?')
+RESERVED = ('true', 'false', 'yes', 'no', 'on', 'off', 'null', '~')
+
+
+def host_group(name: str) -> str:
+    role = name.rstrip('0123456789')
+    return GROUPS.get(role, role)
+
+
+def natural_key(name: str) -> List:
+    """web2 раньше web10"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def proxy_ssh_args(bastion_ip: str, key_file: Optional[str] = None) -> str:
+    key = f'-i {key_file} ' if key_file else ''
+    return (f'{DIRECT_SSH_ARGS} -o ProxyCommand="ssh {key}-W %h:%p -q '
+            f'{ANSIBLE_USER}@{bastion_ip}"')
+
+
+def build_inventory(public_ips: Dict[str, str], private_ips: Dict[str, str],
+                    key_file: Optional[str] = None) -> Dict:
+    """
+    Инвентарь в формате YAML инвентаря Ansible. Хосты - ключи private_ips
+    (у ALB нет приватного адреса, и он в инвентарь не попадает).
+    """
+    bastion_ip = public_ips.get('bastion')
+    if not bastion_ip:
+        raise ValueError("в outputs нет публичного адреса bastion")
+
+    all_vars = {'ansible_user': ANSIBLE_USER}
+    if key_file:
+        all_vars['ansible_ssh_private_key_file'] = key_file
+    all_vars['ansible_ssh_common_args'] = proxy_ssh_args(bastion_ip, key_file)
+
+    children: Dict[str, Dict] = {}
+    for name in sorted(private_ips, key=natural_key):
+        if name in DIRECT_HOSTS and public_ips.get(name):
+            hostvars = {'ansible_host': public_ips[name],
+                        'ansible_ssh_common_args': DIRECT_SSH_ARGS}
+            # Адрес агента для Zabbix (zbxtools.hostsource)
+            if private_ips[name]:
+                hostvars['private_ip'] = private_ips[name]
+        elif private_ips[name]:
+            hostvars = {'ansible_host': private_ips[name]}
+        else:
+            # В stderr: stdout динамического инвентаря - JSON для Ansible
+            print(f"⚠ Нет адреса для {name}, хост пропущен", file=sys.stderr)
+            continue
+        group = children.setdefault(host_group(name), {'hosts': {}})
+        group['hosts'][f'{name}.{DOMAIN}'] = hostvars
+
+    return {'all': {'vars': all_vars, 'children': children}}
+
+
+def yaml_scalar(value) -> str:
+    """Строка YAML; кавычки только там, где без них значение читается иначе"""
+    text = str(value)
+    if PLAIN.fullmatch(text) and not NUMBER.fullmatch(text) and text.lower() not in RESERVED:
+        return text
+    if "'" not in text:
+        return f"'{text}'"
+    return json.dumps(text)
+
+
+def render_yaml(data: Dict, indent: int = 0) -> str:
+    """YAML для вложенных словарей со строками (PyYAML не нужен)"""
+    lines = []
+    for key, value in data.items():
+        prefix = ' ' * indent + f'{key}:'
+        if isinstance(value, dict) and not value:
+            lines.append(f'{prefix} {{}}')
+        elif isinstance(value, dict):
+            lines.append(prefix)
+            lines.append(render_yaml(value, indent + 2))
+        else:
+            lines.append(f'{prefix} {yaml_scalar(value)}')
+    return '\n'.join(lines)
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def write_if_changed(path: str, content: str) -> bool:
+    """Записать файл атомарно, если содержимое отличается; True - файл изменен"""
+    try:
+        with open(path) as f:
+            if content_hash(f.read()) == content_hash(content):
+                return False
+    except FileNotFoundError:
+        pass
+    write_atomic(path, content)
+    return True
+
+
+def render_inventory(outputs: Dict, key_file: Optional[str] = None) -> str:
+    """Текст инвентаря по outputs Terraform (формат terraform output -json)"""
+    inventory = build_inventory(outputs['public_ips']['value'], outputs['private_ips']['value'],
+                                key_file)
+    return "# Managed by zbxctl inventory, regenerated from Terraform outputs\n" \
+           + render_yaml(inventory) + '\n'
+
+
+def ansible_list(inventory: Dict) -> Dict:
+    """
+    Ответ динамического инвентаря на --list: группы со списками хостов и
+    переменные всех хостов в _meta.hostvars, чтобы Ansible не вызывал --host
+    """
+    root = inventory['all']
+    result = {'_meta': {'hostvars': {}},
+              'all': {'vars': root['vars'], 'children': list(root['children'])}}
+    for group, body in root['children'].items():
+        result[group] = {'hosts': list(body['hosts'])}
+        result['_meta']['hostvars'].update(body['hosts'])
+    return result
@@ -0,0 +1,158 @@
+"""
+Журнал выполненных операций настройки мониторинга
+Каждая завершенная операция (тип объекта, имя, полученный ID и хеш входных
+данных) дописывается строкой JSON в конец файла и сбрасывается на диск
+сразу, поэтому после сбоя посреди запуска видно, что успело выполниться.
+С resume записи, хеш входных данных которых не изменился, считаются
+выполненными, и повторяются только остальные операции. При закрытии файл
+сжимается: после запуска без ошибок записи этого сервера удаляются (повторять
+нечего), иначе для каждой операции остается только последняя запись, поэтому
+журнал не растет от запуска к запуску. Файл можно удалить в любой момент -
+следующий запуск просто выполнит все заново.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import write_atomic
+
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'zbxtools',
+                                    'journal.jsonl')
+
+
+def input_hash(params) -> str:
+    """Хеш входных данных операции, не зависящий от порядка ключей"""
+    data = json.dumps(params, sort_keys=True, separators=(',', ':'), ensure_ascii=False,
+                      default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class Journal:
+    """
+    Журнал одного запуска. Без path записи никуда не пишутся, но выполненные
+    операции и ошибки все равно считаются для итогового отчета.
+    """
+
+    def __init__(self, path: str = None, server: str = '', resume: bool = False):
+        self.path = path
+        self.server = server
+        self.resume = resume
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+
+        # (тип, имя) -> последняя запись прошлых запусков; загружается только для resume
+        self.entries: Dict[Tuple[str, str], Dict] = {}
+        self.trusted = set()
+        self.recorded = 0
+        self.failures: List[Tuple[str, str, str]] = []
+
+        # Операции записывают и потоки AsyncZabbixAPI
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            if resume:
+                self._load()
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, 'a')
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Последняя строка могла не дописаться при аварийном завершении
+                continue
+            if entry.get('server') == self.server:
+                self.entries[(entry['kind'], entry['name'])] = entry
+
+    def done(self, kind: str, name: str, params) -> Optional[Dict]:
+        """
+        Запись прошлого запуска, если операцию можно не повторять: включен resume
+        и входные данные не изменились. ID в записи может быть None, если объект
+        уже существовал и его ID не запрашивался.
+        """
+        entry = self.entries.get((kind, name))
+        if entry is None or entry['hash'] != input_hash(params):
+            return None
+        with self._lock:
+            self.trusted.add((kind, name))
+        return entry
+
+    def record(self, kind: str, name: str, object_id: Optional[str], params):
+        """Дописать выполненную операцию и сразу сбросить ее на диск"""
+        entry = {
+            'run': self.run_id,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'server': self.server,
+            'kind': kind,
+            'name': name,
+            'id': object_id,
+            'hash': input_hash(params)
+        }
+        with self._lock:
+            self.recorded += 1
+            if self._file:
+                self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def fail(self, kind: str, name: str, error):
+        """Запомнить операцию, которая не выполнилась (в журнал не пишется)"""
+        with self._lock:
+            self.failures.append((kind, name, str(error)))
+
+    def skipped(self) -> int:
+        return len(self.trusted)
+
+    def print_summary(self):
+        print(f"  Выполнено операций: {self.recorded}, взято из журнала: {self.skipped()}, "
+              f"с ошибкой: {len(self.failures)}")
+        for kind, name, error in self.failures:
+            print(f"  ⚠ {kind} '{name}': {error}")
+        if self.path:
+            print(f"  Журнал: {self.path} (запуск {self.run_id})")
+
+    def close(self, success: bool = False):
+        """
+        Закрыть журнал и сжать файл. success - запуск завершился без ошибок:
+        тогда записи этого сервера больше не нужны для resume.
+        """
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+        if self.path:
+            self._compact(drop_server=success and not self.failures)
+
+    def _compact(self, drop_server: bool):
+        """Оставить последнюю запись каждой операции, без записей сервера при drop_server"""
+        try:
+            with open(self.path) as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+
+        latest: Dict[Tuple[str, str, str], str] = {}
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if drop_server and entry.get('server') == self.server:
+                continue
+            key = (entry.get('server'), entry.get('kind'), entry.get('name'))
+            # Порядок строк - по последней записи операции
+            latest.pop(key, None)
+            latest[key] = line if line.endswith('\n') else line + '\n'
+        if len(latest) != len(lines):
+            write_atomic(self.path, ''.join(latest.values()))
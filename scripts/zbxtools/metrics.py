@@ -0,0 +1,247 @@
+"""
+Метрики вызовов Zabbix API и профилирование запусков
+Для каждого JSON-RPC метода считаются вызовы, ошибки, гистограмма
+задержек и байты запросов и ответов; фазы запуска (вход, поиск объектов,
+хосты, триггеры, дашборды) замеряются отдельно. В конце запуска метрики
+выгружаются в textfile для node_exporter и в JSON, а с профилированием
+еще и в файл cProfile с текстовым отчетом.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Верхние границы корзин гистограммы задержек, в секундах
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Сколько функций показывать в текстовом отчете профиля
+PROFILE_TOP = 25
+
+# Методы без *.get, которые ничего не меняют на сервере. user.login и
+# user.logout создают и удаляют сессии, поэтому считаются записью
+READ_METHODS = ('apiinfo.version', 'user.checkAuthentication')
+
+
+def is_read_method(method: str) -> bool:
+    """Метод только читает данные: *.get, apiinfo.version, user.checkAuthentication"""
+    return method.endswith('.get') or method in READ_METHODS
+
+
+class MethodStats:
+    """Накопленная статистика одного JSON-RPC метода"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def observe(self, latency: float, sent: int, received: int, error: bool):
+        self.count += 1
+        self.errors += int(error)
+        self.latency_sum += latency
+        self.bytes_sent += sent
+        self.bytes_received += received
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.buckets[i] += 1
+                break
+
+    def cumulative_buckets(self) -> List[int]:
+        """Счетчики корзин нарастающим итогом, как в гистограмме Prometheus"""
+        total, result = 0, []
+        for count in self.buckets:
+            total += count
+            result.append(total)
+        return result
+
+    def to_dict(self) -> Dict:
+        return {
+            'calls': self.count,
+            'errors': self.errors,
+            'latency_seconds_sum': round(self.latency_sum, 6),
+            'latency_seconds_avg': round(self.latency_sum / self.count, 6) if self.count else 0,
+            'latency_buckets': {str(bound): count for bound, count
+                                in zip(LATENCY_BUCKETS, self.cumulative_buckets())},
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received
+        }
+
+
+class APIMetrics:
+    """
+    Метрики запуска: статистика по методам API и длительность фаз.
+    Потокобезопасна - в нее пишут и AsyncZabbixAPI, и дублирующие запросы.
+    """
+
+    def __init__(self):
+        self.methods: Dict[str, MethodStats] = {}
+        self.phases: Dict[str, float] = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, method: str, latency: float, sent: int = 0, received: int = 0,
+               error: bool = False):
+        with self._lock:
+            stats = self.methods.get(method)
+            if stats is None:
+                stats = self.methods[method] = MethodStats()
+            stats.observe(latency, sent, received, error)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Замерить фазу запуска; повторные фазы с тем же именем суммируются"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def total_calls(self) -> int:
+        return sum(stats.count for stats in self.methods.values())
+
+    def write_calls(self) -> int:
+        """Вызовы методов, которые меняют что-то на сервере (см. is_read_method)"""
+        return sum(stats.count for method, stats in self.methods.items()
+                   if not is_read_method(method))
+
+    def total_bytes(self) -> int:
+        """Трафик всех вызовов API в обе стороны (тела запросов и ответов)"""
+        return sum(stats.bytes_sent + stats.bytes_received for stats in self.methods.values())
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'started': self.started,
+                'duration_seconds': round(time.time() - self.started, 6),
+                'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+                'methods': {method: stats.to_dict()
+                            for method, stats in sorted(self.methods.items())}
+            }
+
+    def prometheus_text(self) -> str:
+        """Метрики в текстовом формате Prometheus (для textfile collector node_exporter)"""
+        with self._lock:
+            methods = sorted(self.methods.items())
+            phases = list(self.phases.items())
+
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[str]):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+
+        metric('zabbix_api_requests_total', 'counter', 'Вызовы Zabbix API по методам',
+               [f'zabbix_api_requests_total{{method="{m}"}} {s.count}' for m, s in methods])
+        metric('zabbix_api_request_errors_total', 'counter',
+               'Вызовы, завершившиеся ошибкой HTTP или JSON-RPC',
+               [f'zabbix_api_request_errors_total{{method="{m}"}} {s.errors}' for m, s in methods])
+
+        histogram = []
+        for m, s in methods:
+            for bound, count in zip(LATENCY_BUCKETS, s.cumulative_buckets()):
+                histogram.append(f'zabbix_api_request_duration_seconds_bucket'
+                                 f'{{method="{m}",le="{bound}"}} {count}')
+            histogram.append(f'zabbix_api_request_duration_seconds_bucket'
+                             f'{{method="{m}",le="+Inf"}} {s.count}')
+            histogram.append(f'zabbix_api_request_duration_seconds_sum{{method="{m}"}} '
+                             f'{s.latency_sum:.6f}')
+            histogram.append(f'zabbix_api_request_duration_seconds_count{{method="{m}"}} {s.count}')
+        metric('zabbix_api_request_duration_seconds', 'histogram',
+               'Задержка вызовов Zabbix API', histogram)
+
+        metric('zabbix_api_request_bytes_total', 'counter', 'Байты тел запросов',
+               [f'zabbix_api_request_bytes_total{{method="{m}"}} {s.bytes_sent}'
+                for m, s in methods])
+        metric('zabbix_api_response_bytes_total', 'counter',
+               'Байты тел ответов в том виде, в каком они пришли по сети',
+               [f'zabbix_api_response_bytes_total{{method="{m}"}} {s.bytes_received}'
+                for m, s in methods])
+        metric('zabbix_provisioning_phase_seconds', 'gauge', 'Длительность фаз запуска',
+               [f'zabbix_provisioning_phase_seconds{{phase="{name}"}} {seconds:.6f}'
+                for name, seconds in phases])
+        metric('zabbix_provisioning_last_run_timestamp_seconds', 'gauge',
+               'Время начала последнего запуска',
+               [f'zabbix_provisioning_last_run_timestamp_seconds {self.started:.3f}'])
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, prefix: str):
+        """
+        Выгрузить метрики в PREFIX.prom и PREFIX.json. Файлы заменяются
+        атомарно, чтобы node_exporter не прочитал недописанный textfile.
+        """
+        write_atomic(f'{prefix}.prom', self.prometheus_text())
+        write_atomic(f'{prefix}.json',
+                     json.dumps(self.to_dict(), indent=2, ensure_ascii=False) + '\n')
+
+    def print_summary(self, limit: int = 10):
+        """Вывести фазы и самые затратные по суммарному времени методы"""
+        data = self.to_dict()
+        if data['phases']:
+            print("  Фазы:")
+            for name, seconds in data['phases'].items():
+                print(f"    {name:<16} {seconds:>8.3f} с")
+
+        methods = sorted(data['methods'].items(),
+                         key=lambda item: item[1]['latency_seconds_sum'], reverse=True)
+        if methods:
+            print(f"  {'Метод':<28} {'Вызовов':>8} {'Ошибок':>7} {'Сумма, с':>9} "
+                  f"{'Среднее, мс':>12} {'Отпр., КБ':>10} {'Получ., КБ':>11}")
+            for method, stats in methods[:limit]:
+                print(f"  {method:<28} {stats['calls']:>8} {stats['errors']:>7} "
+                      f"{stats['latency_seconds_sum']:>9.3f} "
+                      f"{stats['latency_seconds_avg'] * 1000:>12.1f} "
+                      f"{stats['bytes_sent'] / 1024:>10.1f} {stats['bytes_received'] / 1024:>11.1f}")
+
+
+def write_atomic(path: str, content: str):
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.tmp.{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def profiled(metrics: APIMetrics, path: Optional[str]) -> Iterator[None]:
+    """
+    Профилировать блок через cProfile, если задан path: по выходу пишутся
+    PATH (pstats, открывается snakeviz или pstats) и PATH.txt с фазами
+    запуска и самыми затратными функциями.
+    """
+    if not path:
+        yield
+        return
+
+    # Профилировщик нужен редко, а pstats тянет inspect и dataclasses
+    import cProfile
+    import io
+    import pstats
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        profile.dump_stats(path)
+
+        report = io.StringIO()
+        report.write("Фазы запуска:\n")
+        for name, seconds in metrics.phases.items():
+            report.write(f"  {name:<16} {seconds:>8.3f} с\n")
+        report.write(f"\nФункции по суммарному времени (первые {PROFILE_TOP}):\n")
+        stats = pstats.Stats(profile, stream=report)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP)
+        write_atomic(f'{path}.txt', report.getvalue())
@@ -0,0 +1,118 @@
+"""
+Прямая проверка Zabbix агентов
+Флаг available в интерфейсе хоста сервер обновляет только при своих
+проверках, поэтому он может отставать на минуты. Здесь к каждому агенту
+открывается TCP соединение (порт 10050) и выполняется пассивная проверка
+agent.ping по протоколу Zabbix. Все проверки идут одновременно в одном
+event loop, число открытых соединений ограничено fanout, поэтому обход
+сотен хостов занимает примерно один таймаут.
+"""
+
+import asyncio
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from .protocol import ProtocolError, encode, read_packet
+
+
+DEFAULT_FANOUT = 512
+DEFAULT_PROBE_TIMEOUT = 3.0
+AGENT_PORT = 10050
+PING_KEY = 'agent.ping'
+
+# Ответ агента на неподдерживаемый ключ: ZBX_NOTSUPPORTED\0причина
+NOT_SUPPORTED = 'ZBX_NOTSUPPORTED'
+
+
+class ProbeResult:
+    """Результат проверки одного агента; задержки в секундах"""
+
+    def __init__(self, host: str, ip: str, port: int):
+        self.host = host
+        self.ip = ip
+        self.port = port
+        self.connect_latency: Optional[float] = None
+        self.ping_latency: Optional[float] = None
+        self.value: Optional[str] = None
+        self.error: Optional[str] = None
+
+    @property
+    def reachable(self) -> bool:
+        """Порт агента принимает соединения"""
+        return self.connect_latency is not None
+
+    @property
+    def ok(self) -> bool:
+        """Агент ответил на agent.ping"""
+        return self.value == '1'
+
+    def status(self) -> str:
+        if self.ok:
+            return "отвечает"
+        if self.error:
+            return self.error
+        return f"ответ {self.value!r}"
+
+
+async def probe_agent(host: str, ip: str, port: int = AGENT_PORT,
+                      timeout: float = DEFAULT_PROBE_TIMEOUT, key: str = PING_KEY) -> ProbeResult:
+    """Подключиться к агенту и запросить key; timeout - на всю проверку"""
+    result = ProbeResult(host, ip, port)
+    started = time.monotonic()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except asyncio.TimeoutError:
+        result.error = "таймаут подключения"
+        return result
+    except ConnectionRefusedError:
+        result.error = "порт закрыт (соединение отклонено)"
+        return result
+    except OSError as e:
+        result.error = e.strerror or str(e)
+        return result
+    result.connect_latency = time.monotonic() - started
+
+    try:
+        sent = time.monotonic()
+        writer.write(encode(key.encode()))
+        data = await asyncio.wait_for(read_packet(reader), timeout - (sent - started))
+        result.ping_latency = time.monotonic() - sent
+        if not data:
+            result.error = "соединение закрыто без ответа (адрес не разрешен в Server агента?)"
+        else:
+            value, _, reason = data.decode(errors='replace').partition('\0')
+            result.value = value
+            if value == NOT_SUPPORTED:
+                result.error = f"{key} не поддерживается: {reason}"
+    except asyncio.TimeoutError:
+        result.error = f"нет ответа на {key}"
+    except (OSError, asyncio.IncompleteReadError, ProtocolError) as e:
+        result.error = f"ошибка обмена: {e}"
+    finally:
+        writer.close()
+    return result
+
+
+async def sweep(targets: Iterable[Tuple[str, str, int]], fanout: int = DEFAULT_FANOUT,
+                timeout: float = DEFAULT_PROBE_TIMEOUT) -> List[ProbeResult]:
+    """Проверить агентов (хост, IP, порт) параллельно, не больше fanout соединений сразу"""
+    semaphore = asyncio.Semaphore(fanout)
+
+    async def limited(host: str, ip: str, port: int) -> ProbeResult:
+        async with semaphore:
+            return await probe_agent(host, ip, port, timeout)
+
+    return list(await asyncio.gather(*(limited(*target) for target in targets)))
+
+
+def probe_agents(targets: Iterable[Tuple[str, str, int]], fanout: int = DEFAULT_FANOUT,
+                 timeout: float = DEFAULT_PROBE_TIMEOUT) -> List[ProbeResult]:
+    """Синхронная обертка над sweep в собственном event loop"""
+    return asyncio.run(sweep(targets, fanout, timeout))
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
@@ -0,0 +1,112 @@
+"""
+Протокол обмена Zabbix (заголовок ZBXD)
+Пакет: "ZBXD", байт флагов, длина данных и зарезервированное поле (по 4
+байта little-endian, с флагом больших пакетов - по 8), затем данные. Для
+сжатых пакетов данные сжаты zlib, а в зарезервированном поле - исходная
+длина. Так общаются сервер, прокси, агент (пассивные проверки) и sender.
+Чтение пакета есть в двух вариантах: для asyncio (проверки агентов) и для
+обычного сокета (sender и локальные замены агента и траппера).
+"""
+
+import asyncio
+import socket
+import struct
+import zlib
+from typing import Tuple
+
+
+MAGIC = b'ZBXD'
+FLAG_PROTOCOL = 0x01
+FLAG_COMPRESSED = 0x02
+FLAG_LARGE = 0x04
+
+# "ZBXD" + флаги; длины идут следом
+PREFIX_SIZE = len(MAGIC) + 1
+
+# Пакеты больше этого размера не принимаются (как ZBX_MAX_RECV_DATA_SIZE у сервера)
+MAX_PACKET_SIZE = 1024 ** 3
+
+
+class ProtocolError(Exception):
+    """Ответ не похож на пакет Zabbix"""
+
+
+def encode(data: bytes, compress: bool = False) -> bytes:
+    """Упаковать данные в пакет ZBXD, при compress - со сжатием zlib"""
+    flags = FLAG_PROTOCOL
+    length, reserved = len(data), 0
+    if compress:
+        flags |= FLAG_COMPRESSED
+        data, reserved = zlib.compress(data), length
+        length = len(data)
+    return MAGIC + bytes([flags]) + struct.pack('<II', length, reserved) + data
+
+
+def lengths_size(flags: int) -> int:
+    """Сколько байт после префикса занимают длина и зарезервированное поле"""
+    return 16 if flags & FLAG_LARGE else 8
+
+
+def decode_prefix(prefix: bytes) -> int:
+    """Проверить "ZBXD" и вернуть флаги"""
+    if len(prefix) < PREFIX_SIZE or prefix[:len(MAGIC)] != MAGIC:
+        raise ProtocolError(f"нет заголовка ZBXD: {prefix[:PREFIX_SIZE]!r}")
+    return prefix[len(MAGIC)]
+
+
+def decode_lengths(flags: int, raw: bytes) -> Tuple[int, int]:
+    """Длина данных и зарезервированное поле (исходная длина сжатых данных)"""
+    length, reserved = struct.unpack('<QQ' if flags & FLAG_LARGE else '<II', raw)
+    if length > MAX_PACKET_SIZE:
+        raise ProtocolError(f"слишком большой пакет: {length} байт")
+    return length, reserved
+
+
+def decode_data(flags: int, data: bytes, reserved: int) -> bytes:
+    if flags & FLAG_COMPRESSED:
+        try:
+            data = zlib.decompress(data)
+        except zlib.error as e:
+            raise ProtocolError(f"сжатые данные повреждены: {e}") from e
+        if len(data) != reserved:
+            raise ProtocolError(f"после распаковки {len(data)} байт вместо {reserved}")
+    return data
+
+
+async def read_packet(reader: asyncio.StreamReader) -> bytes:
+    """
+    Прочитать пакет из потока и вернуть данные. Если соединение закрыто
+    до первого байта, возвращается b'' (агент так отвечает адресам,
+    которых нет в его параметре Server).
+    """
+    prefix = await reader.read(PREFIX_SIZE)
+    if not prefix:
+        return b''
+    if len(prefix) < PREFIX_SIZE:
+        prefix += await reader.readexactly(PREFIX_SIZE - len(prefix))
+    flags = decode_prefix(prefix)
+    length, reserved = decode_lengths(flags, await reader.readexactly(lengths_size(flags)))
+    return decode_data(flags, await reader.readexactly(length), reserved)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks, received = [], 0
+    while received < size:
+        chunk = sock.recv(min(size - received, 1024 * 1024))
+        if not chunk:
+            raise ProtocolError(f"соединение закрыто: получено {received} байт из {size}")
+        chunks.append(chunk)
+        received += len(chunk)
+    return b''.join(chunks)
+
+
+def recv_packet(sock: socket.socket) -> bytes:
+    """То же, что read_packet, для блокирующего сокета"""
+    prefix = sock.recv(PREFIX_SIZE)
+    if not prefix:
+        return b''
+    if len(prefix) < PREFIX_SIZE:
+        prefix += _recv_exactly(sock, PREFIX_SIZE - len(prefix))
+    flags = decode_prefix(prefix)
+    length, reserved = decode_lengths(flags, _recv_exactly(sock, lengths_size(flags)))
+    return decode_data(flags, _recv_exactly(sock, length), reserved)
@@ -0,0 +1,485 @@
+"""
+Приведение объектов Zabbix к желаемому состоянию (plan/apply)
+Желаемое состояние (группы, макросы шаблонов, хосты с макросами,
+веб-сценарии, триггеры, дашборды)
+сравнивается с одним снимком сервера, и строится план только из тех
+созданий, изменений и удалений, которые действительно нужны.
+На повторном запуске без изменений план пуст и запросов на запись нет.
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .api import BulkResult, ZabbixAPI
+from .dashboards import DASHBOARD_OUTPUT, is_current, update_params
+
+
+# Порядок применения: объект может ссылаться только на объекты выше по списку
+APPLY_ORDER = [
+    ('hostgroup', 'create'),
+    ('template', 'update'),
+    ('host', 'create'),
+    ('host', 'update'),
+    ('hostinterface', 'update'),
+    ('httptest', 'create'),
+    ('httptest', 'update'),
+    ('trigger', 'create'),
+    ('trigger', 'update'),
+    ('dashboard', 'create'),
+    ('dashboard', 'update'),
+    ('trigger', 'delete'),
+    ('host', 'delete'),
+]
+
+ACTION_SIGNS = {'create': '+', 'update': '~', 'delete': '-'}
+
+
+class DesiredState:
+    """
+    Желаемое состояние объектов Zabbix.
+    hosts: [{'host', 'name', 'ip', 'groups': [имена], 'templates': [имена],
+             'macros': {макрос: значение}}] - macros необязательны
+    web_scenarios: [{'host', 'name', 'url'}]
+    triggers: [{'host', 'description', 'expression', 'priority', 'comments'}]
+    dashboards: функция (имя хоста -> ID, (hostid, ключ) -> ID элемента)
+                -> {имя дашборда: виджеты}
+    dashboard_items: ключи элементов данных, которые нужны виджетам дашбордов
+    template_macros: {имя шаблона: {макрос: значение}} - макросы существующих
+                     шаблонов; остальные макросы шаблона не меняются
+    """
+
+    def __init__(self, hosts: List[Dict], web_scenarios: List[Dict] = None,
+                 triggers: List[Dict] = None,
+                 dashboards: Callable[[Dict[str, str], Dict[Tuple[str, str], str]],
+                                      Dict[str, List[Dict]]] = None,
+                 dashboard_items: List[str] = None,
+                 template_macros: Dict[str, Dict[str, str]] = None):
+        self.hosts = hosts
+        self.web_scenarios = web_scenarios or []
+        self.triggers = triggers or []
+        self.dashboards = dashboards or (lambda host_ids, item_ids: {})
+        self.dashboard_items = dashboard_items or []
+        self.template_macros = template_macros or {}
+
+    def group_names(self) -> List[str]:
+        return list(dict.fromkeys(g for h in self.hosts for g in h['groups']))
+
+    def template_names(self) -> List[str]:
+        names = [t for h in self.hosts for t in h['templates']] + list(self.template_macros)
+        return list(dict.fromkeys(names))
+
+    def dashboard_names(self) -> List[str]:
+        """
+        Все дашборды, которые может отрисовать функция dashboards: с заглушками
+        вместо ID каждый хост считается имеющим все элементы. Дашборд без
+        нужных элементов функция не возвращает, поэтому план берет имена из
+        отрисовки по снимку, а этот список нужен, чтобы загрузить дашборды.
+        """
+        host_ids = {h['host']: h['host'] for h in self.hosts}
+        item_ids = {(h['host'], key): key for h in self.hosts for key in self.dashboard_items}
+        return list(self.dashboards(host_ids, item_ids))
+
+
+class Snapshot:
+    """Состояние сервера для объектов желаемого состояния, по одному запросу на тип"""
+
+    def __init__(self):
+        self.templates: Dict[str, str] = {}
+        self.template_macros: Dict[str, Dict[str, str]] = {}
+        self.groups: Dict[str, str] = {}
+        self.hosts: Dict[str, Dict] = {}
+        self.triggers: Dict[Tuple[str, str], Dict] = {}
+        self.httptests: Dict[Tuple[str, str], Dict] = {}
+        self.dashboards: Dict[str, Dict] = {}
+        self.items: Dict[Tuple[str, str], str] = {}
+        self.calls = 0
+
+    @classmethod
+    def load(cls, zapi: ZabbixAPI, desired: DesiredState, prune: bool = False) -> 'Snapshot':
+        """
+        Снять состояние сервера. С prune дополнительно загружаются все хосты
+        управляемых групп и все собственные (не унаследованные от шаблонов)
+        триггеры хостов, чтобы найти лишние объекты.
+        """
+        snapshot = cls()
+
+        for template in snapshot._get(zapi, 'template.get', {
+                'output': ['templateid', 'host'],
+                'selectMacros': ['macro', 'value'],
+                'filter': {'host': desired.template_names()}}):
+            snapshot.templates[template['host']] = template['templateid']
+            snapshot.template_macros[template['host']] = macro_values(template)
+
+        for group in snapshot._get(zapi, 'hostgroup.get', {
+                'output': ['groupid', 'name'],
+                'filter': {'name': desired.group_names()}}):
+            snapshot.groups[group['name']] = group['groupid']
+
+        host_params = {
+            'output': ['hostid', 'host', 'name'],
+            'selectInterfaces': ['interfaceid', 'ip', 'type', 'main'],
+            'selectGroups': ['groupid'],
+            'selectParentTemplates': ['templateid'],
+            'selectMacros': ['macro', 'value']
+        }
+        selections = [{'filter': {'host': [h['host'] for h in desired.hosts]}}]
+        if prune and snapshot.groups:
+            selections.append({'groupids': list(snapshot.groups.values())})
+
+        for selection in selections:
+            for host in snapshot._get(zapi, 'host.get', dict(host_params, **selection)):
+                snapshot.hosts[host['host']] = host
+
+        host_ids = [h['hostid'] for h in snapshot.hosts.values()]
+        if host_ids:
+            trigger_params = {
+                'output': ['triggerid', 'description', 'expression', 'priority', 'comments'],
+                'hostids': host_ids,
+                'selectHosts': ['hostid'],
+                'expandExpression': True
+            }
+            if prune:
+                # Только собственные триггеры хостов: без унаследованных от шаблонов
+                # и без созданных обнаружением (flags=4), их API удалить не дает
+                trigger_params['inherited'] = False
+                trigger_params['filter'] = {'flags': 0}
+            else:
+                trigger_params['filter'] = {
+                    'description': list(dict.fromkeys(t['description'] for t in desired.triggers))
+                }
+
+            for trigger in snapshot._get(zapi, 'trigger.get', trigger_params):
+                for host in trigger['hosts']:
+                    snapshot.triggers[(host['hostid'], trigger['description'])] = trigger
+
+            for httptest in snapshot._get(zapi, 'httptest.get', {
+                    'output': ['httptestid', 'name', 'hostid'],
+                    'hostids': host_ids,
+                    'filter': {'name': [w['name'] for w in desired.web_scenarios]},
+                    'selectSteps': ['url', 'status_codes']}):
+                snapshot.httptests[(httptest['hostid'], httptest['name'])] = httptest
+
+            if desired.dashboard_items:
+                for item in snapshot._get(zapi, 'item.get', {
+                        'output': ['itemid', 'hostid', 'key_'],
+                        'hostids': host_ids,
+                        'filter': {'key_': desired.dashboard_items}}):
+                    snapshot.items[(item['hostid'], item['key_'])] = item['itemid']
+
+        for dashboard in snapshot._get(zapi, 'dashboard.get', dict(
+                DASHBOARD_OUTPUT, filter={'name': desired.dashboard_names()})):
+            snapshot.dashboards[dashboard['name']] = dashboard
+
+        return snapshot
+
+    def _get(self, zapi: ZabbixAPI, method: str, params: Dict) -> List[Dict]:
+        self.calls += 1
+        return zapi._call(method, params)
+
+    def host_id(self, hostname: str) -> Optional[str]:
+        host = self.hosts.get(hostname)
+        return host['hostid'] if host else None
+
+
+class Change:
+    """Одно изменение плана"""
+
+    def __init__(self, kind: str, action: str, name: str, desired: Dict = None,
+                 current: Dict = None, reason: str = ''):
+        self.kind = kind
+        self.action = action
+        self.name = name
+        self.desired = desired
+        self.current = current
+        self.reason = reason
+        self.error: Optional[str] = None
+        # Причина, по которой изменение не применялось (не ошибка)
+        self.skipped: Optional[str] = None
+
+    def __str__(self):
+        reason = f" ({self.reason})" if self.reason else ''
+        method = f"{self.kind}.{self.action}"
+        return f"{ACTION_SIGNS[self.action]} {method:<21} {self.name}{reason}"
+
+
+class Plan:
+    def __init__(self, changes: List[Change] = None, warnings: List[str] = None):
+        self.changes = changes or []
+        self.warnings = warnings or []
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    def count(self, action: str) -> int:
+        return sum(1 for change in self.changes if change.action == action)
+
+    def summary(self) -> str:
+        return (f"создать: {self.count('create')}, изменить: {self.count('update')}, "
+                f"удалить: {self.count('delete')}")
+
+    def print(self):
+        """Вывести план в стиле terraform plan"""
+        for warning in self.warnings:
+            print(f"  ⚠ {warning}")
+        if not self.changes:
+            print("  ✓ Изменений нет, сервер соответствует конфигурации")
+            return
+        for change in self.changes:
+            print(f"  {change}")
+        print(f"  Итого: {self.summary()}")
+
+
+def normalize_expression(expression: str) -> str:
+    """Выражение триггера без пробелов и с каноничной ссылкой на хост (/host/key)"""
+    return re.sub(r'\(/+', '(/', expression.replace(' ', ''))
+
+
+def macro_values(owner: Dict) -> Dict[str, str]:
+    """Макросы хоста или шаблона из selectMacros: макрос -> значение"""
+    return {m['macro']: m['value'] for m in owner.get('macros', [])}
+
+
+def changed_macros(current: Dict[str, str], desired: Dict[str, str]) -> Dict[str, str]:
+    return {macro: value for macro, value in desired.items() if current.get(macro) != value}
+
+
+def _agent_interface(host: Dict) -> Optional[Dict]:
+    return next((i for i in host.get('interfaces', [])
+                 if str(i['type']) == '1' and str(i['main']) == '1'), None)
+
+
+def build_plan(desired: DesiredState, snapshot: Snapshot, prune: bool = False) -> Plan:
+    """Сравнить желаемое состояние со снимком и построить план изменений"""
+    plan = Plan()
+    changes = plan.changes
+
+    for template in desired.template_names():
+        if template not in snapshot.templates:
+            plan.warnings.append(f"Шаблон '{template}' не найден, будет пропущен")
+
+    for group in desired.group_names():
+        if group not in snapshot.groups:
+            changes.append(Change('hostgroup', 'create', group, {'name': group}))
+
+    for template, macros in desired.template_macros.items():
+        current = snapshot.template_macros.get(template)
+        changed = changed_macros(current, macros) if current is not None else {}
+        if changed:
+            changes.append(Change('template', 'update', template, {'macros': macros},
+                                  {'templateid': snapshot.templates[template], 'macros': current},
+                                  'макросы: ' + ', '.join(changed)))
+
+    for host in desired.hosts:
+        current = snapshot.hosts.get(host['host'])
+        if not current:
+            changes.append(Change('host', 'create', host['host'], host))
+            continue
+
+        reasons = []
+        template_ids = {snapshot.templates[t] for t in host['templates'] if t in snapshot.templates}
+        if {t['templateid'] for t in current.get('parentTemplates', [])} != template_ids:
+            reasons.append('шаблоны')
+        if current['name'] != host['name']:
+            reasons.append('имя')
+        current_groups = {g['groupid'] for g in current.get('groups', [])}
+        if any(snapshot.groups.get(g) not in current_groups for g in host['groups']):
+            reasons.append('группы')
+        if changed_macros(macro_values(current), host.get('macros', {})):
+            reasons.append('макросы')
+        if reasons:
+            changes.append(Change('host', 'update', host['host'], host, current,
+                                  ', '.join(reasons)))
+
+        interface = _agent_interface(current)
+        if interface and interface['ip'] != host['ip']:
+            changes.append(Change('hostinterface', 'update', host['host'], host, interface,
+                                  f"{interface['ip']} → {host['ip']}"))
+
+    for scenario in desired.web_scenarios:
+        host_id = snapshot.host_id(scenario['host'])
+        current = snapshot.httptests.get((host_id, scenario['name'])) if host_id else None
+        if not current:
+            changes.append(Change('httptest', 'create', scenario['name'], scenario))
+        elif [s['url'] for s in current.get('steps', [])] != [scenario['url']]:
+            changes.append(Change('httptest', 'update', scenario['name'], scenario, current, 'URL'))
+
+    desired_triggers = set()
+    for trigger in desired.triggers:
+        host_id = snapshot.host_id(trigger['host'])
+        desired_triggers.add((host_id, trigger['description']))
+        current = snapshot.triggers.get((host_id, trigger['description'])) if host_id else None
+        if not current:
+            changes.append(Change('trigger', 'create', trigger['description'], trigger))
+            continue
+
+        reasons = []
+        if normalize_expression(current['expression']) != normalize_expression(trigger['expression']):
+            reasons.append('выражение')
+        if str(current['priority']) != str(trigger['priority']):
+            reasons.append('важность')
+        if current.get('comments', '') != trigger.get('comments', ''):
+            reasons.append('описание')
+        if reasons:
+            changes.append(Change('trigger', 'update', trigger['description'], trigger, current,
+                                  ', '.join(reasons)))
+
+    # Виджеты сравниваются по хешу. Пока есть хосты к созданию, их элементы
+    # неизвестны: дашборд планируется по имени и отрисовывается при применении.
+    # Иначе планируются только отрисованные дашборды, а без элементов данных
+    # (например, нет шаблона Nginx) дашборд пропускается с предупреждением.
+    host_ids = {name: host['hostid'] for name, host in snapshot.hosts.items()}
+    rendered = desired.dashboards(host_ids, snapshot.items)
+    pending_hosts = any(h['host'] not in snapshot.hosts for h in desired.hosts)
+    for name in desired.dashboard_names():
+        if name not in rendered and not pending_hosts:
+            plan.warnings.append(f"Дашборд '{name}': нет элементов данных для виджетов, "
+                                 "будет пропущен")
+            continue
+        current = snapshot.dashboards.get(name)
+        if not current:
+            changes.append(Change('dashboard', 'create', name))
+        elif name in rendered and not is_current(current, rendered[name]):
+            changes.append(Change('dashboard', 'update', name, current=current,
+                                  reason='виджеты'))
+
+    if prune:
+        desired_hosts = {h['host'] for h in desired.hosts}
+        removed_hosts = {host['hostid'] for hostname, host in snapshot.hosts.items()
+                         if hostname not in desired_hosts}
+        # Триггеры удаляемых хостов уйдут вместе с хостами
+        for (host_id, description), trigger in snapshot.triggers.items():
+            if host_id not in removed_hosts and (host_id, description) not in desired_triggers:
+                changes.append(Change('trigger', 'delete', description, current=trigger))
+        for hostname, host in snapshot.hosts.items():
+            if host['hostid'] in removed_hosts:
+                changes.append(Change('host', 'delete', hostname, current=host))
+
+    order = {step: i for i, step in enumerate(APPLY_ORDER)}
+    changes.sort(key=lambda change: order[(change.kind, change.action)])
+    return plan
+
+
+def apply_plan(zapi: ZabbixAPI, plan: Plan, desired: DesiredState,
+               snapshot: Snapshot) -> Dict[str, BulkResult]:
+    """
+    Выполнить план: по одному массивному вызову (с разбиением на чанки) на каждый
+    шаг APPLY_ORDER. ID созданных групп и хостов используются на следующих шагах.
+    Ошибки сохраняются в Change.error.
+    """
+    group_ids = dict(snapshot.groups)
+    host_ids = {name: host['hostid'] for name, host in snapshot.hosts.items()}
+    template_ids = snapshot.templates
+    results = {}
+
+    dashboards: Optional[Dict[str, List[Dict]]] = None
+
+    def dashboard_widgets(name: str) -> Optional[List[Dict]]:
+        # Элементы данных всех хостов ищутся одним item.get, когда хосты уже созданы
+        nonlocal dashboards
+        if dashboards is None:
+            item_ids = zapi.get_item_ids(list(host_ids.values()), desired.dashboard_items)
+            dashboards = desired.dashboards(host_ids, item_ids)
+        return dashboards.get(name)
+
+    def resolve(names: List[str], ids: Dict[str, str]) -> List[str]:
+        return [ids[name] for name in names if name in ids]
+
+    def macro_list(macros: Dict[str, str]) -> List[Dict]:
+        return [{'macro': macro, 'value': value} for macro, value in macros.items()]
+
+    def create_host(change: Change) -> Dict:
+        host = change.desired
+        params = ZabbixAPI.host_params(host['host'], host['name'], host['ip'],
+                                       resolve(host['groups'], group_ids),
+                                       resolve(host['templates'], template_ids))
+        if host.get('macros'):
+            params['macros'] = macro_list(host['macros'])
+        return params
+
+    def update_host(change: Change) -> Dict:
+        # Группы только добавляются: хост мог быть добавлен в другие группы вручную
+        groups = [g['groupid'] for g in change.current.get('groups', [])]
+        groups += [g for g in resolve(change.desired['groups'], group_ids) if g not in groups]
+        params = {
+            'hostid': change.current['hostid'],
+            'name': change.desired['name'],
+            'groups': [{'groupid': gid} for gid in groups],
+            'templates': [{'templateid': tid}
+                          for tid in resolve(change.desired['templates'], template_ids)]
+        }
+        # Макросы заменяются целиком, поэтому заданные вручную сохраняются
+        if change.desired.get('macros'):
+            params['macros'] = macro_list(dict(macro_values(change.current),
+                                               **change.desired['macros']))
+        return params
+
+    builders = {
+        ('hostgroup', 'create'): lambda c: {'name': c.name},
+        ('template', 'update'): lambda c: {
+            'templateid': c.current['templateid'],
+            'macros': macro_list(dict(c.current['macros'], **c.desired['macros']))
+        },
+        ('host', 'create'): create_host,
+        ('host', 'update'): update_host,
+        ('hostinterface', 'update'): lambda c: {
+            'interfaceid': c.current['interfaceid'], 'ip': c.desired['ip']
+        },
+        ('httptest', 'create'): lambda c: {
+            'name': c.desired['name'],
+            'hostid': host_ids[c.desired['host']],
+            'steps': [{'name': 'Homepage check', 'url': c.desired['url'],
+                       'status_codes': '200', 'no': 1}],
+            'delay': '60s'
+        },
+        ('httptest', 'update'): lambda c: {
+            'httptestid': c.current['httptestid'],
+            'steps': [{'name': 'Homepage check', 'url': c.desired['url'],
+                       'status_codes': '200', 'no': 1}]
+        },
+        ('trigger', 'create'): lambda c: ZabbixAPI.trigger_params(
+            c.desired['description'], c.desired['expression'],
+            c.desired['priority'], c.desired.get('comments', '')
+        ),
+        ('trigger', 'update'): lambda c: dict(
+            ZabbixAPI.trigger_params(c.desired['description'], c.desired['expression'],
+                                     c.desired['priority'], c.desired.get('comments', '')),
+            triggerid=c.current['triggerid']
+        ),
+        ('dashboard', 'create'): lambda c: {
+            'name': c.name,
+            'pages': [{'widgets': dashboard_widgets(c.name)}]
+        },
+        ('dashboard', 'update'): lambda c: update_params(c.current, dashboard_widgets(c.name)),
+        ('trigger', 'delete'): lambda c: c.current['triggerid'],
+        ('host', 'delete'): lambda c: c.current['hostid'],
+    }
+
+    for kind, action in APPLY_ORDER:
+        ready = []
+        for change in plan.changes:
+            if (change.kind, change.action) != (kind, action):
+                continue
+            # Веб-сценарий хоста, который не удалось создать, пропускается
+            if kind == 'httptest' and action == 'create' and change.desired['host'] not in host_ids:
+                change.error = f"хост '{change.desired['host']}' не создан"
+                continue
+            # Дашборд, запланированный до создания хостов, мог остаться без элементов
+            if kind == 'dashboard' and dashboard_widgets(change.name) is None:
+                change.skipped = "нет элементов данных для виджетов"
+                continue
+            ready.append(change)
+        if not ready:
+            continue
+
+        result = zapi.bulk_call(f"{kind}.{action}", [builders[(kind, action)](c) for c in ready])
+        results[f"{kind}.{action}"] = result
+
+        for i, change in enumerate(ready):
+            if i in result.errors:
+                change.error = result.errors[i]
+            elif kind == 'hostgroup':
+                group_ids[change.name] = result.ids[i]
+            elif kind == 'host' and action == 'create':
+                host_ids[change.name] = result.ids[i]
+
+    return results
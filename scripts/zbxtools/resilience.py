@@ -0,0 +1,134 @@
+"""
+Управление хвостовыми задержками запросов к Zabbix API
+Бюджет времени на весь запуск (Deadline), повторы с экспоненциальной
+задержкой и случайным разбросом, скользящая оценка p95 задержки чтения
+для дублирующих (hedged) запросов и лимит параллельности, который
+уменьшается, когда сервер начинает отвечать медленнее.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+
+
+# Повторы только для чтения; коды ответа, при которых повтор имеет смысл
+DEFAULT_RETRIES = 2
+RETRY_STATUSES = (429, 502, 503, 504)
+BACKOFF_BASE = 0.2
+BACKOFF_CAP = 5.0
+
+# Сколько замеров нужно, прежде чем p95 станет порогом для дублирующего запроса
+MIN_LATENCY_SAMPLES = 20
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Бюджет времени запуска исчерпан; обрабатывается как обычный таймаут запроса"""
+
+
+class Deadline:
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return self.expires - time.monotonic()
+
+    def check(self):
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(f"бюджет времени {self.budget:g} с исчерпан")
+
+    def clamp(self, timeout: Union[float, Tuple[float, float]]) -> Union[float, Tuple[float, float]]:
+        """Таймаут запроса, не выходящий за оставшийся бюджет"""
+        self.check()
+        remaining = self.remaining()
+        if isinstance(timeout, tuple):
+            return tuple(min(t, remaining) for t in timeout)
+        return min(timeout, remaining)
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Задержка перед повтором: экспонента с полным случайным разбросом (full jitter)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def is_retryable(error: Exception) -> bool:
+    """Ошибка сети, таймаут или перегрузка фронтенда, а не ошибка в самом запросе"""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code in RETRY_STATUSES
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+class LatencyTracker:
+    """Скользящее окно задержек для оценки перцентилей"""
+
+    def __init__(self, window: int = 256):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+class AdaptiveLimiter:
+    """
+    Лимит одновременных запросов (AIMD): растет на 1 за каждые limit ответов
+    и уменьшается в decrease раз, когда запрос завершился ошибкой или
+    короткая скользящая средняя задержки метода превысила долгую в tolerance
+    раз, то есть фронтенд резко замедлился. Ровная очередь при постоянной
+    нагрузке лимит не снижает. Уменьшение - не чаще одного раза на limit
+    ответов, чтобы одна волна медленных ответов не обрушила лимит до минимума.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1, tolerance: float = 2.0,
+                 decrease: float = 0.7, smoothing: float = 0.2, baseline_smoothing: float = 0.01):
+        self.maximum = max(maximum, minimum)
+        self.minimum = minimum
+        self.tolerance = tolerance
+        self.decrease = decrease
+        self.smoothing = smoothing
+        self.baseline_smoothing = baseline_smoothing
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        # Метод -> (короткая, долгая) средняя задержка в секундах
+        self.latency: Dict[str, Tuple[float, float]] = {}
+        self._since_decrease = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, method: str, latency: Optional[float] = None, failed: bool = False):
+        with self._condition:
+            self.in_flight -= 1
+            self._since_decrease += 1
+            overloaded = failed
+            if latency is not None:
+                recent, baseline = self.latency.get(method, (latency, latency))
+                recent += self.smoothing * (latency - recent)
+                baseline += self.baseline_smoothing * (latency - baseline)
+                self.latency[method] = (recent, baseline)
+                overloaded = overloaded or recent > baseline * self.tolerance
+
+            if overloaded and self._since_decrease >= self.limit:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self._since_decrease = 0
+            elif not overloaded:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
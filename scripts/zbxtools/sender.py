@@ -0,0 +1,231 @@
+"""
+Отправка значений в Zabbix по протоколу sender (траппер, порт 10051)
+Значения копятся в ограниченной очереди и уходят пакетами по batch_size
+значений вперемешку по хостам и ключам: один пакет - одно TCP соединение
+и один JSON "sender data", как у zabbix_sender. С compress пакеты
+сжимаются zlib (сервер принимает сжатые пакеты с Zabbix 4.0). Фоновый
+поток отправляет пакет, когда набралось batch_size значений или прошло
+flush_interval секунд с первого неотправленного значения.
+
+    with ZabbixSender('158.160.104.168') as sender:
+        sender.add('web1', 'nginx.log.5xx', 3)
+"""
+
+import json
+import queue
+import re
+import socket
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Union
+
+from .protocol import ProtocolError, encode, recv_packet
+
+DEFAULT_SENDER_PORT = 10051
+# Значений в одном пакете; zabbix_sender отправляет по 250, сервер принимает и больше
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_QUEUE_SIZE = 100000
+DEFAULT_SENDER_TIMEOUT = 10.0
+
+# "processed: 2; failed: 1; total: 3; seconds spent: 0.000055"
+INFO_PATTERN = re.compile(r'processed: (\d+); failed: (\d+); total: (\d+); '
+                          r'seconds spent: ([\d.]+)')
+
+
+class SenderError(Exception):
+    """Сервер недоступен или ответил не success"""
+
+
+class SenderResponse:
+    """Итог отправки одного или нескольких пакетов"""
+
+    def __init__(self, processed: int = 0, failed: int = 0, total: int = 0,
+                 seconds: float = 0.0):
+        self.processed = processed
+        self.failed = failed
+        self.total = total
+        self.seconds = seconds
+        self.frames = 0
+        self.bytes_sent = 0
+
+    @classmethod
+    def parse(cls, response: Dict) -> 'SenderResponse':
+        if response.get('response') != 'success':
+            raise SenderError(f"сервер ответил {response.get('response')!r}: "
+                              f"{response.get('info', '')}")
+        match = INFO_PATTERN.search(response.get('info', ''))
+        if not match:
+            raise SenderError(f"неожиданный ответ сервера: {response.get('info')!r}")
+        processed, failed, total, seconds = match.groups()
+        return cls(int(processed), int(failed), int(total), float(seconds))
+
+    def merge(self, other: 'SenderResponse'):
+        self.processed += other.processed
+        self.failed += other.failed
+        self.total += other.total
+        self.seconds += other.seconds
+        self.frames += other.frames
+        self.bytes_sent += other.bytes_sent
+
+    def __str__(self) -> str:
+        return (f"обработано {self.processed}, отклонено {self.failed}, "
+                f"всего {self.total}, пакетов {self.frames}")
+
+
+def sender_value(host: str, key: str, value, clock: Optional[float] = None) -> Dict:
+    """Значение в формате sender data; clock с долями секунды передается как clock и ns"""
+    item = {'host': host, 'key': key, 'value': value if isinstance(value, str) else str(value)}
+    if clock is not None:
+        item['clock'] = int(clock)
+        item['ns'] = int((clock - int(clock)) * 1e9)
+    return item
+
+
+class ZabbixSender:
+    def __init__(self, server: str, port: int = DEFAULT_SENDER_PORT,
+                 batch_size: int = DEFAULT_BATCH_SIZE, compress: bool = False,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, timeout: float = DEFAULT_SENDER_TIMEOUT):
+        self.server = server
+        self.port = port
+        self.batch_size = batch_size
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.queue: queue.Queue = queue.Queue(queue_size)
+        self.result = SenderResponse()
+        # Значения, которые не удалось отправить (сервер недоступен, очередь полна)
+        self.lost = 0
+        self.errors: List[str] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Синхронная отправка
+
+    def send_batch(self, values: List[Dict]) -> SenderResponse:
+        """Отправить значения одним пакетом"""
+        now = time.time()
+        body = json.dumps({'request': 'sender data', 'data': values,
+                           'clock': int(now), 'ns': int((now - int(now)) * 1e9)},
+                          separators=(',', ':')).encode()
+        packet = encode(body, self.compress)
+        try:
+            with socket.create_connection((self.server, self.port), self.timeout) as sock:
+                sock.sendall(packet)
+                reply = recv_packet(sock)
+        except (OSError, ProtocolError) as e:
+            raise SenderError(f"{self.server}:{self.port}: {e}")
+        if not reply:
+            raise SenderError(f"{self.server}:{self.port}: соединение закрыто без ответа")
+
+        try:
+            response = json.loads(reply)
+        except ValueError as e:
+            raise SenderError(f"{self.server}:{self.port}: ответ не JSON: {e}")
+        if not isinstance(response, dict):
+            raise SenderError(f"{self.server}:{self.port}: неожиданный ответ: {response!r}")
+        result = SenderResponse.parse(response)
+        result.frames = 1
+        result.bytes_sent = len(packet)
+        return result
+
+    def send(self, values: Iterable[Dict]) -> SenderResponse:
+        """Отправить значения пакетами по batch_size; результаты суммируются"""
+        total = SenderResponse()
+        batch = []
+        for value in values:
+            batch.append(value)
+            if len(batch) >= self.batch_size:
+                total.merge(self.send_batch(batch))
+                batch = []
+        if batch:
+            total.merge(self.send_batch(batch))
+        return total
+
+    # --- Очередь и фоновая отправка
+
+    def add(self, host: str, key: str, value: Union[str, int, float],
+            clock: Optional[float] = None, block: bool = True) -> bool:
+        """
+        Поставить значение в очередь. Если очередь полна, при block=True
+        ждем, пока фоновый поток ее разгрузит, иначе значение теряется
+        и возвращается False.
+        """
+        if self._thread is None:
+            self.start()
+        try:
+            self.queue.put(sender_value(host, key, value, clock), block=block)
+        except queue.Full:
+            with self._lock:
+                self.lost += 1
+            return False
+        return True
+
+    def start(self) -> 'ZabbixSender':
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='zabbix-sender', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not (self._stop.is_set() and self.queue.empty()):
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+
+            # Первое значение пришло - ждем остальные не дольше flush_interval
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if self._stop.is_set():
+                    remaining = 0
+                try:
+                    batch.append(self.queue.get(timeout=remaining) if remaining > 0
+                                 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._send_queued(batch)
+
+    def _send_queued(self, batch: List[Dict]):
+        try:
+            result = self.send_batch(batch)
+        except SenderError as e:
+            with self._lock:
+                self.lost += len(batch)
+                self.errors.append(str(e))
+        else:
+            with self._lock:
+                self.result.merge(result)
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    def flush(self):
+        """Дождаться отправки всего, что уже стоит в очереди"""
+        if self._thread is not None:
+            self.queue.join()
+
+    def close(self):
+        """Отправить остаток очереди и остановить фоновый поток"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'ZabbixSender':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def print_summary(self):
+        print(f"   Отправлено в Zabbix: {self.result}")
+        if self.lost:
+            print(f"⚠ Не отправлено значений: {self.lost}")
+        for error in self.errors[-3:]:
+            print(f"⚠ {error}")
@@ -0,0 +1,73 @@
+"""
+Кэш сессий Zabbix API между запусками скриптов
+Каждый user.login создает на фронтенде сессию, которая живет в таблице
+sessions до истечения срока, поэтому запуски по cron без user.logout
+копят сессии. С кэшем токен сессии сохраняется в файле с правами 0600,
+а следующий запуск проверяет его одним user.checkAuthentication вместо
+входа. Записи разделены по URL сервера и имени пользователя.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+
+# Путь к кэшу по умолчанию; переменная ZBX_SESSION_CACHE включает кэш для всех скриптов
+DEFAULT_SESSION_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'zbxtools', 'sessions.json')
+SESSION_ENV = 'ZBX_SESSION_CACHE'
+
+
+class SessionCache:
+    def __init__(self, path: str = DEFAULT_SESSION_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional['SessionCache']:
+        """Кэш, если он включен переменной ZBX_SESSION_CACHE (1 - путь по умолчанию, иначе путь)"""
+        value = os.environ.get(SESSION_ENV, '')
+        if not value or value == '0':
+            return None
+        return cls(DEFAULT_SESSION_PATH if value == '1' else value)
+
+    @staticmethod
+    def _key(server: str, username: str) -> str:
+        return f'{username}@{server}'
+
+    def _load(self) -> Dict[str, str]:
+        try:
+            with open(self.path) as f:
+                sessions = json.load(f)
+        except (OSError, ValueError):
+            # Нет файла или он поврежден - считаем кэш пустым
+            return {}
+        return sessions if isinstance(sessions, dict) else {}
+
+    def _save(self, sessions: Dict[str, str]):
+        """Записать файл атомарно; права 0600 выставляются до записи токенов"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        tmp_path = f'{self.path}.tmp.{os.getpid()}'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(sessions, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def get(self, server: str, username: str) -> Optional[str]:
+        """Сохраненный токен сессии или None"""
+        with self._lock:
+            return self._load().get(self._key(server, username))
+
+    def store(self, server: str, username: str, token: str):
+        with self._lock:
+            sessions = self._load()
+            sessions[self._key(server, username)] = token
+            self._save(sessions)
+
+    def discard(self, server: str, username: str):
+        """Удалить токен, который сервер больше не принимает"""
+        with self._lock:
+            sessions = self._load()
+            if sessions.pop(self._key(server, username), None) is not None:
+                self._save(sessions)
@@ -0,0 +1,210 @@
+"""
+Outputs Terraform без запуска terraform output
+terraform output -json каждый раз инициализирует backend и провайдеры и
+занимает несколько секунд, а без установленного terraform не работает
+вовсе. Outputs хранятся в самом state, поэтому здесь они читаются из него
+напрямую и кэшируются по отпечатку state:
+- локальный state (terraform.tfstate или terraform.tfstate.d/<workspace>/)
+  - отпечаток по размеру и времени изменения файла, при промахе outputs
+  берутся из файла без CLI, а в кэш пишутся вместе с lineage и serial;
+- удаленный backend - один terraform state pull, когда запись в кэше
+  старше max_age (если terraform недоступен - устаревшая запись);
+  отпечаток - lineage и serial полученного state. Без state pull изменить
+  state нельзя узнать, поэтому пока запись моложе max_age, apply с другой
+  машины или из CI не виден. Команды, по которым настраиваются хосты
+  (инвентарь, источник хостов provision), по умолчанию используют max_age 0:
+  state читается всегда, а кэш нужен только если terraform недоступен.
+Файл можно передать и явно: state или выгрузку terraform output -json.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+# Путь к кэшу по умолчанию; переменная ZBX_TF_CACHE задает другой путь, 0 - выключает
+DEFAULT_OUTPUTS_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'zbxtools',
+                                     'terraform-outputs.json')
+OUTPUTS_CACHE_ENV = 'ZBX_TF_CACHE'
+
+# Сколько секунд доверять кэшу outputs удаленного state без state pull
+# (zbxctl outputs, который скрипты вызывают по несколько раз подряд)
+DEFAULT_REMOTE_MAX_AGE = 300
+
+STATE_FILE = 'terraform.tfstate'
+
+
+class TerraformError(Exception):
+    """Outputs не удалось получить ни из state, ни через terraform"""
+
+
+def outputs_from_state(state: Dict) -> Dict:
+    """Outputs state (версия 4) в формате terraform output -json"""
+    return {name: {'sensitive': output.get('sensitive', False),
+                   'type': output.get('type'),
+                   'value': output.get('value')}
+            for name, output in state.get('outputs', {}).items()}
+
+
+def is_state(data: Dict) -> bool:
+    return 'lineage' in data and 'serial' in data
+
+
+def load_outputs_file(path: str) -> Dict:
+    """Outputs из файла state или из выгрузки terraform output -json"""
+    with open(path) as f:
+        data = json.load(f)
+    return outputs_from_state(data) if is_state(data) else data
+
+
+def workspace(terraform_dir: str) -> str:
+    """Текущий workspace (terraform workspace select пишет его в .terraform/environment)"""
+    env = os.environ.get('TF_WORKSPACE')
+    if env:
+        return env
+    try:
+        with open(os.path.join(terraform_dir, '.terraform', 'environment')) as f:
+            return f.read().strip() or 'default'
+    except OSError:
+        return 'default'
+
+
+def backend_type(terraform_dir: str) -> str:
+    """Тип backend из .terraform/terraform.tfstate (его пишет terraform init); local по умолчанию"""
+    try:
+        with open(os.path.join(terraform_dir, '.terraform', STATE_FILE)) as f:
+            return json.load(f).get('backend', {}).get('type') or 'local'
+    except (OSError, ValueError):
+        return 'local'
+
+
+def local_state_path(terraform_dir: str) -> str:
+    name = workspace(terraform_dir)
+    if name == 'default':
+        return os.path.join(terraform_dir, STATE_FILE)
+    return os.path.join(terraform_dir, 'terraform.tfstate.d', name, STATE_FILE)
+
+
+def file_fingerprint(path: str) -> str:
+    """Отпечаток файла без чтения: размер и время изменения в наносекундах"""
+    stat = os.stat(path)
+    return f'file:{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def state_fingerprint(terraform_dir: str) -> Optional[str]:
+    """Отпечаток локального state; None - state удаленный или его нет"""
+    if backend_type(terraform_dir) != 'local':
+        return None
+    try:
+        return file_fingerprint(local_state_path(terraform_dir))
+    except FileNotFoundError:
+        return None
+
+
+class OutputsCache:
+    """Outputs по каталогу конфигурации и workspace вместе с отпечатком state"""
+
+    def __init__(self, path: str = DEFAULT_OUTPUTS_CACHE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional['OutputsCache']:
+        """Кэш включен по умолчанию; ZBX_TF_CACHE=0 выключает, другое значение - путь"""
+        value = os.environ.get(OUTPUTS_CACHE_ENV, '')
+        if value == '0':
+            return None
+        return cls(value if value and value != '1' else DEFAULT_OUTPUTS_CACHE)
+
+    @staticmethod
+    def key(terraform_dir: str) -> str:
+        return f'{workspace(terraform_dir)}@{os.path.abspath(terraform_dir)}'
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def get(self, terraform_dir: str) -> Optional[Dict]:
+        """Запись {fingerprint, stored, outputs} или None"""
+        with self._lock:
+            return self._load().get(self.key(terraform_dir))
+
+    def store(self, terraform_dir: str, fingerprint: str, outputs: Dict, **extra):
+        """Записать атомарно с правами 0600: в outputs бывают секреты"""
+        with self._lock:
+            entries = self._load()
+            entries[self.key(terraform_dir)] = dict(extra, fingerprint=fingerprint,
+                                                    stored=time.time(), outputs=outputs)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            tmp_path = f'{self.path}.tmp.{os.getpid()}'
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def run_terraform(terraform_dir: str, *args: str) -> str:
+    try:
+        result = subprocess.run(['terraform', *args], cwd=terraform_dir,
+                                capture_output=True, text=True, check=True)
+    except FileNotFoundError:
+        raise TerraformError("terraform не установлен, а outputs нет ни в state, ни в кэше")
+    except subprocess.CalledProcessError as e:
+        raise TerraformError(f"terraform {' '.join(args)}: {e.stderr.strip() or e}")
+    return result.stdout
+
+
+def state_id(state: Dict) -> str:
+    return f"state:{state['lineage']}:{state['serial']}"
+
+
+def get_outputs(terraform_dir: str, cache: OutputsCache = None, source: str = None,
+                remote_max_age: float = DEFAULT_REMOTE_MAX_AGE) -> Tuple[Dict, str]:
+    """
+    Outputs и откуда они взяты: 'file', 'cache', 'state' или 'state pull'.
+    source - явный файл state или выгрузки outputs, кэш тогда не используется.
+    """
+    if source:
+        return load_outputs_file(source), 'file'
+
+    entry = cache.get(terraform_dir) if cache else None
+
+    if backend_type(terraform_dir) == 'local':
+        path = local_state_path(terraform_dir)
+        if not os.path.exists(path):
+            raise TerraformError(f"нет {path}: выполните terraform apply или передайте "
+                                 "файл outputs")
+        fingerprint = file_fingerprint(path)
+        if entry and entry['fingerprint'] == fingerprint:
+            return entry['outputs'], 'cache'
+        with open(path) as f:
+            state = json.load(f)
+        outputs = outputs_from_state(state)
+        if cache:
+            cache.store(terraform_dir, fingerprint, outputs, state=state_id(state))
+        return outputs, 'state'
+
+    if entry and time.time() - entry['stored'] < remote_max_age:
+        return entry['outputs'], 'cache'
+    try:
+        state = json.loads(run_terraform(terraform_dir, 'state', 'pull'))
+    except TerraformError as e:
+        if not entry:
+            raise
+        # Адреса меняются только при apply, поэтому устаревший кэш лучше ошибки
+        stored = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['stored']))
+        print(f"⚠ {e}; outputs из кэша от {stored}", file=sys.stderr)
+        return entry['outputs'], 'cache'
+    outputs = outputs_from_state(state)
+    if cache:
+        cache.store(terraform_dir, state_id(state), outputs)
+    return outputs, 'state pull'
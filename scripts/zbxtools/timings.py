@@ -0,0 +1,185 @@
+"""
+Время задач Ansible по записям callback плагина task_timing
+Плагин (ansible/callback_plugins/task_timing.py) дописывает в файл
+JSON-lines строку на каждый результат задачи на хосте и строку с итогами
+запуска. Здесь записи группируются по запускам и задачам и считаются три
+времени запуска:
+- serial - сумма времени всех задач на всех хостах (один хост за раз);
+- critical - критический путь: в плее со стратегией linear задача ждет
+  самый медленный хост, поэтому это сумма максимумов по задачам, в плее
+  со стратегией free - наибольшая сумма по одному хосту. Стратегия берется
+  из записи задачи (strategy плея), для старых записей - из ansible.cfg;
+- wall - фактическое время запуска. Разница wall и critical - ожидание
+  свободных forks и накладные расходы контроллера.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+DEFAULT_TIMINGS_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'zbxtools',
+                                    'ansible-timings.jsonl')
+TIMINGS_ENV = 'ZBX_ANSIBLE_TIMINGS'
+
+# Задачи вне ролей (сбор фактов, задачи плейбука)
+NO_ROLE = '-'
+
+DEFAULT_STRATEGY = 'linear'
+
+
+class TaskTimings:
+    """
+    Одна задача запуска на всех хостах. На хосте задача может выполниться
+    несколько раз (цикл include_tasks), время хоста - сумма выполнений.
+    """
+
+    def __init__(self, record: Dict):
+        self.uuid = record['uuid']
+        self.play = record.get('play') or ''
+        self.strategy: Optional[str] = record.get('strategy')
+        self.role = record.get('role') or NO_ROLE
+        self.name = record['task']
+        self.handler = record.get('handler', False)
+        self.hosts: Dict[str, List[Dict]] = {}
+
+    def add(self, record: Dict):
+        self.hosts.setdefault(record['host'], []).append(record)
+
+    @property
+    def label(self) -> str:
+        return f"{self.role} : {self.name}" if self.role != NO_ROLE else self.name
+
+    @property
+    def records(self) -> List[Dict]:
+        return [r for records in self.hosts.values() for r in records]
+
+    def host_durations(self) -> Dict[str, float]:
+        return {host: sum(r['duration'] for r in records) for host, records in self.hosts.items()}
+
+    @property
+    def start(self) -> float:
+        return min(r['start'] for r in self.records)
+
+    @property
+    def longest(self) -> float:
+        return max(self.host_durations().values())
+
+    @property
+    def slowest_host(self) -> str:
+        durations = self.host_durations()
+        return max(durations, key=durations.get)
+
+    @property
+    def total(self) -> float:
+        return sum(r['duration'] for r in self.records)
+
+    def count(self, *statuses: str) -> int:
+        return sum(1 for r in self.records if r['status'] in statuses)
+
+
+class RunTimings:
+    """Записи одного запуска ansible-playbook"""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.tasks: Dict[str, TaskTimings] = {}
+        # Итоговая запись; ее нет, если запуск прервали
+        self.summary: Optional[Dict] = None
+        self.playbook: Optional[str] = None
+
+    def add(self, record: Dict):
+        self.playbook = self.playbook or record.get('playbook')
+        if record.get('type') == 'run':
+            self.summary = record
+            return
+        task = self.tasks.get(record['uuid'])
+        if task is None:
+            task = self.tasks[record['uuid']] = TaskTimings(record)
+        task.add(record)
+
+    @property
+    def records(self) -> List[Dict]:
+        return [r for task in self.tasks.values() for r in task.records]
+
+    @property
+    def start(self) -> float:
+        if self.summary:
+            return self.summary['start']
+        return min((r['start'] for r in self.records), default=0.0)
+
+    @property
+    def wall(self) -> float:
+        if self.summary:
+            return self.summary['duration']
+        return max((r['start'] + r['duration'] for r in self.records), default=0.0) - self.start
+
+    @property
+    def settings(self) -> Dict:
+        return (self.summary or {}).get('settings') or {}
+
+    @property
+    def serial(self) -> float:
+        return sum(task.total for task in self.tasks.values())
+
+    def host_totals(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for record in self.records:
+            totals[record['host']] = totals.get(record['host'], 0.0) + record['duration']
+        return totals
+
+    def strategy(self, task: TaskTimings) -> str:
+        return task.strategy or self.settings.get('strategy') or DEFAULT_STRATEGY
+
+    @property
+    def critical(self) -> float:
+        """Сумма по плеям: linear - максимумы по задачам, free - самый долгий хост плея"""
+        critical = 0.0
+        free: Dict[str, Dict[str, float]] = {}
+        for task in self.tasks.values():
+            if self.strategy(task) != 'free':
+                critical += task.longest
+                continue
+            totals = free.setdefault(task.play, {})
+            for host, duration in task.host_durations().items():
+                totals[host] = totals.get(host, 0.0) + duration
+        return critical + sum(max(totals.values()) for totals in free.values())
+
+    def changed(self) -> int:
+        return sum(task.count('changed') for task in self.tasks.values())
+
+    def failed(self) -> int:
+        return sum(task.count('failed', 'unreachable') for task in self.tasks.values())
+
+    def slowest(self, top: int) -> List[TaskTimings]:
+        """Задачи по вкладу в критический путь"""
+        return sorted(self.tasks.values(), key=lambda t: t.longest, reverse=True)[:top]
+
+    def by_role(self) -> Dict[str, Dict[str, float]]:
+        """Роль -> {'critical', 'serial', 'tasks'} в порядке первого выполнения"""
+        roles: Dict[str, Dict[str, float]] = {}
+        for task in sorted(self.tasks.values(), key=lambda t: t.start):
+            role = roles.setdefault(task.role, {'critical': 0.0, 'serial': 0.0, 'tasks': 0})
+            role['critical'] += task.longest
+            role['serial'] += task.total
+            role['tasks'] += 1
+        return roles
+
+
+def load_runs(path: str = DEFAULT_TIMINGS_PATH) -> List[RunTimings]:
+    """Запуски из файла плагина по времени начала"""
+    runs: Dict[str, RunTimings] = {}
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Последняя строка могла не дописаться при аварийном завершении
+                continue
+            run_id = record.get('run')
+            if not run_id:
+                continue
+            run = runs.get(run_id)
+            if run is None:
+                run = runs[run_id] = RunTimings(run_id)
+            run.add(record)
+    return sorted((run for run in runs.values() if run.tasks), key=lambda r: r.start)
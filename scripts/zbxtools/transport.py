@@ -0,0 +1,87 @@
+"""
+HTTP-транспорт для JSON-RPC запросов к Zabbix
+Держит один requests.Session с пулом keep-alive соединений, чтобы
+серия API вызовов не открывала новое TCP/TLS соединение на каждый запрос.
+"""
+
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# (connect, read) таймауты в секундах
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 10.0)
+DEFAULT_POOL_SIZE = 4
+
+
+class HTTPTransport:
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 pool_block: bool = False):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Content-Type': 'application/json-rpc',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        })
+
+        # Zabbix frontend - один хост, поэтому пул пулов из одного элемента,
+        # а pool_maxsize ограничивает число параллельных соединений к нему
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                                   pool_block=pool_block, max_retries=0)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        # Счетчики пулов, которые уже были вытеснены или закрыты
+        self._closed_connections = 0
+        self._closed_requests = 0
+
+    def post(self, url: str, payload: Union[Dict, list],
+             timeout: Optional[Union[float, Tuple[float, float]]] = None) -> requests.Response:
+        """Отправить JSON тело POST запросом через пул соединений"""
+        response = self.session.post(url, json=payload,
+                                     timeout=timeout if timeout is not None else self.timeout)
+        response.raise_for_status()
+        return response
+
+    def get(self, url: str, timeout: Optional[Union[float, Tuple[float, float]]] = None,
+            **kwargs) -> requests.Response:
+        """Выполнить GET запрос через пул соединений"""
+        return self.session.get(url, timeout=timeout if timeout is not None else self.timeout,
+                                **kwargs)
+
+    def _pools(self):
+        manager = self.adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is not None:
+                yield pool
+
+    def connection_stats(self) -> Dict[str, int]:
+        """Статистика соединений: сколько открыто новых и сколько переиспользовано"""
+        opened = self._closed_connections
+        requests_total = self._closed_requests
+        for pool in self._pools():
+            opened += pool.num_connections
+            requests_total += pool.num_requests
+
+        return {
+            'requests': requests_total,
+            'opened': opened,
+            'reused': max(requests_total - opened, 0)
+        }
+
+    def close(self):
+        """Закрыть все соединения пула"""
+        for pool in self._pools():
+            self._closed_connections += pool.num_connections
+            self._closed_requests += pool.num_requests
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,200 @@
+"""
+Наблюдение за доступностью агентов и проблемами без полной выгрузки хостов
+Полный список хостов с интерфейсами загружается один раз (и заново, если
+изменилось число хостов или прошло resync циклов). В остальных циклах
+запрашиваются только agent интерфейсы, которые сейчас не доступны, число
+хостов и события после курсора по eventid. Пока почти все агенты доступны,
+на цикл уходит несколько сотен байт; неизвестные и недоступные интерфейсы
+возвращаются в каждом цикле, поэтому при массовом отказе трафик цикла растет
+с их числом. Наружу отдаются только переходы: изменение доступности агента,
+новая или решенная проблема, добавленный или удаленный хост.
+"""
+
+import json
+import time
+from typing import Dict, Iterator, List
+
+from .api import ZabbixAPI
+
+# Полная перезагрузка хостов раз в столько циклов: ловит замену хоста
+# (удален и добавлен за один цикл) и изменение IP интерфейсов
+RESYNC_CYCLES = 60
+
+# Сколько событий запрашивать за один event.get
+EVENT_PAGE_SIZE = 1000
+
+AVAILABILITY = {'0': "неизвестно", '1': "доступен", '2': "недоступен"}
+SEVERITY = {'0': "не классифицировано", '1': "информация", '2': "предупреждение",
+            '3': "средняя", '4': "высокая", '5': "чрезвычайная"}
+
+
+class StatusWatcher:
+    def __init__(self, zapi: ZabbixAPI, resync_cycles: int = RESYNC_CYCLES):
+        self.zapi = zapi
+        self.resync_cycles = resync_cycles
+        # ID интерфейса -> хост, адрес и доступность основного agent интерфейса
+        self.interfaces: Dict[str, Dict] = {}
+        self.host_count = 0
+        # Последний обработанный eventid
+        self.cursor = 0
+        self.cycles = 0
+
+    def _load_hosts(self) -> Dict[str, Dict]:
+        interfaces = {}
+        self.host_count = 0
+        for host in self.zapi.iter_hosts(fields=['host', 'name', 'status']):
+            self.host_count += 1
+            if host['status'] != '0':
+                continue
+            for interface in host.get('interfaces', []):
+                if interface['type'] == '1' and interface['main'] == '1':
+                    interfaces[interface['interfaceid']] = {
+                        'host': host['host'],
+                        'ip': interface['ip'],
+                        'port': interface['port'],
+                        'available': interface.get('available', '0'),
+                        'error': interface.get('error', '')
+                    }
+        return interfaces
+
+    def start(self) -> Dict:
+        """Загрузить начальное состояние и поставить курсор событий на последнее событие"""
+        self.interfaces = self._load_hosts()
+
+        problems = self.zapi._call('problem.get', {
+            'output': ['eventid', 'clock', 'name', 'severity'],
+            'source': 0, 'object': 0,
+            'sortfield': 'eventid', 'sortorder': 'ASC'
+        })
+        latest = self.zapi._call('event.get', {
+            'output': ['eventid'], 'source': 0, 'object': 0,
+            'sortfield': 'eventid', 'sortorder': 'DESC', 'limit': 1
+        })
+        self.cursor = int(latest[0]['eventid']) if latest else 0
+
+        return {
+            'type': 'snapshot',
+            'time': int(time.time()),
+            'hosts': self.host_count,
+            'agents': len(self.interfaces),
+            'unavailable': sorted(i['host'] for i in self.interfaces.values()
+                                  if i['available'] == '2'),
+            'problems': [{'eventid': p['eventid'], 'clock': int(p['clock']), 'name': p['name'],
+                          'severity': SEVERITY.get(p['severity'], p['severity'])}
+                         for p in problems]
+        }
+
+    def poll(self) -> List[Dict]:
+        """Один цикл наблюдения: переходы с прошлого цикла в порядке обнаружения"""
+        self.cycles += 1
+        now = int(time.time())
+        count = int(self.zapi._call('host.get', {'countOutput': True}))
+
+        if count != self.host_count or self.cycles % self.resync_cycles == 0:
+            changes = self._resync(now)
+        else:
+            changes = self._poll_unavailable(now)
+        return changes + list(self._poll_events())
+
+    @staticmethod
+    def _transition(now: int, interface: Dict, previous: str) -> Dict:
+        """Переход агента из доступности previous в текущую доступность interface"""
+        return {
+            'type': 'agent',
+            'time': now,
+            'host': interface['host'],
+            'ip': interface['ip'],
+            'port': interface['port'],
+            'from': AVAILABILITY.get(previous, previous),
+            'to': AVAILABILITY.get(interface['available'], interface['available']),
+            'error': interface['error']
+        }
+
+    def _poll_unavailable(self, now: int) -> List[Dict]:
+        """Доступные агенты в ответ не попадают, поэтому исправный парк стоит пустого списка"""
+        current = {i['interfaceid']: i for i in self.zapi._call('hostinterface.get', {
+            'output': ['interfaceid', 'available', 'error'],
+            'filter': {'type': '1', 'main': '1', 'available': ['0', '2']}
+        })}
+
+        changes = []
+        for interface_id, interface in self.interfaces.items():
+            state = current.get(interface_id, {'available': '1', 'error': ''})
+            if state['available'] != interface['available']:
+                previous = interface['available']
+                interface.update(available=state['available'], error=state.get('error', ''))
+                changes.append(self._transition(now, interface, previous))
+        return changes
+
+    def _resync(self, now: int) -> List[Dict]:
+        previous = self.interfaces
+        self.interfaces = self._load_hosts()
+        previous_hosts = {i['host'] for i in previous.values()}
+        current_hosts = {i['host'] for i in self.interfaces.values()}
+
+        changes = [{'type': 'host_added', 'time': now, 'host': host}
+                   for host in sorted(current_hosts - previous_hosts)]
+        changes += [{'type': 'host_removed', 'time': now, 'host': host}
+                    for host in sorted(previous_hosts - current_hosts)]
+        for interface_id, interface in self.interfaces.items():
+            before = previous.get(interface_id)
+            if before and before['available'] != interface['available']:
+                changes.append(self._transition(now, interface, before['available']))
+        return changes
+
+    def _poll_events(self) -> Iterator[Dict]:
+        """События после курсора: возникновение (value=1) и решение (value=0) проблем"""
+        while True:
+            events = self.zapi._call('event.get', {
+                'output': ['eventid', 'clock', 'value', 'name', 'severity'],
+                'selectHosts': ['host'],
+                'source': 0, 'object': 0,
+                'eventid_from': str(self.cursor + 1),
+                'sortfield': 'eventid', 'sortorder': 'ASC',
+                'limit': EVENT_PAGE_SIZE
+            })
+            for event in events:
+                self.cursor = max(self.cursor, int(event['eventid']))
+                yield {
+                    'type': 'problem' if event['value'] == '1' else 'resolved',
+                    'time': int(event['clock']),
+                    'eventid': event['eventid'],
+                    'host': ', '.join(h['host'] for h in event.get('hosts', [])),
+                    'name': event['name'],
+                    'severity': SEVERITY.get(event['severity'], event['severity'])
+                }
+            if len(events) < EVENT_PAGE_SIZE:
+                return
+
+
+def format_time(timestamp: int) -> str:
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+def format_change(change: Dict) -> str:
+    """Переход в виде строки для терминала"""
+    when = format_time(change['time'])
+    kind = change['type']
+    if kind == 'agent':
+        icon = '✅' if change['to'] == AVAILABILITY['1'] else '❌'
+        error = f": {change['error']}" if change['error'] else ''
+        return (f"{when}  {icon} {change['host']} ({change['ip']}:{change['port']}): "
+                f"агент {change['from']} → {change['to']}{error}")
+    if kind == 'problem':
+        return f"{when}  🔥 [{change['severity']}] {change['host']}: {change['name']}"
+    if kind == 'resolved':
+        return f"{when}  ✅ Решено: {change['host']}: {change['name']}"
+    if kind == 'host_added':
+        return f"{when}  ➕ Добавлен хост {change['host']}"
+    if kind == 'host_removed':
+        return f"{when}  ➖ Удален хост {change['host']}"
+    return f"{when}  {json.dumps(change, ensure_ascii=False)}"
+
+
+def format_snapshot(snapshot: Dict) -> List[str]:
+    lines = [f"{format_time(snapshot['time'])}  👀 Хостов: {snapshot['hosts']}, "
+             f"агентов: {snapshot['agents']}, недоступно: {len(snapshot['unavailable'])}, "
+             f"открытых проблем: {len(snapshot['problems'])}"]
+    lines += [f"   ❌ {host}: агент недоступен" for host in snapshot['unavailable']]
+    lines += [f"   🔥 [{p['severity']}] {p['name']}" for p in snapshot['problems']]
+    return lines